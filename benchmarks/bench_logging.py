@@ -0,0 +1,127 @@
+"""
+Benchmark do custo do logging no BinanceTradingBot.on_message.
+
+Reproduz o mesmo stream sintético do bench_tick_to_order com um registro
+DEBUG por mensagem (com o contexto do symbol) e compara três destinos:
+
+- off: nível WARNING, o registro é descartado no próprio logger;
+- queue: QueueHandler + QueueListener (scripts.log_setup), o padrão do bot;
+- sync: FileHandler com o mesmo JSON gravando na thread do websocket
+  (o que cada bot fazia antes, com um handler por instância).
+
+Grava p50/p99/max do on_message em microssegundos por destino e os
+registros efetivamente escritos.
+
+    python -m benchmarks.bench_logging --messages 5000 --output bench_logging.json
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_tick_to_order import summarize, synthetic_stream
+from scripts.log_setup import LOG_FILE, ROOT, JsonFormatter, setup_logging, shutdown_logging
+from scripts.mock_exchange import MockExchange
+from scripts.rate_limiter import RateLimiter
+from scripts.trade_bot import BinanceTradingBot
+
+SINKS = ("off", "queue", "sync")
+
+def configure(sink, log_dir):
+    # troca o destino do logger do pacote; devolve o handler síncrono (ou None)
+    shutdown_logging()
+    logger = logging.getLogger(ROOT)
+    if sink == "queue":
+        setup_logging(log_dir=log_dir, level=logging.DEBUG)
+        return None
+    if sink == "off":
+        logger.setLevel(logging.WARNING)
+        return None
+    handler = logging.FileHandler(os.path.join(log_dir, LOG_FILE), encoding='utf-8')
+    handler.setFormatter(JsonFormatter())
+    logger.setLevel(logging.DEBUG)
+    logger.addHandler(handler)
+    logger.propagate = False
+    return handler
+
+def replay(bot, exchange, symbol, raw):
+    samples = []
+    for message in raw:
+        exchange.prices[symbol] = float(json.loads(message)["k"]["c"])
+        start = time.perf_counter_ns()
+        bot.on_message(bot.ws, message)
+        samples.append(time.perf_counter_ns() - start)
+        while not bot.msg_queue.empty():
+            bot.msg_queue.get_nowait()
+    return samples
+
+def run(symbol="BTCUSDT", interval="1m", messages=2000, ticks_per_candle=4, seed=1, sinks=SINKS):
+    results = {}
+    for sink in sinks:
+        with MockExchange(ticks_per_candle=ticks_per_candle, weight_limit=10 ** 9) as exchange, \
+                tempfile.TemporaryDirectory() as log_dir:
+            raw = synthetic_stream(exchange, symbol, interval, messages, ticks_per_candle, seed)
+            bot = BinanceTradingBot(exchange.api_key, exchange.secret_key, symbol, interval, 0.001, 1.0, 1.0,
+                                    base_url=exchange.base_url, stream_url=exchange.stream_url, mode="inline",
+                                    mark_price=False)
+            bot.binance.rate_limiter = RateLimiter(weight_limit=10 ** 9)
+
+            # um registro por mensagem, como um trace de depuração do caminho quente
+            on_kline = bot.strategy.on_kline
+
+            def traced(kline, on_kline=on_kline, logger=bot.logger):
+                logger.debug(f"KLINE close={kline['c']} closed={kline['x']}")
+                return on_kline(kline)
+
+            bot.strategy.on_kline = traced
+            handler = configure(sink, log_dir)
+            try:
+                samples = replay(bot, exchange, symbol, raw)
+                bot.executor.shutdown(wait=True)
+            finally:
+                # grava o que ficou na fila antes de contar os registros
+                shutdown_logging()
+                if handler is not None:
+                    logging.getLogger(ROOT).removeHandler(handler)
+                    handler.close()
+                logging.getLogger(ROOT).setLevel(logging.NOTSET)
+
+            path = os.path.join(log_dir, LOG_FILE)
+            written = 0
+            if os.path.exists(path):
+                with open(path, encoding='utf-8') as file:
+                    written = sum(1 for line in file if '"KLINE' in line)
+            results[sink] = {"on_message": summarize(samples), "records": written}
+
+    return {
+        "meta": {"timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"), "symbol": symbol, "interval": interval,
+                 "messages": messages, "ticks_per_candle": ticks_per_candle},
+        "sinks": results,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Logging overhead of BinanceTradingBot.on_message")
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--ticks-per-candle", type=int, default=4)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="bench_logging.json")
+    args = parser.parse_args()
+
+    result = run(args.symbol, args.interval, args.messages, args.ticks_per_candle, args.seed)
+    with open(args.output, "w") as file:
+        json.dump(result, file, indent=2)
+
+    for sink, stats in result["sinks"].items():
+        on_message = stats["on_message"]
+        print(f"{sink:>6}: p50 {on_message['p50_us']} us, p99 {on_message['p99_us']} us, "
+              f"max {on_message['max_us']} us, {stats['records']} records")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,309 @@
+"""
+Benchmark de latência tick -> ordem do BinanceTradingBot.
+
+Reproduz um stream de kline (gravado ou sintético) chamando diretamente
+`BinanceTradingBot.on_message`, com a MockExchange local no lugar da
+Binance, e mede o tempo de cada etapa por mensagem:
+
+- decode: do início do on_message até a chegada do kline na estratégia;
+- position: consulta de posição/margem (REST ou espelho do user stream);
+- indicator: buffer de candles + RSI/ATR incrementais;
+- order: envio de ordens (compra, venda e fechamento): com o OrderExecutor
+  é só o enfileiramento; com `--sync-orders`, a chamada REST inteira;
+- signal: o restante do on_kline (regras, mensagens para a interface).
+
+`tick_to_order` vai do recebimento da mensagem até o ack da corretora.
+
+O resultado (p50/p99/max em microssegundos por etapa, mensagens por
+segundo e metadados da execução) é gravado em JSON; `--compare` mostra a
+variação em relação a um resultado anterior.
+
+    python -m benchmarks.bench_tick_to_order --messages 5000 --output bench.json
+    python -m benchmarks.bench_tick_to_order --record btc.jsonl --symbol BTCUSDT --messages 1000
+    python -m benchmarks.bench_tick_to_order --recording btc.jsonl --compare bench.json
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+
+from scripts.market_data import SpotMarketData, kline_stream
+from scripts.mock_exchange import MockExchange, replay_messages
+from scripts.rate_limiter import RateLimiter
+from scripts.trade_bot import BinanceTradingBot
+
+STAGES = ("decode", "position", "indicator", "signal", "order")
+
+class StageTimer:
+    """
+    Cronometra as etapas do on_message substituindo, só na instância, os
+    métodos chamados pela estratégia. O código do bot não é alterado.
+    """
+
+    def __init__(self, bot):
+        self.bot = bot
+        self.samples = {stage: [] for stage in STAGES + ("total", "tick_to_order")}
+        self._current = None
+        self._start = 0
+
+        strategy = bot.strategy
+        self._wrap_entry(strategy, "on_kline")
+        self._wrap(strategy, "get_position", "position")
+        self._wrap(strategy.candles, "update", "indicator")
+        self._wrap(strategy.indicators, "update", "indicator")
+        for name in ("buy_market_order", "sell_market_order", "close_all_postions"):
+            self._wrap(bot.binance, name, "order", submit=True)
+        if strategy.executor is not None:
+            self._wrap_submit(strategy.executor)
+
+    def on_message(self, raw):
+        self._current = dict.fromkeys(STAGES, 0)
+        self._current["tick_to_order"] = None
+        self._current["ordered"] = False
+        self._start = time.perf_counter_ns()
+        self.bot.on_message(self.bot.ws, raw)
+        total = time.perf_counter_ns() - self._start
+
+        stages = self._current
+        stages["signal"] = total - stages["decode"] - stages["position"] - stages["indicator"] - stages["order"]
+        self.samples["total"].append(total)
+        for stage in STAGES:
+            if stage != "order":
+                self.samples[stage].append(stages[stage])
+        if stages["ordered"]:
+            # etapa de ordem só entra nas mensagens que geraram ordem
+            self.samples["order"].append(stages["order"])
+        if stages["tick_to_order"] is not None:
+            self.samples["tick_to_order"].append(stages["tick_to_order"])
+
+    def _wrap_entry(self, owner, name):
+        method = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            self._current["decode"] = time.perf_counter_ns() - self._start
+            return method(*args, **kwargs)
+
+        setattr(owner, name, timed)
+
+    def _wrap(self, owner, name, stage, submit=False):
+        method = getattr(owner, name)
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                end = time.perf_counter_ns()
+                self._current[stage] += end - start
+                if stage == "order":
+                    self._current["ordered"] = True
+                if submit and self._current["tick_to_order"] is None:
+                    # primeira ordem da mensagem: do recebimento até a resposta da corretora
+                    self._current["tick_to_order"] = end - self._start
+
+        setattr(owner, name, timed)
+
+    def _wrap_submit(self, executor):
+        # envio assíncrono: a etapa é o enfileiramento e o tick -> ack chega pelo future
+        submit = executor.submit
+
+        def timed(*args, **kwargs):
+            start = time.perf_counter_ns()
+            received = self._start
+            future = submit(*args, **kwargs)
+            self._current["order"] += time.perf_counter_ns() - start
+            self._current["ordered"] = True
+            future.add_done_callback(
+                lambda done: self.samples["tick_to_order"].append(time.perf_counter_ns() - received))
+            return future
+
+        executor.submit = timed
+
+def summarize(samples):
+    if not samples:
+        return {"count": 0, "p50_us": None, "p99_us": None, "max_us": None, "mean_us": None}
+    values = np.asarray(samples, dtype=np.float64) / 1000
+    return {
+        "count": len(values),
+        "p50_us": round(float(np.percentile(values, 50)), 2),
+        "p99_us": round(float(np.percentile(values, 99)), 2),
+        "max_us": round(float(values.max()), 2),
+        "mean_us": round(float(values.mean()), 2),
+    }
+
+def load_recording(path):
+    # uma mensagem bruta do stream por linha
+    with open(path) as file:
+        return [line.rstrip("\n") for line in file if line.strip()]
+
+def record(symbol, interval, path, count, is_test=False):
+    """
+    Grava `count` mensagens do stream de kline real em `path` (JSON lines).
+    """
+    import websocket
+
+    market = SpotMarketData(None, is_test=is_test)
+    ws = websocket.create_connection(market.socket_url(kline_stream(symbol, interval)))
+    try:
+        with open(path, "w") as file:
+            for _ in range(count):
+                file.write(ws.recv() + "\n")
+    finally:
+        ws.close()
+
+def synthetic_stream(exchange, symbol, interval, messages, ticks_per_candle, seed):
+    # histórico para o aquecimento + candles suficientes para `messages` mensagens
+    candles = -(-messages // ticks_per_candle)
+    history = 500
+    exchange.add_synthetic_klines(symbol, interval, count=history + candles, seed=seed, start=history)
+    rows = exchange.klines[(symbol, interval)][history:]
+    return [json.dumps(message) for message in replay_messages(symbol, interval, rows, ticks_per_candle)][:messages]
+
+def recorded_stream(exchange, path):
+    raw = load_recording(path)
+    klines = [json.loads(message)["k"] for message in raw]
+    symbol, interval = klines[0]["s"], klines[0]["i"]
+    # os candles fechados da gravação alimentam preços e /klines da corretora local
+    rows = [[k["t"], k["o"], k["h"], k["l"], k["c"], k["v"]] for k in klines if k["x"]]
+    exchange.add_klines(symbol, interval, rows or [[klines[0]["t"], klines[0]["o"], klines[0]["h"],
+                                                    klines[0]["l"], klines[0]["c"], klines[0]["v"]]], start=0)
+    return symbol, interval, raw
+
+def run(symbol="BTCUSDT", interval="1m", messages=5000, ticks_per_candle=4, recording=None, latency=0.0,
+        mirror=False, stop_gain=1.0, stop_loss=1.0, volume=0.001, seed=1, sync_orders=False, rate=0,
+        cadence="tick", max_rate=1.0):
+    # limites de peso folgados: o benchmark mede o código, não o orçamento da conta
+    with MockExchange(latency=latency, ticks_per_candle=ticks_per_candle, weight_limit=10 ** 9) as exchange:
+        if recording:
+            symbol, interval, raw = recorded_stream(exchange, recording)
+        else:
+            raw = synthetic_stream(exchange, symbol, interval, messages, ticks_per_candle, seed)
+
+        # modo inline: a estratégia roda dentro do on_message, então cada etapa é medida na mesma chamada
+        bot = BinanceTradingBot(exchange.api_key, exchange.secret_key, symbol, interval, volume, stop_gain, stop_loss,
+                                base_url=exchange.base_url, stream_url=exchange.stream_url, mode="inline",
+                                cadence=cadence, max_rate=max_rate)
+        bot.binance.rate_limiter = RateLimiter(weight_limit=10 ** 9)
+        if sync_orders:
+            # ordens na própria thread da estratégia (caminho anterior ao OrderExecutor)
+            bot.strategy.executor = None
+        if mirror:
+            # posições pelo espelho local do user-data stream em vez de REST
+            bot.binance.start_user_stream()
+            deadline = time.monotonic() + 5
+            while not bot.binance.account.synced and time.monotonic() < deadline:
+                time.sleep(0.01)
+
+        timer = StageTimer(bot)
+        started = time.perf_counter()
+        try:
+            for index, message in enumerate(raw):
+                if rate:
+                    # ritmo de um stream real: `rate` mensagens por segundo
+                    delay = started + index / rate - time.perf_counter()
+                    if delay > 0:
+                        time.sleep(delay)
+                # a corretora local acompanha o preço do stream para executar as ordens
+                exchange.prices[symbol] = float(json.loads(message)["k"]["c"])
+                timer.on_message(message)
+                while not bot.msg_queue.empty():
+                    bot.msg_queue.get_nowait()
+            # espera os acks das ordens ainda em voo
+            bot.executor.shutdown(wait=True)
+        finally:
+            elapsed = time.perf_counter() - started
+            if mirror:
+                bot.binance.stop_user_stream()
+
+    return {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "symbol": symbol,
+            "interval": interval,
+            "source": recording or "synthetic",
+            "messages": len(raw),
+            "ticks_per_candle": ticks_per_candle,
+            "exchange_latency_s": latency,
+            "positions_from": "user_stream" if mirror else "rest",
+            "rate": rate or None,
+            "orders_from": "strategy_thread" if sync_orders else "executor",
+            "cadence": cadence if cadence != "throttle" else f"throttle {max_rate}/s",
+            "orders": len(exchange.orders),
+        },
+        "messages_per_sec": round(len(raw) / elapsed, 1) if elapsed > 0 else None,
+        "stages": {stage: summarize(timer.samples[stage]) for stage in STAGES + ("total", "tick_to_order")},
+    }
+
+def compare(current, previous):
+    # razão atual/anterior do p50 e p99 de cada etapa (> 1 é regressão)
+    lines = []
+    for stage, stats in current["stages"].items():
+        before = previous.get("stages", {}).get(stage)
+        if not before or not stats["count"] or not before.get("count"):
+            continue
+        ratios = [f"{key} x{stats[key] / before[key]:.2f}" for key in ("p50_us", "p99_us") if before[key]]
+        lines.append(f"{stage:>14}: {', '.join(ratios)}")
+    rate, before = current["messages_per_sec"], previous.get("messages_per_sec")
+    if rate and before:
+        lines.append(f"{'msgs/sec':>14}: x{rate / before:.2f}")
+    return "\n".join(lines)
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+def main():
+    parser = argparse.ArgumentParser(description="Tick-to-order latency benchmark of BinanceTradingBot.on_message")
+    parser.add_argument("--symbol", default="BTCUSDT")
+    parser.add_argument("--interval", default="1m")
+    parser.add_argument("--messages", type=int, default=5000)
+    parser.add_argument("--ticks-per-candle", type=int, default=4)
+    parser.add_argument("--recording", help="JSON lines file with raw kline stream messages")
+    parser.add_argument("--record", help="record the live kline stream to this file and exit")
+    parser.add_argument("--latency", type=float, default=0.0, help="added latency of each mock REST call (s)")
+    parser.add_argument("--mirror", action="store_true", help="read positions from the user-data stream mirror")
+    parser.add_argument("--rate", type=float, default=0, help="replay pace in messages/sec (0 = as fast as possible)")
+    parser.add_argument("--sync-orders", action="store_true", help="send orders on the strategy thread")
+    parser.add_argument("--cadence", default="tick", choices=("tick", "throttle", "close"),
+                        help="signal evaluation cadence (stops are checked on every tick)")
+    parser.add_argument("--max-rate", type=float, default=1.0, help="evaluations per second with --cadence throttle")
+    parser.add_argument("--stop-gain", type=float, default=1.0)
+    parser.add_argument("--stop-loss", type=float, default=1.0)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", default="bench_tick_to_order.json")
+    parser.add_argument("--compare", help="previous result file")
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.symbol, args.interval, args.record, args.messages)
+        return
+
+    result = run(args.symbol, args.interval, args.messages, args.ticks_per_candle, args.recording, args.latency,
+                 args.mirror, args.stop_gain, args.stop_loss, seed=args.seed, sync_orders=args.sync_orders, rate=args.rate,
+                 cadence=args.cadence, max_rate=args.max_rate)
+    with open(args.output, "w") as file:
+        json.dump(result, file, indent=2)
+
+    print(f"{result['meta']['messages']} messages, {result['messages_per_sec']} msgs/sec, "
+          f"{result['meta']['orders']} orders")
+    for stage, stats in result["stages"].items():
+        print(f"{stage:>14}: p50 {stats['p50_us']} us, p99 {stats['p99_us']} us, max {stats['max_us']} us")
+    if args.compare:
+        with open(args.compare) as file:
+            print(compare(result, json.load(file)))
+
+if __name__ == "__main__":
+    main()
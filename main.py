@@ -1,9 +1,12 @@
-import os
+import time
 
-from scripts.interface.main_window import MainWindow
-from scripts.binance_gateway import BinanceFutures
+# antes de qualquer import: referência da partida a frio do modo headless
+STARTED = time.perf_counter()
 
-if __name__ == "__main__":
-    interface = MainWindow()
-    interface.run()
+import sys
+
+from scripts.cli import main
 
+if __name__ == "__main__":
+    # sem argumentos abre a interface; `python main.py run --config bots.json` roda sem interface
+    sys.exit(main(started=STARTED))
@@ -0,0 +1,197 @@
+import asyncio
+import json
+import logging
+import time
+
+import aiohttp
+
+from scripts.binance_gateway import BinanceAPIError, open_positions
+from scripts.exchange_info import ExchangeInfo, FilterError, prepare_order
+from scripts.rate_limiter import RateLimiter
+from scripts.signing import RECV_WINDOW, TIMESTAMP_OUTSIDE_RECV_WINDOW, RequestSigner
+
+class AsyncBinanceFutures:
+    """
+    Versão asyncio do BinanceFutures.
+
+    Usa uma única aiohttp.ClientSession com pool de conexões, de forma que
+    consultas independentes (saldo, margem, posições) possam rodar ao mesmo
+    tempo com `asyncio.gather`. Todas as chamadas aceitam `timeout` e podem
+    ser canceladas cancelando a task. Erros da API levantam BinanceAPIError.
+    """
+
+    def __init__(self, api_key, secret_key, is_test=False, base_url=None, pool_size=10, timeout=10, rate_limiter=None,
+                 recv_window=RECV_WINDOW, exchange_info_path=None):
+        self.api_key = api_key
+        self.signer = RequestSigner(secret_key, recv_window=recv_window)
+        self._secret_key = secret_key
+        self._time_sync = None
+        self.is_test = is_test
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+        self.session = None
+        # pode ser o mesmo RateLimiter do BinanceFutures síncrono
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+        # filtros por symbol, carregados pelo próprio loop (load_async) no primeiro envio de ordem
+        self.exchange_info = ExchangeInfo(None, path=exchange_info_path)
+        self._exchange_info_load = None
+
+        if base_url is not None:
+            self.base_url = base_url
+        elif self.is_test:
+            self.base_url = "https://testnet.binancefuture.com"
+        else:
+            self.base_url = "https://fapi.binance.com"
+
+    @property
+    def secret_key(self):
+        return self._secret_key
+
+    @secret_key.setter
+    def secret_key(self, secret_key):
+        # troca de chave: o HMAC pré-chaveado é refeito
+        self._secret_key = secret_key
+        self.signer.set_key(secret_key)
+
+    async def __aenter__(self):
+        await self.open()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.close()
+
+    async def open(self):
+        if self.session is None or self.session.closed:
+            connector = aiohttp.TCPConnector(limit=self.pool_size, keepalive_timeout=60)
+            self.session = aiohttp.ClientSession(
+                connector=connector,
+                headers={
+                    "Content-Type": "application/x-www-form-urlencoded",
+                    "X-MBX-APIKEY": self.api_key
+                },
+            )
+        return self.session
+
+    async def close(self):
+        if self._exchange_info_load is not None:
+            self._exchange_info_load.cancel()
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        self.session = None
+
+    async def request(self, method, endpoint, params=None, signed=True, timeout=None, priority=None, resync=True):
+        session = await self.open()
+        if signed and self.signer.needs_sync():
+            await self._sync_once()
+        await self.rate_limiter.acquire_async(method, endpoint, priority)
+        query = self.signer.query(params, signed)
+        url = f"{self.base_url}{endpoint}"
+        if query:
+            url = f"{url}?{query}"
+
+        client_timeout = aiohttp.ClientTimeout(total=timeout if timeout is not None else self.timeout)
+        async with session.request(method, url, timeout=client_timeout) as response:
+            text = await response.text()
+            self.rate_limiter.update(response.status, response.headers)
+        try:
+            data = json.loads(text)
+        except ValueError:
+            if response.status < 400:
+                raise
+            # erro fora do formato da Binance (ex.: 502 em HTML de um proxy)
+            data = None
+        if response.status >= 400:
+            error = data if isinstance(data, dict) else {}
+            if signed and resync and error.get("code") == TIMESTAMP_OUTSIDE_RECV_WINDOW:
+                # rejeitada antes de executar: corrige o relógio e reenvia uma vez
+                await self.sync_time()
+                return await self.request(method, endpoint, params, signed, timeout, priority, resync=False)
+            self.logger.error(f'{method} {endpoint}: {data if data is not None else text[:200]}')
+            raise BinanceAPIError(response.status, error.get("code"), error.get("msg", text[:200]))
+        return data
+
+    async def sync_time(self, timeout=None):
+        # offset (ms) entre o relógio local e /fapi/v1/time
+        sent = time.time()
+        response = await self.request('GET', '/fapi/v1/time', signed=False, timeout=timeout)
+        self.signer.update_offset(response["serverTime"], sent, time.time())
+        return self.signer.offset
+
+    async def _sync_once(self):
+        # chamadas simultâneas (gather) aguardam a mesma sincronização
+        if self._time_sync is None or self._time_sync.done():
+            self._time_sync = asyncio.ensure_future(self.sync_time())
+        try:
+            await asyncio.shield(self._time_sync)
+        except (aiohttp.ClientError, asyncio.TimeoutError, BinanceAPIError, KeyError, ValueError) as e:
+            self.logger.warning(f'SERVER TIME: {str(e)}')
+            self.signer.synced_at = time.monotonic()
+
+    async def get_exchange_info(self, timeout=None):
+        return await self.request('GET', '/fapi/v1/exchangeInfo', signed=False, timeout=timeout)
+
+    async def symbol_filters(self, symbol):
+        # primeira carga aguardada (chamadas simultâneas esperam a mesma); filtros vencidos são
+        # atualizados em uma task, sem atrasar a ordem que pediu
+        if self.exchange_info.expired():
+            if self._exchange_info_load is None or self._exchange_info_load.done():
+                self._exchange_info_load = asyncio.ensure_future(self.exchange_info.load_async(self.get_exchange_info))
+            if self.exchange_info.updated is None:
+                await asyncio.shield(self._exchange_info_load)
+        return self.exchange_info.filters.get(symbol)
+
+    async def place_order(self, params, timeout=None):
+        # mesmos filtros do BinanceFutures: fora deles a ordem nem é enviada
+        try:
+            params = prepare_order(await self.symbol_filters(params["symbol"]), params)
+        except FilterError as e:
+            raise BinanceAPIError(None, e.code, e.message)
+        return await self.request('POST', '/fapi/v1/order', params, timeout=timeout)
+
+    async def buy_market_order(self, symbol, quantity, timeout=None):
+        params = {"symbol": symbol, "side": "BUY", "type": "MARKET", "quantity": quantity}
+        return await self.place_order(params, timeout=timeout)
+
+    async def sell_market_order(self, symbol, quantity, timeout=None):
+        params = {"symbol": symbol, "side": "SELL", "type": "MARKET", "quantity": quantity}
+        return await self.place_order(params, timeout=timeout)
+
+    async def close_all_postions(self, symbol, quantity, side, reduce_only=False, timeout=None):
+        params = {"symbol": symbol, "side": side, "type": "MARKET", "quantity": quantity}
+        if reduce_only:
+            # só reduz a posição: nunca abre uma posição contrária
+            params["reduceOnly"] = "true"
+        return await self.place_order(params, timeout=timeout)
+
+    async def get_open_positions(self, symbol, timeout=None):
+        response = await self.request('GET', '/fapi/v2/positionRisk', timeout=timeout)
+        return open_positions(response, symbol)
+
+    async def get_trade_history(self, symbol, start_time, end_time, timeout=None):
+        params = {
+            "symbol": symbol,
+            "startTime": int(start_time.timestamp() * 1000),
+            "endTime": int(end_time.timestamp() * 1000)
+        }
+        return await self.request('GET', '/fapi/v1/userTrades', params, timeout=timeout)
+
+    async def get_account(self, timeout=None):
+        return await self.request('GET', '/fapi/v2/account', timeout=timeout)
+
+    async def get_position_margin(self, timeout=None):
+        response = await self.get_account(timeout=timeout)
+        return response['totalInitialMargin']
+
+    async def get_balance(self, symbol=None, timeout=None):
+        params = {"symbol": symbol} if symbol else None
+        return await self.request('GET', '/fapi/v2/balance', params, timeout=timeout)
+
+    async def snapshot(self, symbol, timeout=None):
+        # saldo, margem e posições em paralelo (ex.: na inicialização do bot)
+        balance, margin, positions = await asyncio.gather(
+            self.get_balance(timeout=timeout),
+            self.get_position_margin(timeout=timeout),
+            self.get_open_positions(symbol, timeout=timeout),
+        )
+        return {"balance": balance, "margin": margin, "positions": positions}
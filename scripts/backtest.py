@@ -0,0 +1,241 @@
+import numpy as np
+import tulipy as ti
+
+from scripts.strategy import SymbolStrategy
+
+TRADE_DTYPE = np.dtype([
+    ("entry_index", np.int64),
+    ("exit_index", np.int64),
+    ("side", np.int8), # 1 comprado, -1 vendido
+    ("entry_price", np.float64),
+    ("exit_price", np.float64),
+    ("pnl", np.float64),
+])
+
+class BacktestResult:
+    def __init__(self, trades, equity, open_trade=None):
+        self.trades = trades
+        self.equity = equity
+        self.open_trade = open_trade
+
+    @property
+    def pnl(self):
+        return float(self.trades["pnl"].sum())
+
+    @property
+    def max_drawdown(self):
+        if len(self.equity) == 0:
+            return 0.0
+        peak = np.maximum.accumulate(np.maximum(self.equity, 0.0))
+        return float((peak - self.equity).max())
+
+    @property
+    def win_rate(self):
+        if len(self.trades) == 0:
+            return 0.0
+        return float((self.trades["pnl"] > 0).mean())
+
+    def summary(self):
+        return {
+            "trades": int(len(self.trades)),
+            "pnl": self.pnl,
+            "win_rate": self.win_rate,
+            "max_drawdown": self.max_drawdown,
+            "open_position": self.open_trade is not None,
+        }
+
+def warmup_bars(rsi_period, atr_period):
+    # primeiro candle em que RSI e ATR já existem (o bot não opera antes)
+    return max(rsi_period, atr_period - 1, 1)
+
+def rsi_series(close, period):
+    rsi = np.full(len(close), np.nan)
+    if len(close) > period:
+        rsi[period:] = ti.rsi(np.ascontiguousarray(close, dtype=np.float64), period)
+    return rsi
+
+def run_backtest(close, rsi_period=14, rsi_oversold=30, rsi_overbought=70, atr_period=14,
+                 stop_gain=5, stop_loss=5, quantity=1.0, leverage=20, chunk=64, rsi=None):
+    """
+    Backtest vetorizado das regras de SymbolStrategy sobre candles fechados.
+
+    Sinais, ROE e equity são calculados com operações NumPy sobre o array
+    inteiro; o único laço é sobre os trades (entrada seguinte ao último
+    fechamento e primeira barra que cruza o stop gain/loss), nunca por barra.
+    Cada candle é tratado como um tick no fechamento, igual ao replay do bot.
+    `rsi` permite reaproveitar uma série já calculada por rsi_series.
+    """
+    close = np.ascontiguousarray(close, dtype=np.float64)
+    size = len(close)
+    start = warmup_bars(rsi_period, atr_period)
+    if size <= start:
+        return BacktestResult(np.zeros(0, dtype=TRADE_DTYPE), np.zeros(size))
+
+    # sinais de entrada: RSI extremo + direção em relação ao preço anterior
+    if rsi is None:
+        rsi = rsi_series(close, rsi_period)
+    previous = np.empty_like(close)
+    previous[0] = np.nan
+    previous[1:] = close[:-1]
+    with np.errstate(invalid="ignore"):
+        long_signal = (rsi <= rsi_oversold) & (close > previous)
+        short_signal = (rsi >= rsi_overbought) & (close < previous)
+    signal = np.where(long_signal, 1, np.where(short_signal, -1, 0)).astype(np.int8)
+    signal[:start] = 0
+    entries = np.flatnonzero(signal)
+
+    trades = []
+    open_trade = None
+    cursor = 0
+    while cursor < len(entries):
+        entry = entries[cursor]
+        side = int(signal[entry])
+        entry_price = close[entry]
+        amount = side * quantity
+        margin = abs(amount) * entry_price / leverage
+
+        exit_index = -1
+        begin = entry + 1
+        step = chunk
+        while begin < size:
+            end = min(begin + step, size)
+            # mesma conta de ROE feita pelo bot a cada tick
+            pnl = amount * (close[begin:end] - entry_price)
+            roe = np.where(pnl != 0, pnl / margin * 100, 0.0)
+            hit = np.flatnonzero((roe >= stop_gain) | (roe <= -stop_loss))
+            if len(hit):
+                exit_index = begin + hit[0]
+                break
+            begin = end
+            step *= 2
+
+        if exit_index < 0:
+            open_trade = (entry, side, entry_price)
+            break
+
+        exit_price = close[exit_index]
+        trades.append((entry, exit_index, side, entry_price, exit_price, amount * (exit_price - entry_price)))
+        # nova entrada só a partir do tick seguinte ao fechamento
+        cursor = np.searchsorted(entries, exit_index + 1)
+
+    trades = np.array(trades, dtype=TRADE_DTYPE)
+    return BacktestResult(trades, equity_curve(close, trades, open_trade, quantity), open_trade)
+
+def equity_curve(close, trades, open_trade, quantity):
+    # PnL realizado acumulado + PnL não realizado da posição aberta, por barra
+    size = len(close)
+    realized = np.zeros(size)
+    np.add.at(realized, trades["exit_index"], trades["pnl"])
+    realized = np.cumsum(realized)
+
+    position = np.zeros(size)
+    entry_price = np.zeros(size)
+    spans = [(t["entry_index"], t["exit_index"], t["side"], t["entry_price"]) for t in trades]
+    if open_trade is not None:
+        spans.append((open_trade[0], size, open_trade[1], open_trade[2]))
+    for begin, end, side, price in spans:
+        position[begin:end] = side * quantity
+        entry_price[begin:end] = price
+
+    return realized + position * (close - entry_price)
+
+class PaperGateway:
+    """
+    Gateway simulado para reproduzir SymbolStrategy fora da corretora:
+    ordens a mercado executam no preço do tick atual.
+    """
+
+    def __init__(self, leverage=20):
+        self.leverage = leverage
+        self.price = None
+        self.index = None
+        self.position = None
+        self.trades = []
+        self.account = self
+        self.synced = True
+        self.listeners = []
+
+    def get_open_positions(self, symbol):
+        if self.position is None:
+            return []
+        amount = self.position["amount"]
+        return [{
+            "symbol": symbol,
+            "positionAmt": str(amount),
+            "entryPrice": str(self.position["entry_price"]),
+            "side": "SELL" if amount > 0 else "BUY",
+            "currentSide": "BUY" if amount > 0 else "SELL",
+        }]
+
+    def get_position(self, symbol, position_side="BOTH"):
+        if self.position is None:
+            return None
+        return self.position["amount"], self.position["entry_price"], self.leverage
+
+    def get_position_margin(self):
+        if self.position is None:
+            return 0.0
+        return abs(self.position["amount"]) * self.position["entry_price"] / self.leverage
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def buy_market_order(self, symbol, quantity, client_order_id=None):
+        return self._fill(symbol, quantity, client_order_id)
+
+    def sell_market_order(self, symbol, quantity, client_order_id=None):
+        return self._fill(symbol, -quantity, client_order_id)
+
+    def close_all_postions(self, symbol, quantity, side, reduce_only=False, client_order_id=None):
+        return self._fill(symbol, quantity if side == "BUY" else -quantity, client_order_id)
+
+    def _fill(self, symbol, amount, client_order_id=None):
+        pnl = 0.0
+        if self.position is None:
+            self.position = {"amount": amount, "entry_price": self.price, "entry_index": self.index}
+        else:
+            position = self.position
+            pnl = position["amount"] * (self.price - position["entry_price"])
+            side = 1 if position["amount"] > 0 else -1
+            self.trades.append((position["entry_index"], self.index, side, position["entry_price"], self.price, pnl))
+            self.position = None
+        # execução no formato do espelho da conta (ORDER_TRADE_UPDATE)
+        order_id = len(self.trades) * 2 + (self.position is not None)
+        client_order_id = client_order_id or f"paper-{order_id}"
+        for listener in self.listeners:
+            listener({"symbol": symbol, "executionType": "TRADE", "status": "FILLED", "clientOrderId": client_order_id,
+                      "filledQty": abs(amount), "lastFilledPrice": self.price, "lastFilledQty": abs(amount),
+                      "realizedProfit": pnl})
+        return {"status": "NEW", "orderId": order_id, "clientOrderId": client_order_id}
+
+def run_live_replay(open_time, high, low, close, rsi_period=14, rsi_oversold=30, rsi_overbought=70, atr_period=14,
+                    stop_gain=5, stop_loss=5, quantity=1.0, leverage=20):
+    """
+    Reproduz os candles, um a um, pelo SymbolStrategy real contra um
+    PaperGateway. É lento (laço Python por barra) e serve como referência
+    para validar o backtest vetorizado.
+    """
+    gateway = PaperGateway(leverage=leverage)
+    strategy = SymbolStrategy(gateway, "BACKTEST", "1m", quantity, stop_gain, stop_loss, buffer_size=max(rsi_period, atr_period) + 2,
+                              rsi_period=rsi_period, rsi_oversold=rsi_oversold, rsi_overbought=rsi_overbought, atr_period=atr_period)
+    start = warmup_bars(rsi_period, atr_period)
+    klines = [[open_time[i], close[i], high[i], low[i], close[i], 0.0] for i in range(start + 1)]
+    strategy.seed(klines, float(close[start - 1]))
+
+    for i in range(start, len(close)):
+        gateway.price = float(close[i])
+        gateway.index = i
+        strategy.on_kline({"t": open_time[i], "o": close[i], "h": high[i], "l": low[i], "c": close[i], "v": 0.0, "x": True})
+        while not strategy.msg_queue.empty():
+            strategy.msg_queue.get_nowait()
+
+    return np.array(gateway.trades, dtype=TRADE_DTYPE)
+
+def compare_with_live(open_time, high, low, close, **params):
+    # confere se o backtest vetorizado gera os mesmos trades que o replay do bot
+    vectorized = run_backtest(close, **params).trades
+    live = run_live_replay(open_time, high, low, close, **params)
+    same = (len(vectorized) == len(live)
+            and np.array_equal(vectorized[["entry_index", "exit_index", "side"]], live[["entry_index", "exit_index", "side"]])
+            and np.allclose(vectorized["pnl"], live["pnl"]))
+    return {"match": bool(same), "vectorized": vectorized, "live": live}
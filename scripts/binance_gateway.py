@@ -1,231 +1,562 @@
 import datetime
-import requests
 import logging
-import hashlib
-import hmac
+import json
+import threading
 import time
-import os
+import uuid
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+from urllib.parse import urlencode
+
+import requests
+
+from scripts.exchange_info import ExchangeInfo, FilterError, default_path, prepare_order
+from scripts.http_session import DEFAULT_TIMEOUT, create_session
+from scripts.log_setup import setup_logging
+from scripts.metrics import REGISTRY
+from scripts.rate_limiter import ORDER, RateLimiter, RateLimitExceeded
+from scripts.signing import RECV_WINDOW, TIMESTAMP_OUTSIDE_RECV_WINDOW, RequestSigner
+from scripts.user_stream import AccountState, UserDataStream
+
+REQUEST_SECONDS = REGISTRY.histogram('binance_request_seconds', 'REST request latency by endpoint', ('method', 'endpoint'))
+REQUESTS = REGISTRY.counter('binance_requests_total', 'REST requests by endpoint and HTTP status', ('method', 'endpoint', 'status'))
+ORDER_RTT = REGISTRY.histogram('binance_order_rtt_seconds', 'Market order round trip, from send to acknowledgement', ('side',))
+
+# erros em que a ordem pode ou não ter chegado à corretora: consultar antes de reenviar
+TRANSIENT_CODES = (-1000, -1001, -1003, -1006, -1007)
+ORDER_NOT_FOUND = -2013
+DUPLICATED_CLIENT_ORDER_ID = -4116
+# limite de ordens por chamada de /fapi/v1/batchOrders
+BATCH_SIZE = 5
+# /fapi/v1/userTrades: até 1000 trades por página e no máximo 7 dias entre startTime e endTime
+TRADES_PAGE = 1000
+TRADES_WINDOW = 7 * 24 * 60 * 60 * 1000
+# endpoints REST e de streams de futuros (produção e testnet)
+FUTURES_URL = "https://fapi.binance.com"
+FUTURES_STREAM_URL = "wss://fstream.binance.com"
+TESTNET_URL = "https://testnet.binancefuture.com"
+TESTNET_STREAM_URL = "wss://stream.binancefuture.com"
+
+class OrderError(Exception):
+    def __init__(self, client_order_id, code, message):
+        super().__init__(f"{client_order_id} {code}: {message}")
+        self.client_order_id = client_order_id
+        self.code = code
+        self.message = message
+
+def new_client_order_id(prefix="fb"):
+    # até 36 caracteres, [.A-Z:/a-z0-9_-]
+    return f"{prefix}-{uuid.uuid4().hex[:24]}"
+
+class BinanceAPIError(Exception):
+    def __init__(self, status, code, message):
+        super().__init__(f"{status} {code}: {message}")
+        self.status = status
+        self.code = code
+        self.message = message
+
+def to_ms(value):
+    if isinstance(value, datetime.datetime):
+        return int(value.timestamp() * 1000)
+    return int(value)
+
+def trade_windows(start_time, end_time, window=TRADES_WINDOW):
+    # [start_time, end_time] (ms) em janelas consecutivas aceitas por /fapi/v1/userTrades
+    windows = []
+    while start_time <= end_time:
+        windows.append((start_time, min(start_time + window - 1, end_time)))
+        start_time += window
+    return windows
+
+def close_orders(position_risk, symbols=None):
+    """
+    Ordens MARKET que zeram cada posição aberta de /fapi/v2/positionRisk com
+    o tamanho exato da posição (`positionAmt` como veio da API).
+    """
+    orders = []
+    for position in position_risk if isinstance(position_risk, list) else []:
+        amount = position["positionAmt"]
+        if float(amount) == 0 or (symbols is not None and position["symbol"] not in symbols):
+            continue
+        order = {"symbol": position["symbol"], "side": "SELL" if float(amount) > 0 else "BUY", "type": "MARKET",
+                 "quantity": amount.lstrip("-")}
+        if position.get("positionSide", "BOTH") == "BOTH":
+            order["reduceOnly"] = "true"
+        else:
+            # modo hedge: a perna é indicada por positionSide (reduceOnly não é aceito)
+            order["positionSide"] = position["positionSide"]
+        orders.append(order)
+    return orders
+
+def public_exchange_info(is_test=False, session=None, timeout=DEFAULT_TIMEOUT, path=None, base_url=None):
+    """
+    ExchangeInfo da rede escolhida pelo endpoint público (sem chaves nem
+    gateway), com o mesmo cache em disco do BinanceFutures. Para a interface
+    validar o formulário antes de as chaves serem conferidas.
+    """
+    session = session if session is not None else create_session(pool_size=1)
+    if base_url is None:
+        base_url = TESTNET_URL if is_test else FUTURES_URL
+    url = f"{base_url}/fapi/v1/exchangeInfo"
+
+    def fetch():
+        return session.get(url, timeout=timeout).json()
+
+    if path is None and base_url in (FUTURES_URL, TESTNET_URL):
+        path = default_path(is_test)
+    return ExchangeInfo(fetch, path=path)
+
+def open_positions(position_risk, symbol):
+    if isinstance(position_risk, list):
+        positions = [p for p in position_risk if p["symbol"] == symbol and float(p["positionAmt"]) != 0]
+    else:
+        positions = []
+
+    # verifica o lado correto para encerrar cada posição em aberto
+    for position in positions:
+        if float(position["positionAmt"]) > 0:
+            position["side"] = "SELL"
+            position["currentSide"] = "BUY"
+        elif float(position["positionAmt"]) < 0:
+            position["side"] = "BUY"
+            position["currentSide"] = "SELL"
+        else:
+            position["side"] = None
+
+    return positions
 
 class BinanceFutures:
-    def __init__(self, api_key, secret_key,is_test=False):
+    def __init__(self, api_key, secret_key,is_test=False, pool_size=10, timeout=DEFAULT_TIMEOUT, retries=3, base_url=None, stream_url=None, rate_limiter=None, recv_window=RECV_WINDOW,
+                 exchange_info_path=None):
         self.api_key = api_key
-        self.secret_key = secret_key
-        self.base_url = "https://fapi.binance.com"
+        # HMAC pré-chaveado e offset do relógio do servidor, compartilhados por todas as chamadas assinadas
+        self.signer = RequestSigner(secret_key, recv_window=recv_window)
+        self._secret_key = secret_key
+        self._time_lock = threading.Lock()
+        self.base_url = FUTURES_URL
+        self.stream_url = FUTURES_STREAM_URL
         self.is_test = is_test
+        self.timeout = timeout
         self.logger = logging.getLogger(__name__)
 
+        # orçamento de peso/ordens compartilhado por todas as chamadas REST
+        self.rate_limiter = rate_limiter if rate_limiter is not None else RateLimiter()
+
+        # espelho local da conta, alimentado pelo user-data stream
+        self.account = AccountState()
+        self.user_stream = None
+
         if self.is_test:
-            self.base_url = "https://testnet.binancefuture.com"
+            self.base_url = TESTNET_URL
+            self.stream_url = TESTNET_STREAM_URL
 
-        # configurando o logger
-        LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
+        # permite apontar para outra corretora (ex.: MockExchange nos testes)
+        if base_url is not None:
+            self.base_url = base_url
+        if stream_url is not None:
+            self.stream_url = stream_url
 
-        if not os.path.exists(LOG_DIR):
-            os.mkdir(LOG_DIR)
+        # sessão persistente: reaproveita as conexões TCP/TLS entre as chamadas
+        self.session = create_session(pool_size=pool_size, retries=retries)
+        self.session.headers.update({
+            "Content-Type": "application/x-www-form-urlencoded",
+            "X-MBX-APIKEY": self.api_key
+        })
 
-        logger = logging.getLogger(__name__)
-        logger.setLevel(logging.DEBUG)
+        # filtros por symbol (/fapi/v1/exchangeInfo), carregados no primeiro uso; em disco só para a Binance
+        if exchange_info_path is None and base_url is None:
+            exchange_info_path = default_path(self.is_test)
+        self.exchange_info = ExchangeInfo(self.get_exchange_info, path=exchange_info_path)
 
-        file_handler = logging.FileHandler(os.path.join(LOG_DIR, 'binance.log'))
-        file_handler.setLevel(logging.DEBUG)
+        # logging do pacote (fila + listener), configurado uma única vez por processo
+        setup_logging()
 
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
+    @property
+    def secret_key(self):
+        return self._secret_key
 
-        logger.addHandler(file_handler)
+    @secret_key.setter
+    def secret_key(self, secret_key):
+        # troca de chave: o HMAC pré-chaveado é refeito
+        self._secret_key = secret_key
+        self.signer.set_key(secret_key)
 
     def signature(self, data):
-        key = self.secret_key.encode('utf-8')
-        signature = hmac.new(key, data.encode('utf-8'), hashlib.sha256).hexdigest()
-        return signature
+        return self.signer.sign(data)
+
+    def request(self, method, endpoint, params=None, signed=True, priority=None):
+        if signed and self.signer.needs_sync():
+            self._schedule_time_sync()
+        for attempt in range(2):
+            # espera (ou é descartada) antes de assinar, para o timestamp não envelhecer na fila
+            self.rate_limiter.acquire(method, endpoint, priority)
+            query = self.signer.query(params, signed)
+
+            url = f"{self.base_url}{endpoint}"
+            if query:
+                url = f"{url}?{query}"
 
-    def buy_market_order(self, symbol, quantity):
+            start = time.perf_counter()
+            response = self.session.request(method, url, timeout=self.timeout)
+            REQUEST_SECONDS.labels(method, endpoint).observe(time.perf_counter() - start)
+            REQUESTS.labels(method, endpoint, response.status_code).inc()
+            self.rate_limiter.update(response.status_code, response.headers)
+            data = response.json()
+            if signed and attempt == 0 and isinstance(data, dict) and data.get("code") == TIMESTAMP_OUTSIDE_RECV_WINDOW:
+                # rejeitada antes de executar: corrige o relógio e reenvia uma vez
+                self.logger.warning(f'{method} {endpoint}: {data.get("msg")}, syncing server time')
+                self.sync_time()
+                continue
+            return data
+
+    def sync_time(self):
+        # offset (ms) entre o relógio local e /fapi/v1/time, usado no timestamp das chamadas assinadas
+        sent = time.time()
+        response = self.request('GET', '/fapi/v1/time', signed=False)
+        self.signer.update_offset(response["serverTime"], sent, time.time())
+        return self.signer.offset
+
+    def _schedule_time_sync(self):
+        # primeira sincronização na própria chamada; as seguintes em segundo plano, sem atrasar ordens
+        if not self._time_lock.acquire(blocking=False):
+            return
+        if self.signer.synced_at is None:
+            self._sync_time_locked()
+        else:
+            threading.Thread(target=self._sync_time_locked, daemon=True).start()
+
+    def _sync_time_locked(self):
         try:
-            endpoint = "/fapi/v1/order"
-            timestamp = int(time.time() * 1000)
-            data = f"symbol={symbol}&side=BUY&type=MARKET&quantity={quantity}&timestamp={timestamp}"
-            signature = self.signature(data)
-            headers = {
-                "Content-Type": "application/x-www-form-urlencoded",
-                "X-MBX-APIKEY": self.api_key
-            }
-            params = {
-                "symbol": symbol,
-                "side": "BUY",
-                "type": "MARKET",
-                "quantity": quantity,
-                "timestamp": timestamp,
-                "signature": signature
-            }
-            response = requests.post(f"{self.base_url}{endpoint}", headers=headers, params=params)
-            return response.json()
-        except Exception as e:
-            print(f"Error: {e}")
-            self.logger.error(f'BUY MARKET: {str(e)}')
-            exit()
+            self.sync_time()
+        except (requests.exceptions.RequestException, ValueError, KeyError, RateLimitExceeded) as e:
+            # mantém o offset atual e tenta de novo no próximo intervalo
+            self.logger.warning(f'SERVER TIME: {str(e)}')
+            self.signer.synced_at = time.monotonic()
+        finally:
+            self._time_lock.release()
+
+    def get_rate_limit_budget(self):
+        return self.rate_limiter.budget()
+
+    def _api_key_request(self, method, endpoint):
+        # endpoints de listenKey exigem apenas a API key, sem assinatura
+        return self.request(method, endpoint, signed=False)
+
+    def create_listen_key(self):
+        return self._api_key_request('POST', '/fapi/v1/listenKey')
 
+    def keepalive_listen_key(self):
+        return self._api_key_request('PUT', '/fapi/v1/listenKey')
 
-    def sell_market_order(self, symbol, quantity):
+    def close_listen_key(self):
+        return self._api_key_request('DELETE', '/fapi/v1/listenKey')
+
+    def start_user_stream(self, keepalive_interval=30 * 60):
+        if self.user_stream is None:
+            self.user_stream = UserDataStream(self, self.account, keepalive_interval=keepalive_interval)
+            self.user_stream.start()
+        return self.user_stream
+
+    def stop_user_stream(self):
+        if self.user_stream is not None:
+            self.user_stream.stop()
+            self.user_stream = None
+
+    def _call(self, tag, method, endpoint, params=None, signed=True):
         try:
-            endpoint = "/fapi/v1/order"
-            timestamp = int(time.time() * 1000)
-            data = f"symbol={symbol}&side=SELL&type=MARKET&quantity={quantity}&timestamp={timestamp}"
-            signature = self.signature(data)
-            headers = {
-                "Content-Type": "application/x-www-form-urlencoded",
-                "X-MBX-APIKEY": self.api_key
-            }
-            params = {
-                "symbol": symbol,
-                "side": "SELL",
-                "type": "MARKET",
-                "quantity": quantity,
-                "timestamp": timestamp,
-                "signature": signature
-            }
-            response = requests.post(f"{self.base_url}{endpoint}", headers=headers, params=params)
-            return response.json()
+            return self.request(method, endpoint, params, signed)
+        except RateLimitExceeded as e:
+            # chamada descartada pelo agendador: quem chamou decide o que fazer, o bot continua
+            self.logger.warning(f'{tag}: {str(e)}')
+            raise
         except Exception as e:
+            # sem exit(): a falha volta para quem chamou e chega ao on_error do bot
             print(f"Error: {e}")
-            self.logger.error(f'SELL MARKET: {str(e)}')
-            exit()
+            self.logger.error(f'{tag}: {str(e)}')
+            raise BinanceAPIError(None, None, str(e)) from e
+
+    def get_exchange_info(self):
+        return self.request('GET', '/fapi/v1/exchangeInfo', signed=False)
 
+    def symbol_filters(self, symbol):
+        # stepSize, tickSize, minQty e minNotional do symbol (None sem exchangeInfo)
+        return self.exchange_info.get(symbol)
 
-    def close_all_postions(self, symbol, quantity, side):
+    def prepare_order(self, params):
+        # arredonda e valida a ordem pelos filtros do symbol antes de qualquer envio (FilterError)
+        return prepare_order(self.exchange_info.get(params["symbol"]), params)
+
+    def query_order(self, symbol, client_order_id):
+        # None quando a corretora não conhece a ordem
+        response = self.request('GET', '/fapi/v1/order', {"symbol": symbol, "origClientOrderId": client_order_id})
+        if "orderId" in response:
+            return response
+        if response.get("code") == ORDER_NOT_FOUND:
+            return None
+        raise OrderError(client_order_id, response.get("code"), response.get("msg"))
+
+    def place_order(self, params, retries=2, backoff=0.2):
+        """
+        Envia uma ordem com `newClientOrderId` (gerado se ausente) e repete
+        falhas transitórias sem duplicá-la: antes de cada reenvio a ordem é
+        consultada pelo client id, pois a tentativa anterior pode ter sido
+        executada mesmo sem resposta. Levanta OrderError se a corretora
+        rejeitar a ordem ou as tentativas acabarem.
+        """
+        params = dict(params)
+        client_order_id = params.setdefault("newClientOrderId", new_client_order_id())
         try:
-            endpoint = "/fapi/v1/order"
-            timestamp = int(time.time() * 1000)
-            data = f"symbol={symbol}&side={side}&type=MARKET&quantity={quantity}&timestamp={timestamp}"
-            signature = self.signature(data)
-            headers = {
-                "Content-Type": "application/x-www-form-urlencoded",
-                "X-MBX-APIKEY": self.api_key
-            }
-            params = {
-                "symbol": symbol,
-                "side": side,
-                "type": "MARKET",
-                "quantity": quantity,
-                "timestamp": timestamp,
-                "signature": signature
-            }
-            response = requests.post(f"{self.base_url}{endpoint}", headers=headers, params=params)
-            return response.json()
-        except Exception as e:
-            print(f"Error: {e}")
-            self.logger.error(f'CLOSE POSITIONS: {str(e)}')
-            exit()
+            params = self.prepare_order(params)
+        except FilterError as e:
+            # rejeitada localmente, sem ida e volta à corretora
+            raise OrderError(client_order_id, e.code, e.message)
+        code, message = None, None
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(backoff * 2 ** (attempt - 1))
+                try:
+                    existing = self.query_order(params["symbol"], client_order_id)
+                except (requests.exceptions.RequestException, ValueError, RateLimitExceeded) as e:
+                    code, message = None, str(e)
+                    continue
+                except OrderError as e:
+                    code, message = e.code, e.message
+                    if e.code in TRANSIENT_CODES:
+                        continue
+                    raise
+                if existing is not None:
+                    return existing
 
-    def get_open_positions(self, symbol):
+            try:
+                start = time.perf_counter()
+                response = self.request('POST', '/fapi/v1/order', params)
+                ORDER_RTT.labels(params["side"]).observe(time.perf_counter() - start)
+            except (requests.exceptions.RequestException, ValueError, RateLimitExceeded) as e:
+                # sem resposta (rede, 5xx sem JSON) ou sem orçamento: nova tentativa
+                self.logger.warning(f'ORDER {client_order_id} attempt {attempt + 1}: {str(e)}')
+                code, message = None, str(e)
+                continue
+
+            if "orderId" in response:
+                return response
+            code, message = response.get("code"), response.get("msg")
+            if code == DUPLICATED_CLIENT_ORDER_ID:
+                # já aceita em uma tentativa anterior
+                existing = self.query_order(params["symbol"], client_order_id)
+                if existing is not None:
+                    return existing
+            if code not in TRANSIENT_CODES:
+                raise OrderError(client_order_id, code, message)
+            self.logger.warning(f'ORDER {client_order_id} attempt {attempt + 1}: {code} {message}')
+        raise OrderError(client_order_id, code, message)
+
+    def _order(self, tag, params, client_order_id=None):
+        # sem exit(): uma ordem rejeitada ou sem resposta volta como erro para a estratégia
+        if client_order_id is not None:
+            params["newClientOrderId"] = client_order_id
         try:
-            endpoint = "/fapi/v2/positionRisk"
-            url = f"{self.base_url}{endpoint}"
-            timestamp = int(time.time() * 1000)
-            signature = hmac.new(self.secret_key.encode('utf-8'), f'timestamp={timestamp}'.encode('utf-8'), hashlib.sha256).hexdigest()
-            headers = {
-                "Content-Type": "application/json",
-                "X-MBX-APIKEY": self.api_key
-            }
-            params = {
-                "timestamp": timestamp,
-                'signature': signature
-            }
-            response = requests.get(url, headers=headers, params=params).json()
-            
-            if isinstance(response, list):
-                positions = [p for p in response if p["symbol"] == symbol and float(p["positionAmt"]) != 0]
-            else: 
-                positions = []
-
-            # verifica o lado correto para encerrar cada posição em aberto
-            if len(positions) > 0:
-                for position in positions:
-                    if float(position["positionAmt"]) > 0:
-                        position["side"] = "SELL"
-                        position["currentSide"] = "BUY"
-                    elif float(position["positionAmt"]) < 0:
-                        position["side"] = "BUY"
-                        position["currentSide"] = "SELL"
-                    else:
-                        position["side"] = None
-
-                return positions
-            else:
-                return []
-        except Exception as e:
+            return self.place_order(params)
+        except OrderError as e:
             print(f"Error: {e}")
-            self.logger.error(f'OPEN POSITIONS: {str(e)}')
-            exit()
+            self.logger.error(f'{tag}: {str(e)}')
+            return {"code": e.code, "msg": e.message, "clientOrderId": e.client_order_id}
+
+    def buy_market_order(self, symbol, quantity, client_order_id=None):
+        params = {"symbol": symbol, "side": "BUY", "type": "MARKET", "quantity": quantity}
+        return self._order('BUY MARKET', params, client_order_id)
+
+    def sell_market_order(self, symbol, quantity, client_order_id=None):
+        params = {"symbol": symbol, "side": "SELL", "type": "MARKET", "quantity": quantity}
+        return self._order('SELL MARKET', params, client_order_id)
+
+    def close_all_postions(self, symbol, quantity, side, reduce_only=False, client_order_id=None):
+        params = {"symbol": symbol, "side": side, "type": "MARKET", "quantity": quantity}
+        if reduce_only:
+            # só reduz a posição: nunca abre uma posição contrária
+            params["reduceOnly"] = "true"
+        return self._order('CLOSE POSITIONS', params, client_order_id)
+
+    def place_batch_orders(self, orders, retries=2, backoff=0.2):
+        """
+        Envia `orders` por /fapi/v1/batchOrders em lotes de até 5, com os
+        lotes em paralelo. Cada ordem recebe um `newClientOrderId`; nas
+        falhas transitórias as ordens do lote são consultadas pelo client id
+        e só as que não chegaram à corretora são reenviadas. Devolve, na
+        mesma ordem, a resposta de cada ordem ou um dict {"code", "msg"}.
+        """
+        orders = [{**order, "newClientOrderId": order.get("newClientOrderId") or new_client_order_id()}
+                  for order in orders]
+        results = [None] * len(orders)
+        valid = []
+        for index, order in enumerate(orders):
+            try:
+                orders[index] = self.prepare_order(order)
+                valid.append(index)
+            except FilterError as e:
+                # fora dos filtros: não entra em nenhum lote
+                results[index] = {"code": e.code, "msg": e.message}
+        batches = [valid[start:start + BATCH_SIZE] for start in range(0, len(valid), BATCH_SIZE)]
+        if len(batches) == 1:
+            self._place_batch(orders, batches[0], results, retries, backoff)
+        elif batches:
+            with ThreadPoolExecutor(max_workers=len(batches)) as executor:
+                list(executor.map(lambda batch: self._place_batch(orders, batch, results, retries, backoff), batches))
+        return results
+
+    def _place_batch(self, orders, pending, results, retries, backoff):
+        code, message = None, None
+        for attempt in range(retries + 1):
+            if attempt:
+                time.sleep(backoff * 2 ** (attempt - 1))
+                for index in list(pending):
+                    order = orders[index]
+                    try:
+                        existing = self.query_order(order["symbol"], order["newClientOrderId"])
+                    except (requests.exceptions.RequestException, ValueError, RateLimitExceeded, OrderError):
+                        continue
+                    if existing is not None:
+                        results[index] = existing
+                pending = [index for index in pending if results[index] is None]
+                if not pending:
+                    return
+
+            batch = [{key: str(value) for key, value in orders[index].items()} for index in pending]
+            try:
+                response = self.request('POST', '/fapi/v1/batchOrders',
+                                        {"batchOrders": json.dumps(batch, separators=(',', ':'))})
+            except (requests.exceptions.RequestException, ValueError, RateLimitExceeded) as e:
+                code, message = None, str(e)
+                continue
+
+            if not isinstance(response, list):
+                # o lote inteiro falhou
+                code, message = response.get("code"), response.get("msg")
+                if code in TRANSIENT_CODES:
+                    continue
+                for index in pending:
+                    results[index] = {"code": code, "msg": message}
+                return
+            for index, item in zip(pending, response):
+                if "orderId" in item or item.get("code") not in TRANSIENT_CODES:
+                    results[index] = item
+                else:
+                    code, message = item.get("code"), item.get("msg")
+            pending = [index for index in pending if results[index] is None]
+            if not pending:
+                return
+
+        for index in pending:
+            results[index] = {"code": code, "msg": message}
 
+    def flatten_all(self, symbols=None):
+        """
+        Zera todas as posições abertas (ou só as de `symbols`) com o tamanho
+        real de cada uma e reduceOnly: uma consulta de posições e um lote de
+        ordens a cada 5 posições, enviados em paralelo.
+        """
+        position_risk = self.request('GET', '/fapi/v2/positionRisk', priority=ORDER)
+        orders = close_orders(position_risk, symbols)
+        if not orders:
+            return []
+        results = self.place_batch_orders(orders)
+        for order, result in zip(orders, results):
+            if "orderId" not in result:
+                self.logger.error(f'FLATTEN {order["symbol"]}: {result.get("code")} {result.get("msg")}')
+        return results
+
+    def get_open_positions(self, symbol):
+        response = self._call('OPEN POSITIONS', 'GET', '/fapi/v2/positionRisk')
+        return open_positions(response, symbol)
 
     def get_trade_history(self, symbol, start_time, end_time):
+        # todas as páginas e janelas do intervalo (uma única chamada truncava em 500 trades e 7 dias)
         try:
-            endpoint = "/fapi/v1/userTrades"
-            start_time = int(start_time.timestamp() * 1000)
-            end_time = int(end_time.timestamp() * 1000)
-            timestamp = int(time.time() * 1000)
-            data = f"symbol={symbol}&startTime={start_time}&endTime={end_time}&timestamp={timestamp}"
-            signature = self.signature(data)
-            headers = {
-                "Content-Type": "application/x-www-form-urlencoded",
-                "X-MBX-APIKEY": self.api_key
-            }
-            params = {
-                "symbol": symbol,
-                "startTime": start_time,
-                "endTime": end_time,
-                "timestamp": timestamp,
-                "signature": signature
-            }
-            response = requests.get(f"{self.base_url}{endpoint}", headers=headers, params=params)
-            trades = response.json()
-
-            return trades
+            return list(self.iter_trades(symbol, start_time, end_time))
         except Exception as e:
             print(f"Error: {e}")
             self.logger.error(f'TRADE HISTORY: {str(e)}')
-            exit()
+            if isinstance(e, BinanceAPIError):
+                raise
+            raise BinanceAPIError(None, None, str(e)) from e
+
+    def iter_trades(self, symbol, start_time=None, end_time=None, from_id=None, limit=TRADES_PAGE, workers=4):
+        """
+        Gera os trades de `symbol` em ordem de id, paginando por `fromId`.
+
+        Com `from_id` a leitura começa nesse trade; senão o intervalo
+        [start_time, end_time] (datetime ou ms, `end_time` padrão agora) é
+        dividido em janelas de 7 dias buscadas em paralelo por até `workers`
+        threads e entregues em ordem. Sem nenhum dos dois, a API devolve os
+        últimos 7 dias. As consultas são INFO no RateLimiter: sem orçamento,
+        esperam em vez de tomar a reserva das ordens.
+        """
+        end_time = to_ms(end_time) if end_time is not None else None
+        if from_id is not None:
+            yield from self._page_trades(symbol, {"fromId": from_id}, end_time, limit)
+            return
+        if start_time is None:
+            yield from self._page_trades(symbol, {} if end_time is None else {"endTime": end_time}, end_time, limit)
+            return
+
+        windows = trade_windows(to_ms(start_time), end_time if end_time is not None else int(time.time() * 1000))
+        if len(windows) <= 1:
+            for start, end in windows:
+                yield from self._page_trades(symbol, {"startTime": start, "endTime": end}, end, limit)
+            return
+
+        def fetch(window):
+            start, end = window
+            return list(self._page_trades(symbol, {"startTime": start, "endTime": end}, end, limit))
+
+        # no máximo `workers` janelas em memória: a próxima só é pedida quando uma é entregue
+        executor = ThreadPoolExecutor(max_workers=min(workers, len(windows)))
+        try:
+            windows = iter(windows)
+            pending = deque(executor.submit(fetch, window) for window in islice(windows, workers))
+            while pending:
+                trades = pending.popleft().result()
+                window = next(windows, None)
+                if window is not None:
+                    pending.append(executor.submit(fetch, window))
+                yield from trades
+        finally:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _page_trades(self, symbol, params, end_time, limit):
+        params = {"symbol": symbol, "limit": limit, **params}
+        while True:
+            page = self._trades_page(params)
+            for trade in page:
+                if end_time is not None and trade["time"] > end_time:
+                    return
+                yield trade
+            if len(page) < limit:
+                return
+            # próxima página pelo id (fromId não pode ser combinado com startTime/endTime)
+            params = {"symbol": symbol, "limit": limit, "fromId": page[-1]["id"] + 1}
+
+    def _trades_page(self, params):
+        while True:
+            try:
+                response = self.request('GET', '/fapi/v1/userTrades', params)
+            except RateLimitExceeded as e:
+                time.sleep(e.retry_after)
+                continue
+            if isinstance(response, list):
+                return response
+            raise BinanceAPIError(None, response.get("code"), response.get("msg"))
 
     def get_position_margin(self):
+        response = self._call('POSTIONS MARGIN', 'GET', '/fapi/v2/account')
         try:
-            endpoint = "/fapi/v2/account"
-            url = f"{self.base_url}{endpoint}"
-            timestamp = int(time.time() * 1000)
-            signature = hmac.new(self.secret_key.encode('utf-8'), f'timestamp={timestamp}'.encode('utf-8'), hashlib.sha256).hexdigest()
-            headers = {
-                "Content-Type": "application/json",
-                "X-MBX-APIKEY": self.api_key
-            }
-            params = {
-                "timestamp": timestamp,
-                "signature": signature
-            }
-            response = requests.get(url, headers=headers, params=params).json()
-            total_initial_margin = response['totalInitialMargin']
-            return total_initial_margin
-        except Exception as e:
+            return response['totalInitialMargin']
+        except (KeyError, TypeError) as e:
             print(f"Error: {e}")
             self.logger.error(f'POSTIONS MARGIN: {str(e)}')
-            exit()
+            code, message = (response.get("code"), response.get("msg")) if isinstance(response, dict) else (None, str(e))
+            raise BinanceAPIError(None, code, message) from e
 
-    def get_balance(self, symbol):
-        try:
-            endpoint = "/fapi/v2/balance"
-            url = f"{self.base_url}{endpoint}"
-            timestamp = int(time.time() * 1000)
-            signature = hmac.new(self.secret_key.encode('utf-8'), f'timestamp={timestamp}'.encode('utf-8'), hashlib.sha256).hexdigest()
-            headers = {
-                "Content-Type": "application/json",
-                "X-MBX-APIKEY": self.api_key
-            }
-            params = {
-                "timestamp": timestamp,
-                "symbol": symbol,
-                "signature": signature
-            }
-            response = requests.get(url, headers=headers, params=params)
-            return response.json()
-        except Exception as e:
-            print(f"Error: {e}")
-            self.logger.error(f'BALANCE: {str(e)}')
-            exit()
+    def get_balance(self, symbol=None):
+        params = {"symbol": symbol} if symbol else None
+        return self._call('BALANCE', 'GET', '/fapi/v2/balance', params)
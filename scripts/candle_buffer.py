@@ -0,0 +1,102 @@
+import numpy as np
+
+# Colunas do buffer (uma linha do array por campo do kline)
+OPEN_TIME, OPEN, HIGH, LOW, CLOSE, VOLUME = range(6)
+FIELDS = ('t', 'o', 'h', 'l', 'c', 'v')
+
+class CandleBuffer:
+    """
+    Buffer circular de candles de um symbol/interval, mantido em memória.
+
+    Os dados ficam em um array NumPy de tamanho fixo com armazenamento
+    duplicado: cada candle é escrito na posição i e i + size, então a janela
+    dos últimos `size` candles é sempre uma fatia contígua (sem cópia).
+    """
+
+    def __init__(self, symbol, interval, size=500):
+        self.symbol = symbol
+        self.interval = interval
+        self.size = size
+        self.closed = True
+        self._data = np.zeros((len(FIELDS), 2 * size), dtype=np.float64)
+        self._head = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def last_open_time(self):
+        if self._count == 0:
+            return None
+        return int(self._data[OPEN_TIME, self._head + self._count - 1])
+
+    def seed(self, klines, closed=False):
+        """
+        Carrega o buffer a partir da resposta de /klines (lista de listas).
+        O último kline retornado pela API é o candle em aberto; use
+        `closed=True` quando todos já estiverem fechados (ex.: KlineStore).
+        """
+        self._head = 0
+        self._count = 0
+        for kline in klines[-self.size:]:
+            self._append(kline[:len(FIELDS)])
+        self.closed = closed
+
+    def update(self, kline):
+        """
+        Aplica um kline do stream `<symbol>@kline_<interval>` (campo `k`).
+        Atualiza o candle em aberto no lugar ou abre um novo candle quando o
+        tempo de abertura muda. Retorna True quando o candle foi fechado (`x`).
+        """
+        open_time = kline['t']
+        values = [kline[field] for field in FIELDS]
+        last_open_time = self.last_open_time
+
+        if last_open_time is not None and open_time < last_open_time:
+            # mensagem atrasada de um candle que já saiu do topo do buffer
+            return False
+
+        if last_open_time is not None and open_time == last_open_time:
+            self._write((self._head + self._count - 1) % self.size, values)
+        else:
+            self._append(values)
+
+        self.closed = bool(kline['x'])
+        return self.closed
+
+    def window(self):
+        # view (campos x candles) do mais antigo para o mais recente
+        return self._data[:, self._head:self._head + self._count]
+
+    def opens(self):
+        return self.window()[OPEN]
+
+    def highs(self):
+        return self.window()[HIGH]
+
+    def lows(self):
+        return self.window()[LOW]
+
+    def closes(self):
+        return self.window()[CLOSE]
+
+    def volumes(self):
+        return self.window()[VOLUME]
+
+    def open_times(self):
+        return self.window()[OPEN_TIME]
+
+    def _append(self, values):
+        if self._count < self.size:
+            self._write(self._count, values)
+            self._count += 1
+        else:
+            # buffer cheio: sobrescreve o candle mais antigo e avança a janela
+            self._write(self._head, values)
+            self._head = (self._head + 1) % self.size
+
+    def _write(self, slot, values):
+        column = np.asarray(values, dtype=np.float64)
+        self._data[:, slot] = column
+        self._data[:, slot + self.size] = column
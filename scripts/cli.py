@@ -0,0 +1,194 @@
+import argparse
+import json
+import logging
+import os
+import queue
+import signal
+import threading
+import time
+
+# importado cedo por main.py: o relógio da partida a frio começa aqui se main.py não informar outro
+STARTED = time.perf_counter()
+
+# argumentos por bot aceitos no arquivo de configuração (repassados ao SymbolStrategy)
+BOT_KEYS = ("symbol", "interval", "volume", "stop_gain", "stop_loss", "cadence", "max_rate")
+# argumentos do processo, comuns a todos os symbols (repassados ao MultiSymbolBot)
+SHARED_KEYS = ("buffer_size", "mode", "mark_price", "pool_size")
+
+def load_env(path='.env'):
+    """
+    Carrega um .env, se existir. O python-dotenv só é importado nesse caso
+    e é opcional: sem ele valem apenas as variáveis do ambiente.
+    """
+    if not os.path.exists(path):
+        return False
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        logging.getLogger(__name__).warning(f'python-dotenv not installed, ignoring {path}')
+        return False
+    return load_dotenv(path)
+
+def load_config(path=None, environ=None):
+    """
+    Configuração do modo headless: arquivo JSON e/ou variáveis de ambiente.
+
+    Arquivo: {"api_key", "api_secret", "is_test", "metrics_port", "buffer_size",
+    "mode", "mark_price", "bots": [{"symbol", "interval", "volume", "stop_gain",
+    "stop_loss", "cadence", "max_rate"}]}. As chaves podem
+    ficar fora do arquivo (BINANCE_API_KEY/BINANCE_API_SECRET). Sem arquivo,
+    os bots vêm de BOT_SYMBOLS (ex.: "BTCUSDT,ETHUSDT") com BOT_INTERVAL,
+    BOT_VOLUME, BOT_STOP_GAIN, BOT_STOP_LOSS e BOT_CADENCE.
+    """
+    environ = os.environ if environ is None else environ
+    config = {}
+    if path is not None:
+        with open(path) as file:
+            config = json.load(file)
+
+    config.setdefault("api_key", environ.get("BINANCE_API_KEY"))
+    config.setdefault("api_secret", environ.get("BINANCE_API_SECRET"))
+    config.setdefault("is_test", environ.get("BINANCE_TESTNET", "1").lower() in ("1", "true", "yes"))
+    if "metrics_port" not in config and environ.get("METRICS_PORT"):
+        config["metrics_port"] = int(environ["METRICS_PORT"])
+    if not config.get("bots") and environ.get("BOT_SYMBOLS"):
+        config["bots"] = [{
+            "symbol": symbol.strip().upper(),
+            "interval": environ.get("BOT_INTERVAL", "1m"),
+            "volume": float(environ["BOT_VOLUME"]),
+            "stop_gain": float(environ.get("BOT_STOP_GAIN", 5)),
+            "stop_loss": float(environ.get("BOT_STOP_LOSS", 5)),
+            "cadence": environ.get("BOT_CADENCE", "tick"),
+        } for symbol in environ["BOT_SYMBOLS"].split(",") if symbol.strip()]
+
+    if not config.get("api_key") or not config.get("api_secret"):
+        raise ValueError("Missing api_key/api_secret (config file or BINANCE_API_KEY/BINANCE_API_SECRET)")
+    if not config.get("bots"):
+        raise ValueError("No bots configured (config file \"bots\" or BOT_SYMBOLS)")
+    for bot in config["bots"]:
+        unknown = set(bot) - set(BOT_KEYS)
+        shared = unknown & set(SHARED_KEYS)
+        if shared:
+            raise ValueError(f"Settings shared by all bots go outside \"bots\": {', '.join(sorted(shared))}")
+        if unknown:
+            raise ValueError(f"Unknown bot settings: {', '.join(sorted(unknown))}")
+    return config
+
+class Daemon:
+    """
+    Roda os symbols da configuração em um MultiSymbolBot, sem interface.
+
+    Um único gateway (RateLimiter e user-data stream da conta), executor de
+    ordens e conexão de streams para todos os symbols: o listenKey só é
+    fechado no `stop` do daemon. O bot (e com ele numpy e websocket) só é
+    importado em `start`; as mensagens vão para o log em vez da fila da
+    interface. A partida a frio é medida do início do processo até a
+    assinatura do websocket e registrada em `timings` e no gauge
+    bot_cold_start_seconds.
+    """
+
+    def __init__(self, config, started=STARTED, subscribe_timeout=30):
+        self.config = config
+        self.started = started
+        self.subscribe_timeout = subscribe_timeout
+        self.bot = None
+        self.timings = {}
+        self.logger = logging.getLogger(__name__)
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        from scripts.metrics import REGISTRY
+        from scripts.multi_bot import MultiSymbolBot
+        self._mark('imports')
+
+        # aquecimento (histórico REST) de todos os symbols em paralelo, dentro do MultiSymbolBot
+        self.bot = MultiSymbolBot(
+            self.config["api_key"], self.config["api_secret"], self.config["bots"],
+            is_test=self.config.get("is_test", True), base_url=self.config.get("base_url"),
+            stream_url=self.config.get("stream_url"), metrics_port=self.config.get("metrics_port"),
+            **{key: self.config[key] for key in SHARED_KEYS if key in self.config})
+        self._mark('seeded')
+
+        for target in (self.bot.run, self._drain):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+        if self.bot.subscribed.wait(self.subscribe_timeout):
+            self._mark('subscribed')
+        else:
+            self.logger.error(f'DAEMON: streams not subscribed after {self.subscribe_timeout}s')
+
+        cold_start = REGISTRY.gauge('bot_cold_start_seconds', 'Process start to each startup phase', ('phase',))
+        for phase, seconds in self.timings.items():
+            cold_start.labels(phase).set(seconds)
+        self.logger.info('Cold start: ' + ', '.join(f'{phase} {seconds * 1000:.0f} ms' for phase, seconds in self.timings.items()))
+        return self.timings
+
+    def stop(self):
+        self._stop.set()
+        if self.bot is not None:
+            self.bot.stop()
+
+    def wait(self):
+        while not self._stop.wait(1):
+            pass
+
+    def _mark(self, phase):
+        self.timings[phase] = time.perf_counter() - self.started
+
+    def _drain(self):
+        # sem interface: as mensagens do bot ("[SYMBOL] ...") vão para o log
+        while not self._stop.is_set():
+            try:
+                message = self.bot.msg_queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            symbol = message[1:message.index(']')] if message.startswith('[') and ']' in message else None
+            self.logger.info(message, extra={'symbol': symbol} if symbol else None)
+
+def run_gui():
+    # interface (tkinter/ttkthemes) só neste caminho
+    load_env()
+    from scripts.interface.main_window import MainWindow
+    MainWindow().run()
+
+def main(argv=None, started=STARTED):
+    parser = argparse.ArgumentParser(description="RSI/ATR trading bot")
+    subparsers = parser.add_subparsers(dest="command")
+    subparsers.add_parser("gui", help="desktop interface (default)")
+    run_parser = subparsers.add_parser("run", help="headless daemon")
+    run_parser.add_argument("--config", help="JSON config file (defaults to environment variables)")
+    run_parser.add_argument("--env-file", default=".env")
+    run_parser.add_argument("--log-level", default="INFO")
+    args = parser.parse_args(argv)
+
+    if args.command != "run":
+        run_gui()
+        return 0
+
+    # logs em JSON (logs/bot.log) e no terminal, ambos gravados pela thread do listener
+    from scripts.log_setup import setup_logging
+    setup_logging(level=args.log_level, console=True)
+    load_env(args.env_file)
+    try:
+        config = load_config(args.config)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+
+    daemon = Daemon(config, started=started)
+    signal.signal(signal.SIGTERM, lambda signum, frame: daemon.stop())
+    try:
+        timings = daemon.start()
+        print(json.dumps({"cold_start_ms": {phase: round(seconds * 1000, 1) for phase, seconds in timings.items()}}))
+        daemon.wait()
+    except KeyboardInterrupt:
+        pass
+    except ValueError as e:
+        # ex.: volume abaixo do minQty/minNotional do symbol (FilterError)
+        logging.getLogger(__name__).error(f'DAEMON: {str(e)}')
+        return 1
+    finally:
+        daemon.stop()
+    return 0
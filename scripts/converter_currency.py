@@ -1,18 +1,153 @@
+import json
+import logging
+import threading
+import time
+
 import requests
 
-class CryptoConverter:
-    def __init__(self):
+from scripts.http_session import DEFAULT_TIMEOUT, create_session
+
+TICKER = 'ticker' # último preço (/ticker/price)
+BOOK = 'book' # meio do livro (/ticker/bookTicker)
+
+class ConversionError(ValueError):
+    pass
+
+class CryptoCompareSource:
+    """
+    Fonte externa opcional (min-api.cryptocompare.com), usada só como
+    fallback quando a Binance não tem o par ou não responde.
+    """
+
+    def __init__(self, session=None, timeout=DEFAULT_TIMEOUT):
         self.base_url = 'https://min-api.cryptocompare.com/data'
+        self.timeout = timeout
+        self.session = session if session is not None else create_session(pool_size=1)
+
+    def __call__(self, base, quote):
+        response = self.session.get(f'{self.base_url}/price', params={'fsym': base, 'tsyms': quote}, timeout=self.timeout)
+        if response.status_code != 200:
+            return None
+        return response.json().get(quote)
+
+class CryptoConverter:
+    """
+    Converte um valor na moeda de cotação (ex.: USDT) em quantidade do ativo
+    base pelo preço da Binance.
+
+    O preço vem, nesta ordem, de um preço ao vivo registrado pelo bot
+    (`add_live_price`), do cache (válido por `ttl` segundos), da Binance
+    (`ticker/price` ou o meio do `bookTicker`) e, por último, do `fallback`
+    (ex.: CryptoCompareSource). `convert_many` busca os preços de vários
+    pares em uma única chamada. Sem preço, levanta ConversionError.
+    """
+
+    def __init__(self, pool_size=2, timeout=DEFAULT_TIMEOUT, base_url=None, is_test=False, ttl=10.0, source=TICKER,
+                 fallback=None, session=None):
+        if base_url is not None:
+            self.base_url = base_url
+        elif is_test:
+            self.base_url = 'https://testnet.binance.vision/api/v3'
+        else:
+            self.base_url = 'https://api.binance.com/api/v3'
+        self.timeout = timeout
+        self.ttl = ttl
+        self.source = source
+        self.fallback = fallback
+        self.session = session if session is not None else create_session(pool_size=pool_size)
+        self.logger = logging.getLogger(__name__)
+        self.live_prices = {} # symbol -> função que devolve o preço mantido pelo bot (ou None)
+        self._cache = {} # symbol -> (preço, instante)
+        self._lock = threading.Lock()
+
+    def add_live_price(self, symbol, getter):
+        self.live_prices[symbol] = getter
+
+    def remove_live_price(self, symbol):
+        # bot parado: o preço volta a vir do cache/Binance
+        self.live_prices.pop(symbol, None)
+
+    def price(self, base, quote):
+        return self.prices([(base, quote)])[base + quote]
+
+    def prices(self, pairs):
+        """
+        Preço de cada par (base, quote), indexado por symbol, com uma única
+        chamada à Binance para todos os que faltam no cache.
+        """
+        pairs = list(dict.fromkeys(pairs))
+        result = {}
+        missing = []
+        now = time.monotonic()
+        for base, quote in pairs:
+            symbol = base + quote
+            price = self._live_price(symbol)
+            if price is None:
+                with self._lock:
+                    cached = self._cache.get(symbol)
+                if cached is not None and now - cached[1] < self.ttl:
+                    price = cached[0]
+            if price is None:
+                missing.append((base, quote))
+            else:
+                result[symbol] = price
+
+        if missing:
+            fetched = self._fetch([base + quote for base, quote in missing])
+            for base, quote in missing:
+                symbol = base + quote
+                price = fetched.get(symbol)
+                if price is None:
+                    price = self._fallback(base, quote)
+                if price is None:
+                    raise ConversionError(f"No price for {symbol}")
+                with self._lock:
+                    self._cache[symbol] = (price, time.monotonic())
+                result[symbol] = price
+        return result
 
     def convert(self, from_currency, to_currency, amount):
-        url = f'{self.base_url}/price?fsym={from_currency}&tsyms={to_currency}'
-        response = requests.get(url)
+        return amount / self.price(from_currency, to_currency)
 
-        if response.status_code != 200:
+    def convert_many(self, conversions):
+        # [(base, quote, valor)] -> [quantidade], para dimensionar vários bots de uma vez
+        prices = self.prices([(base, quote) for base, quote, _ in conversions])
+        return [amount / prices[base + quote] for base, quote, amount in conversions]
+
+    def _live_price(self, symbol):
+        getter = self.live_prices.get(symbol)
+        if getter is None:
             return None
-        
-        data = response.json()
-        to_currency_price = data[to_currency]
-        converted_amount = amount / to_currency_price
+        price = getter()
+        return float(price) if price else None
+
+    def _fetch(self, symbols):
+        endpoint = 'ticker/bookTicker' if self.source == BOOK else 'ticker/price'
+        params = {'symbol': symbols[0]} if len(symbols) == 1 else {'symbols': json.dumps(symbols, separators=(',', ':'))}
+        try:
+            response = self.session.get(f'{self.base_url}/{endpoint}', params=params, timeout=self.timeout)
+            data = response.json()
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.logger.warning(f'CONVERTER: {str(e)}')
+            return {}
+        if isinstance(data, dict):
+            if 'code' in data:
+                self.logger.warning(f'CONVERTER {",".join(symbols)}: {data.get("code")} {data.get("msg")}')
+                if len(symbols) > 1:
+                    # um par inválido derruba o lote inteiro: busca um a um
+                    return {symbol: price for single in symbols for symbol, price in self._fetch([single]).items()}
+                return {}
+            data = [data]
+        if self.source == BOOK:
+            return {item['symbol']: (float(item['bidPrice']) + float(item['askPrice'])) / 2 for item in data}
+        return {item['symbol']: float(item['price']) for item in data}
 
-        return converted_amount
+    def _fallback(self, base, quote):
+        if self.fallback is None:
+            return None
+        try:
+            price = self.fallback(base, quote)
+        except (requests.exceptions.RequestException, ValueError) as e:
+            self.logger.warning(f'CONVERTER FALLBACK {base}{quote}: {str(e)}')
+            return None
+        return float(price) if price else None
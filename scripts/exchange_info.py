@@ -0,0 +1,278 @@
+import json
+import logging
+import os
+import threading
+import time
+from decimal import ROUND_DOWN, ROUND_HALF_UP, Decimal
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data')
+# intervalo de atualização do cache (s): filtros mudam raramente
+MAX_AGE = 24 * 60 * 60
+# espera antes de tentar de novo quando /exchangeInfo falha (s)
+RETRY_AFTER = 60
+# códigos da Binance para as mesmas rejeições feitas localmente
+FILTER_FAILURE = -1013
+MIN_NOTIONAL_FAILURE = -4164
+
+def default_path(is_test=False):
+    return os.path.join(DATA_DIR, 'exchange_info_testnet.json' if is_test else 'exchange_info.json')
+
+class FilterError(ValueError):
+    def __init__(self, symbol, code, message):
+        super().__init__(f"{symbol} {code}: {message}")
+        self.symbol = symbol
+        self.code = code
+        self.message = message
+
+class SymbolFilters:
+    """
+    Filtros de um symbol de /fapi/v1/exchangeInfo (LOT_SIZE, MARKET_LOT_SIZE,
+    PRICE_FILTER, MIN_NOTIONAL) para arredondar e validar ordens localmente.
+    """
+
+    __slots__ = ("symbol", "status", "base_asset", "quote_asset", "step_size", "min_qty", "max_qty",
+                 "market_step_size", "market_min_qty", "market_max_qty", "tick_size", "min_notional")
+
+    def __init__(self, symbol, status="TRADING", base_asset=None, quote_asset=None, step_size="0", min_qty="0",
+                 max_qty="0", market_step_size=None, market_min_qty=None, market_max_qty=None, tick_size="0",
+                 min_notional="0"):
+        self.symbol = symbol
+        self.status = status
+        self.base_asset = base_asset
+        self.quote_asset = quote_asset
+        self.step_size = Decimal(step_size).normalize()
+        self.min_qty = Decimal(min_qty)
+        self.max_qty = Decimal(max_qty)
+        # ordens MARKET seguem o MARKET_LOT_SIZE (ausente: o LOT_SIZE)
+        self.market_step_size = Decimal(market_step_size).normalize() if market_step_size else self.step_size
+        self.market_min_qty = Decimal(market_min_qty) if market_min_qty else self.min_qty
+        self.market_max_qty = Decimal(market_max_qty) if market_max_qty else self.max_qty
+        self.tick_size = Decimal(tick_size).normalize()
+        self.min_notional = Decimal(min_notional)
+
+    @classmethod
+    def from_symbol(cls, info):
+        # um item de exchangeInfo["symbols"]
+        filters = {item["filterType"]: item for item in info.get("filters", [])}
+        lot = filters.get("LOT_SIZE", {})
+        market = filters.get("MARKET_LOT_SIZE", {})
+        notional = filters.get("MIN_NOTIONAL", {})
+        return cls(info["symbol"], status=info.get("status", "TRADING"), base_asset=info.get("baseAsset"),
+                   quote_asset=info.get("quoteAsset"), step_size=lot.get("stepSize", "0"), min_qty=lot.get("minQty", "0"),
+                   max_qty=lot.get("maxQty", "0"), market_step_size=market.get("stepSize"),
+                   market_min_qty=market.get("minQty"), market_max_qty=market.get("maxQty"),
+                   tick_size=filters.get("PRICE_FILTER", {}).get("tickSize", "0"),
+                   # futuros usam "notional"; spot, "minNotional"
+                   min_notional=notional.get("notional", notional.get("minNotional", "0")))
+
+    def to_dict(self):
+        return {
+            "symbol": self.symbol, "status": self.status, "base_asset": self.base_asset, "quote_asset": self.quote_asset,
+            "step_size": str(self.step_size), "min_qty": str(self.min_qty), "max_qty": str(self.max_qty),
+            "market_step_size": str(self.market_step_size), "market_min_qty": str(self.market_min_qty),
+            "market_max_qty": str(self.market_max_qty), "tick_size": str(self.tick_size),
+            "min_notional": str(self.min_notional),
+        }
+
+    def round_quantity(self, quantity, market=True, nearest=False):
+        # para baixo no múltiplo do stepSize, como string pronta para a ordem; `nearest` para fechar
+        # posições cujo tamanho veio de somas em float (0.0029999... vira 0.003, não 0.002)
+        return _round(quantity, self.market_step_size if market else self.step_size,
+                      ROUND_HALF_UP if nearest else ROUND_DOWN)
+
+    def round_price(self, price):
+        return _round(price, self.tick_size)
+
+    def quantity_for(self, notional, price, market=True):
+        # quantidade para `notional` na moeda de cotação ao preço `price`, já arredondada e validada
+        quantity = self.round_quantity(Decimal(str(notional)) / Decimal(str(price)), market)
+        self.check(quantity, price, market)
+        return quantity
+
+    def check(self, quantity, price=None, market=True, reduce_only=False):
+        """
+        Valida a quantidade (já arredondada) contra minQty/maxQty/stepSize e,
+        com `price`, o valor mínimo da ordem. Levanta FilterError com o mesmo
+        código que a Binance devolveria. reduceOnly não tem valor mínimo.
+        """
+        quantity = Decimal(str(quantity))
+        name = 'MARKET_LOT_SIZE' if market else 'LOT_SIZE'
+        step, min_qty, max_qty = ((self.market_step_size, self.market_min_qty, self.market_max_qty) if market
+                                  else (self.step_size, self.min_qty, self.max_qty))
+        if quantity <= 0 or quantity < min_qty:
+            raise FilterError(self.symbol, FILTER_FAILURE, f"Filter failure: {name} (quantity {quantity} < minQty {min_qty})")
+        if max_qty and quantity > max_qty:
+            raise FilterError(self.symbol, FILTER_FAILURE, f"Filter failure: {name} (quantity {quantity} > maxQty {max_qty})")
+        if step and quantity % step:
+            raise FilterError(self.symbol, FILTER_FAILURE,
+                              f"Filter failure: {name} (quantity {quantity} not a multiple of stepSize {step})")
+        if price is not None and not reduce_only and self.min_notional \
+                and quantity * Decimal(str(price)) < self.min_notional:
+            raise FilterError(self.symbol, MIN_NOTIONAL_FAILURE,
+                              f"Order's notional must be no smaller than {self.min_notional}")
+
+def is_closing(params):
+    # reduceOnly ou, no modo hedge (onde reduceOnly não é aceito), a ordem contrária à perna indicada
+    if str(params.get("reduceOnly", "")).lower() == "true":
+        return True
+    return (params.get("positionSide"), params.get("side")) in (("LONG", "SELL"), ("SHORT", "BUY"))
+
+def prepare_order(filters, params, closing=None):
+    """
+    Arredonda `quantity` (e `price`) de uma ordem aos filtros do symbol e
+    valida minQty/maxQty e, quando há preço, o valor mínimo. Ordens que
+    fecham posição (`closing`; por padrão deduzido de reduceOnly/positionSide)
+    são arredondadas ao mais próximo e não têm valor mínimo. Levanta
+    FilterError; sem filtros a ordem segue como está.
+    """
+    if filters is None or "quantity" not in params:
+        return params
+    market = params.get("type", "MARKET") == "MARKET"
+    if closing is None:
+        closing = is_closing(params)
+    params = dict(params, quantity=filters.round_quantity(params["quantity"], market, nearest=closing))
+    if "price" in params:
+        params["price"] = filters.round_price(params["price"])
+    filters.check(params["quantity"], params.get("price"), market, reduce_only=closing)
+    return params
+
+def _round(value, step, rounding=ROUND_DOWN):
+    value = Decimal(str(value))
+    if not step:
+        return format(value, 'f')
+    return format((value / step).to_integral_value(rounding) * step, 'f')
+
+class ExchangeInfo:
+    """
+    Filtros por symbol de /fapi/v1/exchangeInfo, indexados em um dict.
+
+    `fetch` devolve a resposta da API. O índice é gravado em `path` (JSON)
+    e reaproveitado enquanto tiver menos de `max_age` segundos; sem `path`
+    fica só em memória. A carga acontece no primeiro `get`; depois disso,
+    filtros vencidos são atualizados em uma thread e `get` segue com os
+    atuais, sem atrasar a ordem que pediu. Falhas não interrompem o bot:
+    `get` devolve None e uma nova tentativa é feita após RETRY_AFTER segundos.
+    """
+
+    def __init__(self, fetch, path=None, max_age=MAX_AGE):
+        self.fetch = fetch
+        self.path = path
+        self.max_age = max_age
+        self.logger = logging.getLogger(__name__)
+        self.filters = {}
+        self.updated = None # time.time() da resposta da API usada no índice
+        self._failed_at = None
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+
+    def get(self, symbol):
+        self._ensure_loaded()
+        return self.filters.get(symbol)
+
+    def symbols(self, quote_asset=None):
+        # symbols negociáveis (status TRADING), opcionalmente de uma moeda de cotação
+        self._ensure_loaded()
+        return sorted(symbol for symbol, filters in self.filters.items()
+                      if filters.status == "TRADING" and (quote_asset is None or filters.quote_asset == quote_asset))
+
+    def _ensure_loaded(self):
+        if not self.expired():
+            return
+        if self.updated is None:
+            self.load()
+        else:
+            self.refresh_in_background()
+
+    def refresh_in_background(self):
+        # uma atualização por vez; quem chamou segue com os filtros atuais
+        if self._refreshing.acquire(blocking=False):
+            threading.Thread(target=self._refresh, daemon=True).start()
+
+    def loading(self):
+        # atualização em segundo plano em andamento
+        return self._refreshing.locked()
+
+    def _refresh(self):
+        try:
+            self.load()
+        finally:
+            self._refreshing.release()
+
+    def load(self, use_cache=True):
+        with self._lock:
+            if not self.expired():
+                return self.filters
+            if use_cache and self.updated is None and self._read_cache():
+                return self.filters
+            try:
+                self._index(self.fetch(), time.time())
+            except Exception as e:
+                return self._failed(e)
+            self._write_cache()
+            return self.filters
+
+    async def load_async(self, fetch):
+        # mesma carga de `load` com uma corrotina no lugar de `fetch` (gateway asyncio)
+        if not self.expired():
+            return self.filters
+        if self.updated is None and self._read_cache():
+            return self.filters
+        try:
+            self._index(await fetch(), time.time())
+        except Exception as e:
+            return self._failed(e)
+        self._write_cache()
+        return self.filters
+
+    def refresh(self):
+        # força uma nova consulta à API
+        with self._lock:
+            self.updated = None
+            self._failed_at = None
+        return self.load(use_cache=False)
+
+    def expired(self):
+        if self._failed_at is not None and time.monotonic() - self._failed_at < RETRY_AFTER:
+            return False
+        return self.updated is None or time.time() - self.updated >= self.max_age
+
+    def _failed(self, error):
+        self.logger.warning(f'EXCHANGE INFO: {str(error)}')
+        self._failed_at = time.monotonic()
+        return self.filters
+
+    def _index(self, response, updated):
+        if not isinstance(response, dict) or "symbols" not in response:
+            raise ValueError(f"Invalid exchangeInfo response: {str(response)[:200]}")
+        self.filters = {info["symbol"]: SymbolFilters.from_symbol(info) for info in response["symbols"]}
+        self.updated = updated
+        self._failed_at = None
+
+    def _read_cache(self):
+        if self.path is None or not os.path.exists(self.path):
+            return False
+        try:
+            with open(self.path) as file:
+                cache = json.load(file)
+            if time.time() - cache["updated"] >= self.max_age:
+                return False
+            self.filters = {symbol: SymbolFilters(**filters) for symbol, filters in cache["symbols"].items()}
+            self.updated = cache["updated"]
+            return True
+        except (OSError, ValueError, KeyError, TypeError) as e:
+            self.logger.warning(f'EXCHANGE INFO CACHE {self.path}: {str(e)}')
+            return False
+
+    def _write_cache(self):
+        if self.path is None:
+            return
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            temporary = f"{self.path}.tmp"
+            with open(temporary, "w") as file:
+                json.dump({"updated": self.updated,
+                           "symbols": {symbol: filters.to_dict() for symbol, filters in self.filters.items()}}, file)
+            # troca atômica: outro processo nunca lê um arquivo pela metade
+            os.replace(temporary, self.path)
+        except OSError as e:
+            self.logger.warning(f'EXCHANGE INFO CACHE {self.path}: {str(e)}')
@@ -0,0 +1,32 @@
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_TIMEOUT = (3.05, 10) # (conexão, leitura) em segundos
+
+def create_session(pool_size=10, retries=3, backoff_factor=0.3):
+    """
+    Cria uma sessão HTTP persistente (keep-alive) com pool de conexões.
+
+    Erros de conexão são sempre repetidos, pois a requisição não chegou ao
+    servidor. Respostas 5xx só são repetidas para métodos idempotentes, então
+    um POST de ordem nunca é reenviado automaticamente.
+    """
+    retry = Retry(
+        total=retries,
+        connect=retries,
+        read=retries,
+        status=retries,
+        backoff_factor=backoff_factor,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=Retry.DEFAULT_ALLOWED_METHODS,
+        raise_on_status=False,
+        # 429/418 ficam com o RateLimiter do gateway, que suspende todas as chamadas
+        respect_retry_after_header=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
@@ -0,0 +1,130 @@
+import math
+
+class WilderRSI:
+    """
+    RSI incremental com suavização de Wilder, O(1) por tick.
+
+    Reproduz exatamente o `tulipy.rsi`: a primeira média de ganhos/perdas é
+    a média simples das `period` primeiras variações e as seguintes usam
+    `(valor - média) / period + média`. Atualizações do candle em aberto são
+    provisórias e só alteram o estado quando o candle fecha.
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.per = 1.0 / period
+        self.prev_close = None
+        self.count = 0
+        self.smooth_up = 0.0
+        self.smooth_down = 0.0
+        self.value = None
+
+    def update(self, close, closed=True):
+        if self.prev_close is None:
+            if closed:
+                self.prev_close = close
+            return None
+
+        upward = close - self.prev_close if close > self.prev_close else 0.0
+        downward = self.prev_close - close if close < self.prev_close else 0.0
+
+        if self.count < self.period:
+            smooth_up = self.smooth_up + upward
+            smooth_down = self.smooth_down + downward
+            if self.count + 1 == self.period:
+                value = _rsi(smooth_up / self.period, smooth_down / self.period)
+            else:
+                value = None
+        else:
+            smooth_up = (upward - self.smooth_up) * self.per + self.smooth_up
+            smooth_down = (downward - self.smooth_down) * self.per + self.smooth_down
+            value = _rsi(smooth_up, smooth_down)
+
+        if closed:
+            self.count += 1
+            if self.count == self.period:
+                # fim do aquecimento: as somas passam a ser médias
+                smooth_up /= self.period
+                smooth_down /= self.period
+            self.smooth_up = smooth_up
+            self.smooth_down = smooth_down
+            self.prev_close = close
+
+        self.value = value
+        return value
+
+class WilderATR:
+    """
+    ATR incremental com suavização de Wilder, O(1) por tick.
+
+    Usa máxima, mínima e fechamento reais do candle e reproduz exatamente o
+    `tulipy.atr` (o primeiro true range é `high - low`).
+    """
+
+    def __init__(self, period):
+        self.period = period
+        self.per = 1.0 / period
+        self.prev_close = None
+        self.count = 0
+        self.sum = 0.0
+        self.value = None
+        self._committed = None
+
+    def update(self, high, low, close, closed=True):
+        if self.prev_close is None:
+            true_range = high - low
+        else:
+            true_range = _true_range(high, low, self.prev_close)
+
+        if self.count < self.period:
+            total = self.sum + true_range
+            value = total / self.period if self.count + 1 == self.period else None
+        else:
+            total = self.sum
+            value = (true_range - self._committed) * self.per + self._committed
+
+        if closed:
+            self.count += 1
+            self.sum = total
+            self.prev_close = close
+            if value is not None:
+                self._committed = value
+
+        self.value = value
+        return value
+
+class IndicatorEngine:
+    """
+    Agrupa o RSI e o ATR de um symbol e mantém o estado dos dois em sincronia
+    com o buffer de candles.
+    """
+
+    def __init__(self, rsi_period=14, atr_period=14):
+        self.rsi = WilderRSI(rsi_period)
+        self.atr = WilderATR(atr_period)
+
+    def seed(self, highs, lows, closes):
+        # somente candles fechados
+        for high, low, close in zip(highs, lows, closes):
+            self.update(float(high), float(low), float(close), closed=True)
+
+    def update(self, high, low, close, closed=False):
+        rsi = self.rsi.update(close, closed)
+        atr = self.atr.update(high, low, close, closed)
+        return rsi, atr
+
+def _rsi(smooth_up, smooth_down):
+    total = smooth_up + smooth_down
+    if total == 0:
+        return math.nan
+    return 100.0 * (smooth_up / total)
+
+def _true_range(high, low, prev_close):
+    value = high - low
+    ych = abs(high - prev_close)
+    ycl = abs(low - prev_close)
+    if ych > value:
+        value = ych
+    if ycl > value:
+        value = ycl
+    return value
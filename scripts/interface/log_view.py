@@ -0,0 +1,56 @@
+import collections
+import queue
+import re
+
+# linhas de estado repetidas a cada tick (PnL/ROE, RSI): em um lote só a mais recente de cada symbol é exibida
+STATUS = re.compile(r'^(\[[^\]]+\] )?(PNL|RSI):')
+
+class LogBuffer:
+    """
+    Linhas do prompt da interface, lidas da fila do bot em lotes.
+
+    Cada `drain` esvazia até `max_batch` mensagens sem bloquear, junta as
+    linhas de estado repetidas (contadas em `coalesced`) e guarda no máximo
+    `max_lines` linhas; o que não cabe é descartado (contado em `dropped`).
+    Não depende do Tk, então roda e é testado fora da interface.
+    """
+
+    def __init__(self, max_lines=2000, max_batch=5000):
+        self.max_lines = max_lines
+        self.max_batch = max_batch
+        self.lines = collections.deque(maxlen=max_lines)
+        self.dropped = 0
+        self.coalesced = 0
+
+    def drain(self, source):
+        # devolve as linhas novas a exibir
+        batch = []
+        for _ in range(self.max_batch):
+            try:
+                batch.append(str(source.get_nowait()))
+            except queue.Empty:
+                break
+        return self.add(batch)
+
+    def add(self, messages):
+        latest = {}
+        for index, message in enumerate(messages):
+            match = STATUS.match(message)
+            if match:
+                latest[match.group(0)] = index
+
+        lines = []
+        for index, message in enumerate(messages):
+            match = STATUS.match(message)
+            if match is None or latest[match.group(0)] == index:
+                lines.append(message)
+        self.coalesced += len(messages) - len(lines)
+
+        if len(lines) > self.max_lines:
+            self.dropped += len(lines) - self.max_lines
+            lines = lines[-self.max_lines:]
+        self.lines.extend(lines)
+        return lines
+
+    def counters(self):
+        return f"Dropped: {self.dropped}, Coalesced: {self.coalesced}"
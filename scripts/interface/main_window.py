@@ -11,14 +11,21 @@ from tkinter import ttk
 import ttkthemes
 from ttkthemes import ThemedTk
 
+from scripts.interface.log_view import LogBuffer
 from scripts.interface.validate_form import FormValidator
 
-from dotenv import load_dotenv
-
+from scripts.binance_gateway import public_exchange_info
+from scripts.exchange_info import FilterError
 from scripts.trade_bot import BinanceTradingBot
-from scripts.converter_currency import CryptoConverter
+from scripts.converter_currency import ConversionError, CryptoCompareSource, CryptoConverter
 
-load_dotenv()
+# intervalo do poller do prompt (ms) e linhas mantidas no widget
+PROMPT_POLL_MS = 100
+PROMPT_MAX_LINES = 2000
+# espera (ms) entre as conferências da exchangeInfo carregando em segundo plano
+EXCHANGE_INFO_POLL_MS = 200
+# intervalo (ms) da atualização do PnL acumulado
+STATUS_REFRESH_MS = 1000
 
 class MainWindow:
     def __init__(self, largura=890, altura=550, titulo="NexTrade"):
@@ -38,13 +45,18 @@ class MainWindow:
         self.pnl = '--/--'
         self.timer_bot = '--/--'
         self.timer_job = None
-        
+        self.prompt_job = None
+        self.status_job = None
+        self.log = LogBuffer(max_lines=PROMPT_MAX_LINES)
+        self.exchange_infos = {} # is_test -> ExchangeInfo pública da rede
+        self.start_job = None
+
         # Cria a janela principal
         self.window =  ThemedTk(theme="yaru")
         self.msg_queue = queue.Queue()
 
-        # Conversor 
-        self.currency = CryptoConverter()
+        # Conversores por rede (is_test): preço ao vivo do bot, depois Binance; cryptocompare só na mainnet
+        self.currencies = {}
 
         # Define as propriedades da janela
         self.window.geometry(f"{largura}x{altura}")
@@ -64,6 +76,9 @@ class MainWindow:
         self.prompt.config(insertbackground="white")
         self.prompt.pack(fill=tk.BOTH, expand=True) 
 
+        # filtros da rede padrão (testnet) já carregando enquanto o formulário é preenchido
+        self.exchange_info_for(True)
+
     def update_timer_label(self, label):
         # Atualiza o texto da label com o valor atual do cronômetro
         label.config(text=f"Bot Activity: {self.timer_bot}")
@@ -86,10 +101,36 @@ class MainWindow:
     def stop(self):
         if self.stop_bot is not None:
             self.stop_bot.stop()
+            self.converter_for(self.stop_bot.is_test).remove_live_price(self.stop_bot.symbol)
             self.prompt.insert(tk.END, "Stopped bot...\n")
 
         return
 
+    def is_test(self):
+        # Radiobutton: "1" testnet, "0" mainnet
+        return self.account_mode.get() not in ("0", "False")
+
+    def converter_for(self, is_test):
+        # preços da mesma rede do bot; o cryptocompare só tem preços da mainnet
+        currency = self.currencies.get(is_test)
+        if currency is None:
+            currency = self.currencies[is_test] = CryptoConverter(
+                is_test=is_test, fallback=None if is_test else CryptoCompareSource())
+        return currency
+
+    def exchange_info_for(self, is_test):
+        # filtros da rede do formulário pelo endpoint público, carregados fora da thread do Tk
+        exchange_info = self.exchange_infos.get(is_test)
+        if exchange_info is None:
+            exchange_info = self.exchange_infos[is_test] = public_exchange_info(is_test)
+        if exchange_info.expired():
+            exchange_info.refresh_in_background()
+        return exchange_info
+
+    def resume_start(self):
+        self.start_job = None
+        self.start()
+
     def start(self):
         api_key = self.key.get()
         api_secret = self.secret.get()
@@ -100,6 +141,20 @@ class MainWindow:
         stop_loss = self.stop_loss.get()
         account_mode = self.account_mode.get()
 
+        # Filtros dos symbols da rede do bot, do cache em disco quando recente; na primeira carga
+        # o start é reagendado pelo loop do Tk até a thread terminar, sem travar a janela
+        is_test = self.is_test()
+        exchange_info = self.exchange_info_for(is_test)
+        if exchange_info.updated is None and exchange_info.loading():
+            if self.start_job is None:
+                self.prompt.delete("1.0", tk.END)
+                self.prompt.insert(tk.END, "Loading exchange info...\n")
+                self.start_job = self.window.after(EXCHANGE_INFO_POLL_MS, self.resume_start)
+            return
+        if self.start_job is not None:
+            self.window.after_cancel(self.start_job)
+            self.start_job = None
+
         # Valida Formulário
         validate_form = FormValidator(
             api_key=api_key,
@@ -109,7 +164,8 @@ class MainWindow:
             interval=interval,
             stop_gain=stop_gain,
             stop_loss=stop_loss,
-            account_mode=account_mode
+            account_mode=account_mode,
+            exchange_info=exchange_info
         )
 
         validation_errors = validate_form.validate()
@@ -124,62 +180,116 @@ class MainWindow:
         self.prompt.delete("1.0", tk.END)
 
         # Dividindo a variável "symbol" em duas partes
-        base = symbol[:3] 
-        quote = symbol[3:] 
+        filters = exchange_info.get(symbol)
+        if filters is not None:
+            base, quote = filters.base_asset, filters.quote_asset
+        else:
+            base = symbol[:3] 
+            quote = symbol[3:] 
 
         # Valor Convertido     
-        converted_amount = self.currency.convert(base, quote, int(quantity))
-        formated_amount = "{:.2f}".format(converted_amount)
-        amount = float(formated_amount)
+        currency = self.converter_for(is_test)
+        try:
+            converted_amount = currency.convert(base, quote, int(quantity))
+        except ConversionError as e:
+            self.prompt.insert(tk.END, f"Error: {e}\n")
+            return
+        if filters is not None:
+            # arredondado para baixo no stepSize do symbol
+            amount = float(filters.round_quantity(converted_amount))
+        else:
+            formated_amount = "{:.2f}".format(converted_amount)
+            amount = float(formated_amount)
 
         # Stop Gain and Loss
         stop_gain_per_trade = float(stop_gain)
         stop_loss_per_trade = float(stop_loss)
 
         # Instancia Bot
-        bot = BinanceTradingBot(
-            api_key=api_key,
-            api_secret=api_secret,
-            symbol=symbol, 
-            interval=interval, 
-            volume=amount,
-            stop_gain=stop_gain_per_trade,
-            stop_loss=stop_loss_per_trade,
-            is_test=True)
+        try:
+            bot = BinanceTradingBot(
+                api_key=api_key,
+                api_secret=api_secret,
+                symbol=symbol, 
+                interval=interval, 
+                volume=amount,
+                stop_gain=stop_gain_per_trade,
+                stop_loss=stop_loss_per_trade,
+                is_test=is_test)
+        except FilterError as e:
+            # volume fora de minQty/minNotional: recusado antes de qualquer ordem
+            self.prompt.insert(tk.END, f"Error: {e}\n")
+            return
 
         self.stop_bot = bot
+        # conversões seguintes do symbol pelo preço que o bot já mantém, sem REST
+        currency.add_live_price(symbol, bot.strategy.current_price)
 
         # Thread 1
         self.bot_thread = threading.Thread(target=bot.run)
         self.bot_thread.start()
 
-        # Thread 2
-        self.prompt_thread = threading.Thread(target=lambda: self.update_prompt(bot))
-        self.prompt_thread.start()
+        # Prompt lido pelo loop do Tk (o widget só pode ser alterado nesta thread)
+        self.prompt.insert(tk.END, "Bot is running...\n")
+        if self.prompt_job is not None:
+            self.window.after_cancel(self.prompt_job)
+        self.update_prompt(bot.msg_queue)
 
         # Thread timer
         self.timer_thread = threading.Thread(target=self.stopwatch)
         self.timer_thread.start()
 
-    def update_prompt(self, bot):
-        self.prompt.insert(tk.END, "Bot is running...\n")
-        while True:
-            message = bot.ws_message()  # get latest message from socket
-            self.prompt.insert(tk.END, message + "\n")
+        if self.status_job is None:
+            self.update_status()
+
+    def update_status(self):
+        # PnL realizado do bot, também no ativo base pelo preço ao vivo registrado no conversor
+        bot = self.stop_bot
+        # só enquanto o bot registra o preço ao vivo: nenhuma chamada REST na thread do Tk
+        if bot is not None and bot.symbol in self.converter_for(bot.is_test).live_prices:
+            filters = bot.binance.symbol_filters(bot.symbol)
+            base, quote = (filters.base_asset, filters.quote_asset) if filters is not None \
+                else (bot.symbol[:3], bot.symbol[3:])
+            pnl = bot.strategy.gross_pnl
+            try:
+                [pnl_base] = self.converter_for(bot.is_test).convert_many([(base, quote, pnl)])
+                self.pnl = f"{pnl:.2f} {quote} ({pnl_base:.6f} {base})"
+            except ConversionError:
+                self.pnl = f"{pnl:.2f} {quote}"
+            self.pnl_label.config(text=f"Acumulate PNL: {self.pnl}")
+
+        self.status_job = self.window.after(STATUS_REFRESH_MS, self.update_status)
+
+    def update_prompt(self, source):
+        # esvazia a fila em lote: um único insert por ciclo, sem limitar a vazão
+        lines = self.log.drain(source)
+        if lines:
+            self.prompt.insert(tk.END, "\n".join(lines) + "\n")
+            self.trim_prompt()
             self.prompt.see(tk.END)
-            time.sleep(0.1)
+            self.counter_label.config(text=self.log.counters())
+
+        self.prompt_job = self.window.after(PROMPT_POLL_MS, lambda: self.update_prompt(source))
 
+    def trim_prompt(self):
+        # remove as linhas mais antigas acima do limite (a última linha do Text fica sempre vazia)
+        excess = int(self.prompt.index('end-1c').split('.')[0]) - 1 - self.log.max_lines
+        if excess > 0:
+            self.prompt.delete('1.0', f'{excess + 1}.0')
 
     def info_trades(self):
         info_trade = tk.Frame(self.window)
         info_trade.pack(side=tk.TOP, fill=tk.X, padx=10, pady=10)
 
-        acumulate_pnl = tk.Label(info_trade, text=f"Acumulate PNL: {self.pnl}")
-        acumulate_pnl.grid(row=0, column=2, padx=5, pady=5)
+        self.pnl_label = tk.Label(info_trade, text=f"Acumulate PNL: {self.pnl}")
+        self.pnl_label.grid(row=0, column=2, padx=5, pady=5)
 
         timer_label = tk.Label(info_trade, text=f"Bot Activity: {self.timer_bot}")
         timer_label.grid(row=0, column=6, padx=5, pady=5)
 
+        self.counter_label = tk.Label(info_trade, text=self.log.counters())
+        self.counter_label.grid(row=0, column=8, padx=5, pady=5)
+
         # Inicia a atualização contínua da label do cronômetro
         self.update_timer_label(label=timer_label)
 
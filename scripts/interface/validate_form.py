@@ -1,11 +1,21 @@
 from cerberus import Validator 
 import json
 
+# symbols aceitos quando a exchangeInfo não está disponível
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "BNBUSDT", "XRPUSDT", "LTCUSDT"]
+
 class FormValidator:
-    def __init__(self, api_key, api_secret, quantity, symbol, interval, stop_gain, stop_loss, account_mode):
+    def __init__(self, api_key, api_secret, quantity, symbol, interval, stop_gain, stop_loss, account_mode,
+                 exchange_info=None):
+        # symbols e valor mínimo vêm da exchangeInfo (cache local), sem chamada por validação
+        symbols = exchange_info.symbols(quote_asset="USDT") if exchange_info is not None else []
+        filters = exchange_info.get(symbol) if exchange_info is not None and symbol else None
+
         def validate_quantity(field, value, error):    
             if int(value) < 30:
                 error(field, f"{field} must be at least 30 USDT.")
+            elif filters is not None and filters.min_notional and float(value) < filters.min_notional:
+                error(field, f"{field} must be at least {filters.min_notional} USDT for {symbol}.")
 
         self.document = {
             "api_key": api_key,
@@ -22,7 +32,7 @@ class FormValidator:
             "api_key": {"required": True, "empty": False},
             "api_secret": {"required": True, "empty": False},
             "quantity": {"required": True, "empty": False, "check_with": validate_quantity},
-            "symbol": {"required": True, "allowed": ["BTCUSDT", "ETHUSDT", "BNBUSDT", "XRPUSDT", "LTCUSDT"],"empty": False},
+            "symbol": {"required": True, "allowed": symbols or SYMBOLS,"empty": False},
             "interval": {"required": True, "allowed": ["1m", "5m", "15m", "30m", "1h", "4h", "1d", "1w", "1M"], "empty": False},
             "stop_gain": {"required": True, "empty": False},
             "stop_loss": {"required": True, "empty": False},
@@ -0,0 +1,187 @@
+import csv
+import io
+import logging
+import os
+import time
+import zipfile
+
+import numpy as np
+
+DEFAULT_ROOT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'klines')
+
+# uma coluna por arquivo binário, na ordem dos campos de /klines
+COLUMNS = (
+    ("open_time", np.int64),
+    ("open", np.float64),
+    ("high", np.float64),
+    ("low", np.float64),
+    ("close", np.float64),
+    ("volume", np.float64),
+)
+
+# duração de cada intervalo de /klines (ms); 1M varia e fica de fora
+INTERVAL_MS = {
+    "1m": 60000, "3m": 180000, "5m": 300000, "15m": 900000, "30m": 1800000, "1h": 3600000, "2h": 7200000,
+    "4h": 14400000, "6h": 21600000, "8h": 28800000, "12h": 43200000, "1d": 86400000, "3d": 259200000,
+    "1w": 604800000,
+}
+
+class KlineStore:
+    """
+    Histórico local de klines em arquivos colunares por symbol/interval.
+
+    Cada coluna é um arquivo binário append-only lido com np.memmap, então a
+    leitura e o recorte por intervalo de tempo não copiam dados e vários
+    processos podem compartilhar as mesmas páginas. Só candles fechados são
+    gravados e sempre em ordem crescente de open_time.
+    """
+
+    def __init__(self, root=DEFAULT_ROOT):
+        self.root = root
+        self.logger = logging.getLogger(__name__)
+
+    def path(self, symbol, interval):
+        return os.path.join(self.root, symbol.upper(), interval)
+
+    def column_path(self, symbol, interval, column):
+        return os.path.join(self.path(symbol, interval), f'{column}.bin')
+
+    def count(self, symbol, interval):
+        # colunas podem ficar desiguais se um append for interrompido
+        sizes = []
+        for name, dtype in COLUMNS:
+            column_path = self.column_path(symbol, interval, name)
+            size = os.path.getsize(column_path) if os.path.exists(column_path) else 0
+            sizes.append(size // np.dtype(dtype).itemsize)
+        return min(sizes)
+
+    def load(self, symbol, interval):
+        count = self.count(symbol, interval)
+        columns = {}
+        for name, dtype in COLUMNS:
+            if count == 0:
+                columns[name] = np.zeros(0, dtype=dtype)
+            else:
+                columns[name] = np.memmap(self.column_path(symbol, interval, name), dtype=dtype, mode='r', shape=(count,))
+        return columns
+
+    def last_open_time(self, symbol, interval):
+        open_time = self.load(symbol, interval)["open_time"]
+        return int(open_time[-1]) if len(open_time) else None
+
+    def slice(self, symbol, interval, start_time=None, end_time=None):
+        # recorte [start_time, end_time) por busca binária, sem cópia
+        columns = self.load(symbol, interval)
+        open_time = columns["open_time"]
+        begin = 0 if start_time is None else int(np.searchsorted(open_time, start_time, side='left'))
+        end = len(open_time) if end_time is None else int(np.searchsorted(open_time, end_time, side='left'))
+        return {name: column[begin:end] for name, column in columns.items()}
+
+    def tail(self, symbol, interval, count):
+        # últimos candles no formato de linhas de /klines (para aquecer o bot)
+        columns = self.load(symbol, interval)
+        return np.column_stack([columns[name][-count:] for name, _ in COLUMNS])
+
+    def recent(self, market, symbol, interval, count, now=None):
+        """
+        Últimos `count` candles fechados para aquecer o bot, depois de baixar
+        de /klines a lacuna desde o último candle gravado. None quando o store
+        não chega até o candle anterior ao em aberto ou tem buracos: o bot
+        aquece então pela API.
+        """
+        step = INTERVAL_MS.get(interval)
+        if step is None or self.count(symbol, interval) == 0:
+            return None
+        try:
+            self.download(market, symbol, interval)
+        except Exception as e:
+            self.logger.warning(f'KLINES {symbol} {interval}: backfill failed, {str(e)}')
+        klines = self.tail(symbol, interval, count)
+        now = int(time.time() * 1000) if now is None else now
+        open_time = klines[:, 0].astype(np.int64)
+        if open_time[-1] < (now // step - 1) * step or np.any(np.diff(open_time) != step):
+            self.logger.warning(f'KLINES {symbol} {interval}: store is stale or has gaps, seeding from the API')
+            return None
+        return klines
+
+    def append(self, symbol, interval, klines):
+        """
+        Grava klines (linhas no formato de /klines) ignorando os que já estão
+        no store. Retorna a quantidade de candles gravados.
+        """
+        if len(klines) == 0:
+            return 0
+
+        rows = np.asarray([row[:len(COLUMNS)] for row in klines], dtype=np.float64)
+        open_time = rows[:, 0].astype(np.int64)
+        last_open_time = self.last_open_time(symbol, interval)
+        keep = np.ones(len(rows), dtype=bool) if last_open_time is None else open_time > last_open_time
+        # descarta repetidos/fora de ordem dentro do próprio lote
+        keep[1:] &= np.diff(open_time) > 0
+        rows = rows[keep]
+        open_time = open_time[keep]
+        if len(rows) == 0:
+            return 0
+
+        os.makedirs(self.path(symbol, interval), exist_ok=True)
+        self._truncate(symbol, interval)
+        for index, (name, dtype) in enumerate(COLUMNS):
+            values = open_time if name == "open_time" else rows[:, index]
+            with open(self.column_path(symbol, interval, name), 'ab') as file:
+                file.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+        return len(rows)
+
+    def download(self, market, symbol, interval, start_time=None, end_time=None, limit=1000):
+        """
+        Baixa /klines paginado a partir do último candle gravado (ou de
+        `start_time`, em ms) e grava apenas os candles já fechados.
+        """
+        last_open_time = self.last_open_time(symbol, interval)
+        cursor = last_open_time + 1 if last_open_time is not None else (start_time or 0)
+        total = 0
+        while True:
+            klines = market.get_historical_klines(symbol, interval, limit, start_time=cursor, end_time=end_time)
+            now = int(time.time() * 1000)
+            closed = [kline for kline in klines if int(kline[6]) < now]
+            total += self.append(symbol, interval, closed)
+            if len(klines) < limit or len(closed) < len(klines):
+                break
+            cursor = int(klines[-1][0]) + 1
+        return total
+
+    def import_csv(self, symbol, interval, paths):
+        """
+        Importa os dumps mensais/diários de data.binance.vision (.csv ou .zip),
+        com ou sem cabeçalho. Os arquivos devem estar em ordem cronológica.
+        """
+        total = 0
+        for path in paths:
+            total += self.append(symbol, interval, list(_read_bulk_csv(path)))
+        return total
+
+    def _truncate(self, symbol, interval):
+        count = self.count(symbol, interval)
+        for name, dtype in COLUMNS:
+            column_path = self.column_path(symbol, interval, name)
+            if os.path.exists(column_path) and os.path.getsize(column_path) != count * np.dtype(dtype).itemsize:
+                with open(column_path, 'r+b') as file:
+                    file.truncate(count * np.dtype(dtype).itemsize)
+
+def _read_bulk_csv(path):
+    if path.endswith('.zip'):
+        with zipfile.ZipFile(path) as archive:
+            for name in archive.namelist():
+                with archive.open(name) as file:
+                    yield from _parse_rows(io.TextIOWrapper(file, encoding='utf-8'))
+    else:
+        with open(path, newline='') as file:
+            yield from _parse_rows(file)
+
+def _parse_rows(file):
+    for row in csv.reader(file):
+        if not row or not row[0].strip().isdigit():
+            continue # cabeçalho
+        open_time = int(row[0])
+        if open_time > 10 ** 14:
+            open_time //= 1000 # dumps recentes do spot usam microssegundos
+        yield [open_time] + row[1:len(COLUMNS)]
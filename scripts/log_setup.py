@@ -0,0 +1,155 @@
+import atexit
+import copy
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import threading
+import time
+
+LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
+LOG_FILE = 'bot.log'
+# troca o diretório padrão dos logs (ex.: testes em um diretório temporário)
+LOG_DIR_ENV = 'BOT_LOG_DIR'
+# logger pai de todos os módulos (scripts.trade_bot, scripts.binance_gateway, ...)
+ROOT = 'scripts'
+# campos de contexto repassados ao JSON quando presentes no registro (LoggerAdapter/extra)
+CONTEXT = ('symbol', 'interval', 'stream')
+
+_lock = threading.Lock()
+_listener = None
+
+class JsonFormatter(logging.Formatter):
+    """
+    Uma linha JSON por registro: ts, level, logger, msg, os campos de
+    contexto presentes (symbol, interval, stream) e a exceção, se houver.
+    """
+
+    def format(self, record):
+        entry = {
+            "ts": round(record.created, 6),
+            "level": record.levelname,
+            "logger": record.name,
+            "thread": record.threadName,
+            "msg": record.getMessage(),
+        }
+        for field in CONTEXT:
+            value = getattr(record, field, None)
+            if value is not None:
+                entry[field] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class RotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    Rotação por tamanho (`max_bytes`) ou por tempo (`rotate_seconds`), o que
+    vier primeiro. Roda só na thread do QueueListener.
+    """
+
+    def __init__(self, filename, max_bytes=10 * 1024 * 1024, backup_count=5, rotate_seconds=86400):
+        super().__init__(filename, maxBytes=max_bytes, backupCount=backup_count, encoding='utf-8', delay=True)
+        self.rotate_seconds = rotate_seconds
+        self.rollover_at = self._next_rollover()
+
+    def _next_rollover(self):
+        return time.time() + self.rotate_seconds if self.rotate_seconds else None
+
+    def shouldRollover(self, record):
+        if self.rollover_at is not None and record.created >= self.rollover_at:
+            return True
+        return super().shouldRollover(record)
+
+    def doRollover(self):
+        super().doRollover()
+        self.rollover_at = self._next_rollover()
+
+class QueueHandler(logging.handlers.QueueHandler):
+    # fila cheia: descarta o registro em vez de bloquear a thread do websocket
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        # só resolve a mensagem; o JSON é montado na thread do listener
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def default_log_dir(environ=os.environ):
+    return environ.get(LOG_DIR_ENV) or LOG_DIR
+
+def setup_logging(log_dir=None, filename=LOG_FILE, level=logging.DEBUG, max_bytes=10 * 1024 * 1024, backup_count=5,
+                  rotate_seconds=86400, console=False, max_queue=100000):
+    """
+    Configura uma única vez o logging do pacote: as threads só entregam o
+    registro a um QueueHandler e um QueueListener em segundo plano grava o
+    JSON com rotação. Chamadas seguintes devolvem o listener já ativo, então
+    reiniciar um bot não duplica os handlers. Sem `log_dir`, o arquivo vai
+    para $BOT_LOG_DIR ou logs/; com `log_dir=False`, não há arquivo.
+    """
+    global _listener
+    with _lock:
+        if _listener is not None:
+            return _listener
+
+        if log_dir is None:
+            log_dir = default_log_dir()
+        handlers = []
+        if log_dir:
+            os.makedirs(log_dir, exist_ok=True)
+            file_handler = RotatingFileHandler(os.path.join(log_dir, filename), max_bytes=max_bytes,
+                                               backup_count=backup_count, rotate_seconds=rotate_seconds)
+            file_handler.setFormatter(JsonFormatter())
+            handlers.append(file_handler)
+        if console:
+            stream_handler = logging.StreamHandler(sys.stderr)
+            stream_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(name)s - %(message)s'))
+            handlers.append(stream_handler)
+
+        log_queue = queue.Queue(max_queue)
+        logger = logging.getLogger(ROOT)
+        logger.setLevel(level)
+        logger.addHandler(QueueHandler(log_queue))
+        # o root (ex.: basicConfig) não recebe os registros na thread de quem loga
+        logger.propagate = False
+
+        _listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+        _listener.start()
+        atexit.register(shutdown_logging)
+        return _listener
+
+def shutdown_logging():
+    # grava o que restou na fila e remove o handler (permite reconfigurar)
+    global _listener
+    with _lock:
+        if _listener is None:
+            return
+        logger = logging.getLogger(ROOT)
+        for handler in [h for h in logger.handlers if isinstance(h, QueueHandler)]:
+            logger.removeHandler(handler)
+        logger.propagate = True
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.close()
+        _listener = None
+
+def symbol_logger(name, symbol, interval=None, stream=None):
+    # logger com o contexto do bot em cada registro
+    context = {field: value for field, value in (('symbol', symbol), ('interval', interval), ('stream', stream))
+               if value is not None}
+    return logging.LoggerAdapter(logging.getLogger(name), context)
@@ -0,0 +1,62 @@
+import logging
+
+from scripts.http_session import DEFAULT_TIMEOUT
+
+class SpotMarketData:
+    """
+    Endpoints públicos de mercado (ticker, klines e streams de kline) usados
+    pelos bots para preço e histórico.
+    """
+
+    def __init__(self, session, is_test=False, timeout=DEFAULT_TIMEOUT, base_url=None, stream_url=None):
+        self.session = session
+        self.timeout = timeout
+        self.logger = logging.getLogger(__name__)
+
+        if is_test:
+            self.base_url = 'https://testnet.binance.vision/api/v3'
+            self.stream_url = 'wss://testnet.binance.vision'
+        else:
+            self.base_url = 'https://api.binance.com/api/v3'
+            self.stream_url = 'wss://stream.binance.com:9443'
+
+        if base_url is not None:
+            self.base_url = base_url
+        if stream_url is not None:
+            self.stream_url = stream_url
+
+    def ticker_url(self, symbol):
+        return f'{self.base_url}/ticker/price?symbol={symbol}'
+
+    def get_last_price(self, symbol):
+        response = self.session.get(self.ticker_url(symbol), timeout=self.timeout)
+        response.raise_for_status()  # check for HTTP errors
+        ticker = response.json()
+        if isinstance(ticker, dict) and 'price' in ticker:
+            return float(ticker['price'])
+        raise ValueError('Invalid ticker response')
+
+    def get_historical_klines(self, symbol, interval, limit, start_time=None, end_time=None):
+        # o último kline retornado é o candle em aberto
+        params = {'symbol': symbol, 'interval': interval, 'limit': limit}
+        if start_time is not None:
+            params['startTime'] = start_time
+        if end_time is not None:
+            params['endTime'] = end_time
+        response = self.session.get(f'{self.base_url}/klines', params=params, timeout=self.timeout)
+        response.raise_for_status()
+        return response.json()
+
+    def socket_url(self, stream):
+        return f'{self.stream_url}/ws/{stream}'
+
+    def combined_socket_url(self, streams):
+        # vários streams em uma única conexão; as mensagens chegam como {"stream", "data"}
+        return f'{self.stream_url}/stream?streams={"/".join(streams)}'
+
+def kline_stream(symbol, interval):
+    return f'{symbol.lower()}@kline_{interval}'
+
+def mark_price_stream(symbol, update_speed='1s'):
+    # stream de futuros (fstream); update_speed None = a cada 3s
+    return f'{symbol.lower()}@markPrice' + (f'@{update_speed}' if update_speed else '')
@@ -0,0 +1,246 @@
+import bisect
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# em segundos: de dezenas de microssegundos (indicadores) a segundos (REST lento)
+DEFAULT_BUCKETS = (0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+class _Metric:
+    kind = None
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self._children = {}
+        self._lock = threading.Lock()
+        if not self.label_names:
+            self._children[()] = self._new_child()
+
+    def labels(self, *values):
+        """
+        Série de um conjunto de labels. Guarde o retorno para não refazer a
+        busca no caminho quente.
+        """
+        values = tuple(str(value) for value in values)
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.label_names):
+                raise ValueError(f"{self.name} expects labels {self.label_names}")
+            with self._lock:
+                child = self._children.setdefault(values, self._new_child())
+        return child
+
+    def series(self):
+        return list(self._children.items())
+
+    def _new_child(self):
+        raise NotImplementedError
+
+    # atalhos para métricas sem labels
+
+    def __getattr__(self, name):
+        if name.startswith("_") or self.label_names:
+            raise AttributeError(name)
+        return getattr(self._children[()], name)
+
+class _CounterValue:
+    def __init__(self):
+        self.value = 0.0
+        self._lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self._lock:
+            self.value += amount
+
+class _GaugeValue:
+    def __init__(self):
+        self.value = 0.0
+        self.function = None
+
+    def set(self, value):
+        self.value = value
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def dec(self, amount=1):
+        self.value -= amount
+
+    def set_function(self, function):
+        # calculado só na coleta (ex.: tamanho de uma fila), sem custo no caminho quente
+        self.function = function
+
+    def get(self):
+        return self.function() if self.function is not None else self.value
+
+class _HistogramValue:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index] += 1
+            self.sum += value
+            self.count += 1
+
+    def snapshot(self):
+        with self._lock:
+            return list(self.counts), self.sum, self.count
+
+    def quantile(self, q):
+        # estimativa pelo limite superior do bucket, como o histogram_quantile do Prometheus
+        counts, _, count = self.snapshot()
+        if count == 0:
+            return None
+        rank = q * count
+        total = 0
+        for bound, bucket in zip(self.buckets + (float("inf"),), counts):
+            total += bucket
+            if total >= rank:
+                return bound
+        return float("inf")
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def _new_child(self):
+        return _CounterValue()
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def _new_child(self):
+        return _GaugeValue()
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labels)
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+class Registry:
+    """
+    Registro em memória de contadores, gauges e histogramas.
+
+    As métricas são criadas uma vez (get-or-create pelo nome) e as séries de
+    cada label ficam guardadas por quem as usa, então registrar um valor no
+    caminho quente custa uma soma sob um lock local.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._lock = threading.Lock()
+
+    def counter(self, name, documentation, labels=()):
+        return self._get(Counter, name, documentation, labels)
+
+    def gauge(self, name, documentation, labels=()):
+        return self._get(Gauge, name, documentation, labels)
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._get(Histogram, name, documentation, labels, buckets=buckets)
+
+    def get(self, name):
+        return self._metrics.get(name)
+
+    def collect(self):
+        """
+        Snapshot {nome: {labels: valor}}; histogramas como {count, sum, p50, p99}.
+        """
+        snapshot = {}
+        for name, metric in list(self._metrics.items()):
+            series = {}
+            for values, child in metric.series():
+                key = dict(zip(metric.label_names, values))
+                key = tuple(sorted(key.items()))
+                if metric.kind == "histogram":
+                    _, total, count = child.snapshot()
+                    series[key] = {"count": count, "sum": total, "p50": child.quantile(0.5), "p99": child.quantile(0.99)}
+                elif metric.kind == "gauge":
+                    series[key] = child.get()
+                else:
+                    series[key] = child.value
+            snapshot[name] = series
+        return snapshot
+
+    def render(self):
+        # formato de texto do Prometheus (text/plain; version=0.0.4)
+        lines = []
+        for name, metric in sorted(self._metrics.items()):
+            lines.append(f"# HELP {name} {metric.documentation}")
+            lines.append(f"# TYPE {name} {metric.kind}")
+            for values, child in metric.series():
+                labels = list(zip(metric.label_names, values))
+                if metric.kind == "histogram":
+                    counts, total, count = child.snapshot()
+                    cumulative = 0
+                    for bound, bucket in zip(metric.buckets + (float("inf"),), counts):
+                        cumulative += bucket
+                        le = "+Inf" if bound == float("inf") else repr(bound)
+                        lines.append(f"{name}_bucket{_labels(labels + [('le', le)])} {cumulative}")
+                    lines.append(f"{name}_sum{_labels(labels)} {total!r}")
+                    lines.append(f"{name}_count{_labels(labels)} {count}")
+                elif metric.kind == "gauge":
+                    lines.append(f"{name}{_labels(labels)} {float(child.get())!r}")
+                else:
+                    lines.append(f"{name}{_labels(labels)} {float(child.value)!r}")
+        return "\n".join(lines) + "\n"
+
+    def _get(self, cls, name, documentation, labels, **kwargs):
+        metric = self._metrics.get(name)
+        if metric is None:
+            with self._lock:
+                metric = self._metrics.get(name)
+                if metric is None:
+                    metric = self._metrics[name] = cls(name, documentation, labels, **kwargs)
+        if not isinstance(metric, cls) or metric.label_names != tuple(labels):
+            raise ValueError(f"Metric {name} already registered with another type or labels")
+        return metric
+
+def _labels(pairs):
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{key}="{_escape(value)}"' for key, value in pairs) + "}"
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+# registro padrão do processo, usado pelo gateway e pelos bots
+REGISTRY = Registry()
+
+def start_http_server(port, host="127.0.0.1", registry=REGISTRY):
+    """
+    Expõe `registry` em http://host:port/metrics (formato Prometheus) em uma
+    thread daemon. Devolve o servidor; `server.shutdown()` encerra.
+    """
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.split("?")[0] not in ("/metrics", "/"):
+                self.send_error(404)
+                return
+            body = registry.render().encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
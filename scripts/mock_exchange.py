@@ -0,0 +1,675 @@
+import asyncio
+import hashlib
+import hmac
+import json
+import secrets
+import threading
+import time
+from decimal import Decimal
+
+import numpy as np
+from aiohttp import WSMsgType, web
+
+from scripts.kline_store import INTERVAL_MS
+from scripts.rate_limiter import DEFAULT_COST, ENDPOINTS
+
+# filtros padrão de cada symbol em /fapi/v1/exchangeInfo (notional 0: sem valor mínimo nos testes)
+FILTERS = {"stepSize": "0.001", "minQty": "0.001", "maxQty": "1000", "tickSize": "0.01", "notional": "0"}
+
+class MockError(Exception):
+    def __init__(self, code, message, status=400, headers=None):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+        self.headers = headers or {}
+
+class MockExchange:
+    """
+    Corretora local (REST + websocket) com os endpoints usados pelo
+    BinanceFutures e pelo BinanceTradingBot, para testes herméticos e
+    benchmarks.
+
+    - confere API key e assinatura HMAC das chamadas assinadas e rejeita
+      (-1021) timestamps fora do `recvWindow` pelo relógio do servidor,
+      adiantado `clock_offset` ms em relação ao local (/fapi/v1/time);
+    - `latency` adiciona um atraso fixo a cada requisição REST;
+    - ordens MARKET executam no preço atual (± `slippage`) com taxa
+      `fee_rate`, atualizando posições, saldo e histórico de trades;
+    - os streams de kline reproduzem candles gravados ou sintéticos, com
+      `ticks_per_candle` atualizações por candle a cada `tick_interval`
+      segundos, e o user-data stream publica ORDER_TRADE_UPDATE e
+      ACCOUNT_UPDATE a cada execução;
+    - `<symbol>@markPrice@1s` publica o preço atual a cada `mark_interval`
+      segundos (padrão `tick_interval`).
+
+    Roda em uma thread própria: `start()` devolve a URL base, que pode ser
+    passada como `base_url` para os gateways e bots.
+    """
+
+    def __init__(self, api_key="mock-key", secret_key="mock-secret", latency=0.0, fee_rate=0.0004, slippage=0.0,
+                 leverage=20, balance=10000.0, tick_interval=0.01, ticks_per_candle=4, check_signature=True,
+                 weight_limit=2400, orders_10s=300, orders_1m=1200, mark_interval=None, clock_offset=0, host="127.0.0.1",
+                 port=0):
+        self.api_key = api_key
+        self.secret_key = secret_key
+        self.latency = latency
+        self.fee_rate = fee_rate
+        self.slippage = slippage
+        self.leverage = leverage
+        self.balance = balance
+        self.tick_interval = tick_interval
+        self.ticks_per_candle = ticks_per_candle
+        self.mark_interval = mark_interval if mark_interval is not None else tick_interval
+        self.check_signature = check_signature
+        self.clock_offset = clock_offset # ms do relógio do servidor à frente do local
+        self.weight_limit = weight_limit
+        self.order_limits = {"10s": (orders_10s, 10), "1m": (orders_1m, 60)}
+        self.host = host
+        self.port = port
+
+        self.prices = {}
+        self.klines = {} # (symbol, interval) -> array (n, 6)
+        self.cursor = {} # (symbol, interval) -> índice do candle em aberto
+        self.current = {} # (symbol, interval) -> estado parcial do candle em aberto
+        self.positions = {} # symbol -> {"amount", "entry_price"}
+        self.orders = {} # orderId -> ordem
+        self.client_orders = {} # clientOrderId -> orderId
+        self.trades = []
+        self.listen_keys = set()
+        self.filters = {} # symbol -> filtros diferentes dos FILTERS
+        self.requests = [] # (método, path) de cada chamada REST, para os testes
+        self.order_id = 0
+        self.used = {} # janela -> (início, uso), como nos headers X-MBX-*
+        self.faults = [] # (método, path, tipo) das próximas falhas simuladas
+        self.banned_until = 0.0
+
+        self._subscribers = {} # stream -> set(ws)
+        self._user_sockets = set()
+        self._feeds = {}
+        self._loop = None
+        self._thread = None
+        self._runner = None
+
+    @property
+    def base_url(self):
+        return f"http://{self.host}:{self.port}"
+
+    @property
+    def stream_url(self):
+        return f"ws://{self.host}:{self.port}"
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.stop()
+
+    # dados de mercado
+
+    def add_klines(self, symbol, interval, rows, start=None):
+        """
+        Carrega candles (linhas [open_time, open, high, low, close, volume]).
+        Os candles antes de `start` formam o histórico de /klines e os demais
+        são reproduzidos pelo stream de kline.
+        """
+        rows = np.asarray([row[:6] for row in rows], dtype=np.float64)
+        key = (symbol.upper(), interval)
+        self.klines[key] = rows
+        self.cursor[key] = len(rows) // 2 if start is None else start
+        self.current.pop(key, None)
+        index = min(self.cursor[key], len(rows) - 1)
+        self.prices[key[0]] = rows[index - 1, 4] if index > 0 else rows[index, 1]
+
+    def add_synthetic_klines(self, symbol, interval, count=1000, price=100.0, volatility=0.002, seed=None, start=None,
+                             start_time=None):
+        rng = np.random.default_rng(seed)
+        closes = price * np.exp(np.cumsum(rng.normal(0, volatility, count)))
+        opens = np.concatenate([[price], closes[:-1]])
+        spread = np.abs(rng.normal(0, volatility / 2, count)) * closes
+        highs = np.maximum(opens, closes) + spread
+        lows = np.minimum(opens, closes) - spread
+        step = INTERVAL_MS[interval]
+        if start_time is None:
+            start_time = (int(time.time() * 1000) // step - count // 2) * step
+        open_time = start_time + np.arange(count) * step
+        volume = rng.uniform(1, 100, count)
+        self.add_klines(symbol, interval, np.column_stack([open_time, opens, highs, lows, closes, volume]), start=start)
+
+    @staticmethod
+    def mark_price_message(symbol, price):
+        now = int(time.time() * 1000)
+        return {"e": "markPriceUpdate", "E": now, "s": symbol, "p": _fmt(price), "i": _fmt(price),
+                "P": _fmt(price), "r": "0.0001", "T": now}
+
+    @classmethod
+    def kline_message(cls, symbol, interval, row, closed):
+        open_time = int(row[0])
+        return {
+            "e": "kline",
+            "E": int(time.time() * 1000),
+            "s": symbol,
+            "k": {
+                "t": open_time, "T": open_time + INTERVAL_MS[interval] - 1, "s": symbol, "i": interval,
+                "f": 0, "L": 0, "o": _fmt(row[1]), "c": _fmt(row[4]), "h": _fmt(row[2]), "l": _fmt(row[3]),
+                "v": _fmt(row[5]), "n": 0, "x": closed, "q": "0", "V": "0", "Q": "0", "B": "0",
+            },
+        }
+
+    # servidor
+
+    def start(self):
+        self._loop = asyncio.new_event_loop()
+        started = threading.Event()
+        self._thread = threading.Thread(target=self._serve, args=(started,), daemon=True)
+        self._thread.start()
+        started.wait()
+        return self.base_url
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._shutdown(), self._loop).result(timeout=10)
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join(timeout=10)
+        self._loop = None
+
+    def _serve(self, started):
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._start_site())
+        started.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _start_site(self):
+        app = web.Application()
+        routes = [
+            ("POST", "/fapi/v1/order", self._new_order, True),
+            ("GET", "/fapi/v1/order", self._query_order, True),
+            ("POST", "/fapi/v1/batchOrders", self._batch_orders, True),
+            ("GET", "/fapi/v2/positionRisk", self._position_risk, True),
+            ("GET", "/fapi/v2/account", self._account, True),
+            ("GET", "/fapi/v2/balance", self._balance, True),
+            ("GET", "/fapi/v1/userTrades", self._user_trades, True),
+            ("POST", "/fapi/v1/listenKey", self._create_listen_key, False),
+            ("PUT", "/fapi/v1/listenKey", self._keepalive_listen_key, False),
+            ("DELETE", "/fapi/v1/listenKey", self._keepalive_listen_key, False),
+            ("GET", "/fapi/v1/time", self._server_time, None),
+            ("GET", "/fapi/v1/exchangeInfo", self._exchange_info, None),
+            ("GET", "/api/v3/ticker/price", self._ticker, None),
+            ("GET", "/api/v3/ticker/bookTicker", self._book_ticker, None),
+            ("GET", "/api/v3/klines", self._history, None),
+        ]
+        for method, path, handler, signed in routes:
+            app.router.add_route(method, path, self._endpoint(handler, signed))
+        app.router.add_get("/ws/{name}", self._ws_raw)
+        app.router.add_get("/stream", self._ws_combined)
+
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, self.host, self.port)
+        await site.start()
+        self.port = self._runner.addresses[0][1]
+
+    async def _shutdown(self):
+        for feed in self._feeds.values():
+            feed.cancel()
+        sockets = set(self._user_sockets)
+        for subscribers in self._subscribers.values():
+            sockets |= subscribers
+        for ws in sockets:
+            await ws.close()
+        await self._runner.cleanup()
+
+    def _endpoint(self, handler, signed):
+        # signed: True = API key + assinatura, False = só API key, None = público
+        async def handle(request):
+            if self.latency:
+                await asyncio.sleep(self.latency)
+            self.requests.append((request.method, request.path))
+            headers = {}
+            try:
+                if signed is not None:
+                    headers = self._use_limits(request.method, request.path)
+                fault = self._take_fault(request.method, request.path)
+                if fault == "unavailable":
+                    # a requisição não foi processada e a resposta nem é JSON
+                    return web.Response(status=503, text="Service Unavailable")
+                body = await request.text()
+                params = dict(request.query)
+                if body:
+                    params.update({k: v for k, v in (p.split("=", 1) for p in body.split("&") if "=" in p)})
+                if signed is not None:
+                    self._check_api_key(request)
+                if signed:
+                    self._check_signed(request.rel_url.raw_query_string, body)
+                result = handler(params)
+                if fault == "lost":
+                    # processada, mas a resposta se perde: estado de execução desconhecido
+                    raise MockError(-1007, "Timeout waiting for response from backend server. "
+                                           "Send status unknown; execution status unknown.", status=503)
+                return web.json_response(result, headers=headers)
+            except MockError as e:
+                return web.json_response({"code": e.code, "msg": e.message}, status=e.status,
+                                         headers={**headers, **e.headers})
+            except KeyError as e:
+                return web.json_response({"code": -1102, "msg": f"Mandatory parameter {e} was not sent."}, status=400,
+                                         headers=headers)
+        return handle
+
+    def fail_next(self, method, path, kind="unavailable", count=1):
+        """
+        Simula falhas nas próximas `count` chamadas de `method path`:
+        "unavailable" (503 sem processar) ou "lost" (processa e responde -1007).
+        """
+        self.faults.extend([(method, path, kind)] * count)
+
+    def _take_fault(self, method, path):
+        for index, (fault_method, fault_path, kind) in enumerate(self.faults):
+            if (fault_method, fault_path) == (method, path):
+                del self.faults[index]
+                return kind
+        return None
+
+    def ban(self, seconds):
+        # simula um banimento de IP (418) por `seconds` segundos
+        self.banned_until = time.time() + seconds
+
+    def _use_limits(self, method, path):
+        # janelas fixas (minuto/10s) como a Binance; devolve os headers de uso X-MBX-*
+        now = time.time()
+        if now < self.banned_until:
+            raise MockError(-1003, "Way too many requests; IP banned.", status=418,
+                            headers={"Retry-After": str(int(self.banned_until - now) + 1)})
+        weight, orders, _ = ENDPOINTS.get((method, path), DEFAULT_COST)
+        costs = {"USED-WEIGHT-1M": (weight, self.weight_limit, 60)}
+        if orders:
+            for name, (limit, seconds) in self.order_limits.items():
+                costs[f"ORDER-COUNT-{name.upper()}"] = (orders, limit, seconds)
+
+        usage = {}
+        for name, (amount, limit, seconds) in costs.items():
+            start = now // seconds * seconds
+            window_start, used = self.used.get(name, (start, 0))
+            used = used if window_start == start else 0
+            if used + amount > limit:
+                raise MockError(-1003, "Too many requests.", status=429,
+                                headers={"Retry-After": str(int(start + seconds - now) + 1)})
+            usage[name] = (start, used + amount)
+        self.used.update(usage)
+        return {f"X-MBX-{name}": str(used) for name, (_, used) in self.used.items()}
+
+    def _check_api_key(self, request):
+        if request.headers.get("X-MBX-APIKEY") != self.api_key:
+            raise MockError(-2015, "Invalid API-key, IP, or permissions for action.", status=401)
+
+    def _check_signed(self, query, body):
+        # como a Binance: assina-se a query concatenada ao corpo, sem o parâmetro signature
+        if not self.check_signature:
+            return
+        if "signature=" in query:
+            data, signature = _split_signature(query)
+            data += body
+        else:
+            data, signature = _split_signature(body)
+            data = query + data
+        expected = hmac.new(self.secret_key.encode("utf-8"), data.encode("utf-8"), hashlib.sha256).hexdigest()
+        if not hmac.compare_digest(expected, signature):
+            raise MockError(-1022, "Signature for this request is not valid.")
+        if "timestamp=" not in data:
+            raise MockError(-1102, "Mandatory parameter 'timestamp' was not sent.")
+        params = dict(p.split("=", 1) for p in data.split("&") if "=" in p)
+        now = self.server_time()
+        timestamp, recv_window = int(params["timestamp"]), int(params.get("recvWindow", 5000))
+        if timestamp >= now + 1000 or now - timestamp > recv_window:
+            raise MockError(-1021, "Timestamp for this request is outside of the recvWindow.")
+
+    # ordens e conta
+
+    def _new_order(self, params):
+        symbol = params["symbol"]
+        side = params["side"]
+        quantity = float(params["quantity"])
+        if symbol not in self.prices:
+            raise MockError(-1121, "Invalid symbol.")
+        if params.get("type", "MARKET") != "MARKET":
+            raise MockError(-1116, "Invalid orderType.")
+        if quantity <= 0:
+            raise MockError(-4003, "Quantity less than or equal to zero.")
+        filters = self.symbol_filters(symbol)
+        exact = Decimal(str(params["quantity"]))
+        if exact < Decimal(filters["minQty"]) or exact > Decimal(filters["maxQty"]) or exact % Decimal(filters["stepSize"]):
+            raise MockError(-1013, "Filter failure: MARKET_LOT_SIZE")
+        if str(params.get("reduceOnly", "")).lower() != "true" and Decimal(filters["notional"]) \
+                and quantity * self.prices[symbol] < float(filters["notional"]):
+            raise MockError(-4164, f"Order's notional must be no smaller than {filters['notional']}")
+        client_id = params.get("newClientOrderId") or f"mock-{self.order_id + 1}"
+        if client_id in self.client_orders:
+            raise MockError(-4116, "ClientOrderId is duplicated.")
+
+        amount = quantity if side == "BUY" else -quantity
+        position = self.positions.get(symbol, {"amount": 0.0, "entry_price": 0.0})
+        if params.get("reduceOnly") == "true" and (position["amount"] * amount >= 0 or abs(amount) > abs(position["amount"])):
+            raise MockError(-2022, "ReduceOnly Order is rejected.")
+
+        price = self.prices[symbol] * (1 + self.slippage if side == "BUY" else 1 - self.slippage)
+        self.order_id += 1
+        now = int(time.time() * 1000)
+        realized = self._fill(symbol, amount, price)
+        order = {
+            "orderId": self.order_id, "symbol": symbol, "status": "FILLED", "clientOrderId": client_id,
+            "price": "0", "avgPrice": _fmt(price), "origQty": params["quantity"], "executedQty": params["quantity"],
+            "cumQuote": _fmt(quantity * price), "timeInForce": "GTC", "type": "MARKET",
+            "reduceOnly": params.get("reduceOnly") == "true", "side": side, "positionSide": "BOTH",
+            "updateTime": now,
+        }
+        self.orders[self.order_id] = order
+        self.client_orders[client_id] = self.order_id
+        self.trades.append({
+            "id": len(self.trades) + 1, "orderId": self.order_id, "symbol": symbol, "side": side,
+            "price": _fmt(price), "qty": params["quantity"], "quoteQty": _fmt(quantity * price),
+            "realizedPnl": _fmt(realized), "commission": _fmt(quantity * price * self.fee_rate),
+            "commissionAsset": "USDT", "positionSide": "BOTH", "buyer": side == "BUY", "maker": False, "time": now,
+        })
+        self._publish_fill(order, price, realized, now)
+
+        # como a Binance, a resposta de uma ordem MARKET é o ACK (status NEW)
+        return {**order, "status": "NEW", "executedQty": "0", "cumQuote": "0", "avgPrice": "0.00"}
+
+    def _batch_orders(self, params):
+        # até 5 ordens; cada uma responde com a ordem ou com o seu próprio erro
+        orders = json.loads(params["batchOrders"])
+        if not 1 <= len(orders) <= 5:
+            raise MockError(-1130, "Data sent for parameter 'batchOrders' is not valid.")
+        results = []
+        for order in orders:
+            try:
+                results.append(self._new_order(order))
+            except MockError as e:
+                results.append({"code": e.code, "msg": e.message})
+        return results
+
+    def _fill(self, symbol, amount, price):
+        position = self.positions.setdefault(symbol, {"amount": 0.0, "entry_price": 0.0})
+        current = position["amount"]
+        realized = 0.0
+        if current == 0 or current * amount > 0:
+            total = current + amount
+            position["entry_price"] = (current * position["entry_price"] + amount * price) / total
+            position["amount"] = total
+        else:
+            closing = min(abs(amount), abs(current))
+            realized = closing * (price - position["entry_price"]) * (1 if current > 0 else -1)
+            total = round(current + amount, 12)
+            if total == 0:
+                position["entry_price"] = 0.0
+            elif total * current < 0:
+                position["entry_price"] = price
+            position["amount"] = total
+        self.balance += realized - abs(amount) * price * self.fee_rate
+        return realized
+
+    def _query_order(self, params):
+        if "orderId" in params:
+            order = self.orders.get(int(params["orderId"]))
+        else:
+            order = self.orders.get(self.client_orders.get(params["origClientOrderId"]))
+        if order is None or order["symbol"] != params["symbol"]:
+            raise MockError(-2013, "Order does not exist.")
+        return order
+
+    def _position_list(self, symbol=None):
+        positions = []
+        for name, price in self.prices.items():
+            if symbol is not None and name != symbol:
+                continue
+            position = self.positions.get(name, {"amount": 0.0, "entry_price": 0.0})
+            unrealized = position["amount"] * (price - position["entry_price"])
+            positions.append({
+                "symbol": name, "positionAmt": _fmt(position["amount"]), "entryPrice": _fmt(position["entry_price"]),
+                "markPrice": _fmt(price), "unRealizedProfit": _fmt(unrealized), "liquidationPrice": "0",
+                "leverage": str(self.leverage), "marginType": "cross", "isolatedMargin": "0",
+                "positionSide": "BOTH", "notional": _fmt(position["amount"] * price),
+                "initialMargin": _fmt(abs(position["amount"]) * price / self.leverage), "updateTime": 0,
+            })
+        return positions
+
+    def _position_risk(self, params):
+        return self._position_list(params.get("symbol"))
+
+    def _account(self, params):
+        positions = self._position_list()
+        margin = sum(float(p["initialMargin"]) for p in positions)
+        unrealized = sum(float(p["unRealizedProfit"]) for p in positions)
+        return {
+            "totalInitialMargin": _fmt(margin), "totalWalletBalance": _fmt(self.balance),
+            "totalUnrealizedProfit": _fmt(unrealized), "availableBalance": _fmt(self.balance - margin),
+            "assets": [{"asset": "USDT", "walletBalance": _fmt(self.balance), "crossWalletBalance": _fmt(self.balance),
+                        "unrealizedProfit": _fmt(unrealized), "initialMargin": _fmt(margin)}],
+            "positions": [{k: p[k] for k in ("symbol", "initialMargin", "leverage", "positionSide", "positionAmt",
+                                             "entryPrice", "unRealizedProfit")} for p in positions],
+        }
+
+    def _balance(self, params):
+        return [{"accountAlias": "mock", "asset": "USDT", "balance": _fmt(self.balance),
+                 "crossWalletBalance": _fmt(self.balance), "crossUnPnl": "0",
+                 "availableBalance": _fmt(self.balance), "maxWithdrawAmount": _fmt(self.balance), "updateTime": 0}]
+
+    def _user_trades(self, params):
+        symbol = params["symbol"]
+        limit = min(int(params.get("limit", 500)), 1000)
+        start_time = int(params["startTime"]) if "startTime" in params else None
+        end_time = int(params["endTime"]) if "endTime" in params else None
+        if start_time is not None and end_time is not None and end_time - start_time > 7 * 86400000:
+            raise MockError(-1127, "More than 7 days between startTime and endTime.")
+        trades = [t for t in self.trades if t["symbol"] == symbol]
+        if "fromId" in params:
+            trades = [t for t in trades if t["id"] >= int(params["fromId"])]
+        if start_time is not None:
+            trades = [t for t in trades if t["time"] >= start_time]
+        if end_time is not None:
+            trades = [t for t in trades if t["time"] <= end_time]
+        return trades[:limit]
+
+    def server_time(self):
+        return int(time.time() * 1000) + self.clock_offset
+
+    def _server_time(self, params):
+        return {"serverTime": self.server_time()}
+
+    def symbol_filters(self, symbol):
+        return {**FILTERS, **self.filters.get(symbol, {})}
+
+    def _exchange_info(self, params):
+        symbols = []
+        for symbol in self.prices:
+            filters = self.symbol_filters(symbol)
+            lot = {"stepSize": filters["stepSize"], "minQty": filters["minQty"], "maxQty": filters["maxQty"]}
+            symbols.append({
+                "symbol": symbol, "status": "TRADING", "baseAsset": symbol[:-4] if symbol.endswith("USDT") else symbol[:3],
+                "quoteAsset": "USDT" if symbol.endswith("USDT") else symbol[3:],
+                "filters": [
+                    {"filterType": "PRICE_FILTER", "tickSize": filters["tickSize"]},
+                    {"filterType": "LOT_SIZE", **lot},
+                    {"filterType": "MARKET_LOT_SIZE", **lot},
+                    {"filterType": "MIN_NOTIONAL", "notional": filters["notional"]},
+                ],
+            })
+        return {"timezone": "UTC", "serverTime": self.server_time(), "symbols": symbols}
+
+    def _create_listen_key(self, params):
+        listen_key = secrets.token_hex(32)
+        self.listen_keys.add(listen_key)
+        return {"listenKey": listen_key}
+
+    def _keepalive_listen_key(self, params):
+        return {}
+
+    def _ticker(self, params):
+        return self._tickers(params, lambda symbol, price: {"symbol": symbol, "price": _fmt(price)})
+
+    def _book_ticker(self, params):
+        # livro com spread de 1 tick em volta do preço atual
+        return self._tickers(params, lambda symbol, price: {
+            "symbol": symbol, "bidPrice": _fmt(price - 0.01), "bidQty": "1", "askPrice": _fmt(price + 0.01), "askQty": "1"})
+
+    def _tickers(self, params, item):
+        # symbol=, symbols=["A","B"] ou todos, como a API
+        if "symbol" in params:
+            symbols = [params["symbol"]]
+        elif "symbols" in params:
+            symbols = json.loads(params["symbols"])
+        else:
+            return [item(symbol, price) for symbol, price in self.prices.items()]
+        if any(symbol not in self.prices for symbol in symbols):
+            raise MockError(-1121, "Invalid symbol.")
+        items = [item(symbol, self.prices[symbol]) for symbol in symbols]
+        return items[0] if "symbol" in params else items
+
+    def _history(self, params):
+        key = (params["symbol"], params["interval"])
+        if key not in self.klines:
+            raise MockError(-1121, "Invalid symbol.")
+        rows = self.klines[key]
+        cursor = self.cursor[key]
+        history = [_kline_row(row, key[1]) for row in rows[:cursor]]
+        if cursor < len(rows):
+            # candle em aberto: o estado parcial já publicado no stream
+            history.append(_kline_row(self.current.get(key, _opening(rows[cursor])), key[1]))
+        if "startTime" in params:
+            history = [row for row in history if row[0] >= int(params["startTime"])]
+        if "endTime" in params:
+            history = [row for row in history if row[0] <= int(params["endTime"])]
+        limit = int(params.get("limit", 500))
+        if "startTime" in params:
+            return history[:limit]
+        return history[-limit:]
+
+    # websockets
+
+    async def _ws_raw(self, request):
+        name = request.match_info["name"]
+        if name in self.listen_keys:
+            return await self._serve_socket(request, user=True)
+        return await self._serve_socket(request, streams=[name], combined=False)
+
+    async def _ws_combined(self, request):
+        streams = [s for s in request.query.get("streams", "").split("/") if s]
+        return await self._serve_socket(request, streams=streams, combined=True)
+
+    async def _serve_socket(self, request, streams=(), combined=False, user=False):
+        ws = web.WebSocketResponse(heartbeat=30)
+        await ws.prepare(request)
+        ws.combined = combined
+        if user:
+            self._user_sockets.add(ws)
+        for stream in streams:
+            self._subscribers.setdefault(stream, set()).add(ws)
+            self._start_feed(stream)
+        try:
+            async for message in ws:
+                if message.type == WSMsgType.ERROR:
+                    break
+        finally:
+            self._user_sockets.discard(ws)
+            for stream in streams:
+                self._subscribers.get(stream, set()).discard(ws)
+        return ws
+
+    def _start_feed(self, stream):
+        if stream in self._feeds:
+            return
+        if "@markPrice" in stream:
+            symbol = stream.partition("@")[0].upper()
+            self._feeds[stream] = asyncio.ensure_future(self._mark_feed(stream, symbol))
+            return
+        symbol, _, interval = stream.partition("@kline_")
+        key = (symbol.upper(), interval)
+        if key in self.klines:
+            self._feeds[stream] = asyncio.ensure_future(self._feed(stream, key))
+
+    async def _feed(self, stream, key):
+        symbol, interval = key
+        rows = self.klines[key]
+        while self.cursor[key] < len(rows):
+            row = rows[self.cursor[key]]
+            for tick in range(1, self.ticks_per_candle + 1):
+                closed = tick == self.ticks_per_candle
+                partial = row if closed else _partial(row, tick / self.ticks_per_candle)
+                self.current[key] = partial
+                self.prices[symbol] = float(partial[4])
+                await self._broadcast(stream, self.kline_message(symbol, interval, partial, closed))
+                await asyncio.sleep(self.tick_interval)
+            self.cursor[key] += 1
+            self.current.pop(key, None)
+
+    async def _mark_feed(self, stream, symbol):
+        # markPrice@1s a cada `mark_interval`, com o preço atual do symbol
+        while self._subscribers.get(stream):
+            if symbol in self.prices:
+                await self._broadcast(stream, self.mark_price_message(symbol, self.prices[symbol]))
+            await asyncio.sleep(self.mark_interval)
+        self._feeds.pop(stream, None)
+
+    async def _broadcast(self, stream, data):
+        for ws in list(self._subscribers.get(stream, ())):
+            payload = {"stream": stream, "data": data} if ws.combined else data
+            try:
+                await ws.send_str(json.dumps(payload))
+            except ConnectionResetError:
+                self._subscribers[stream].discard(ws)
+
+    def _publish_fill(self, order, price, realized, now):
+        if not self._user_sockets:
+            return
+        position = self.positions[order["symbol"]]
+        events = [
+            {"e": "ORDER_TRADE_UPDATE", "E": now, "T": now, "o": {
+                "s": order["symbol"], "c": order["clientOrderId"], "S": order["side"], "o": "MARKET",
+                "q": order["origQty"], "ap": _fmt(price), "x": "TRADE", "X": "FILLED", "i": order["orderId"],
+                "l": order["origQty"], "z": order["executedQty"], "L": _fmt(price), "rp": _fmt(realized),
+                "n": _fmt(float(order["origQty"]) * price * self.fee_rate), "N": "USDT",
+                "R": order["reduceOnly"], "ps": "BOTH", "T": now}},
+            {"e": "ACCOUNT_UPDATE", "E": now, "T": now, "a": {
+                "m": "ORDER",
+                "B": [{"a": "USDT", "wb": _fmt(self.balance), "cw": _fmt(self.balance), "bc": "0"}],
+                "P": [{"s": order["symbol"], "pa": _fmt(position["amount"]), "ep": _fmt(position["entry_price"]),
+                       "cr": "0", "up": "0", "mt": "cross", "iw": "0", "ps": "BOTH"}]}},
+        ]
+        for event in events:
+            for ws in list(self._user_sockets):
+                asyncio.ensure_future(ws.send_str(json.dumps(event)))
+
+def replay_messages(symbol, interval, rows, ticks_per_candle=4):
+    """
+    Mensagens do stream `<symbol>@kline_<interval>` para os candles `rows`,
+    com `ticks_per_candle` atualizações por candle (a última com x=True).
+    """
+    for row in rows:
+        for tick in range(1, ticks_per_candle + 1):
+            closed = tick == ticks_per_candle
+            partial = row if closed else _partial(row, tick / ticks_per_candle)
+            yield MockExchange.kline_message(symbol, interval, partial, closed)
+
+def _split_signature(params):
+    if "&signature=" not in params:
+        raise MockError(-1102, "Mandatory parameter 'signature' was not sent.")
+    data, signature = params.rsplit("&signature=", 1)
+    return data, signature
+
+def _fmt(value):
+    return f"{float(value):.8f}".rstrip("0").rstrip(".") if value != 0 else "0"
+
+def _opening(row):
+    return np.array([row[0], row[1], row[1], row[1], row[1], 0.0])
+
+def _partial(row, fraction):
+    # estado intermediário do candle: fechamento interpolado da abertura ao fechamento
+    close = row[1] + (row[4] - row[1]) * fraction
+    return np.array([row[0], row[1], max(row[1], close), min(row[1], close), close, row[5] * fraction])
+
+def _kline_row(row, interval):
+    open_time = int(row[0])
+    return [open_time, _fmt(row[1]), _fmt(row[2]), _fmt(row[3]), _fmt(row[4]), _fmt(row[5]),
+            open_time + INTERVAL_MS[interval] - 1, "0", 0, "0", "0", "0"]
@@ -0,0 +1,176 @@
+import json
+import logging
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import websocket
+
+from scripts.binance_gateway import BinanceFutures
+from scripts.market_data import SpotMarketData, kline_stream, mark_price_stream
+from scripts.metrics import start_http_server
+from scripts.order_executor import OrderExecutor
+from scripts.pipeline import CONFLATE, INLINE, MODES, KlinePipeline
+from scripts.strategy import SymbolStrategy
+from scripts.trade_bot import MESSAGE_SECONDS, MESSAGES, QUEUE_DEPTH, WS_LAG_SECONDS
+
+class MultiSymbolBot:
+    """
+    Roda vários symbols/intervals em um único processo.
+
+    Todos os `<symbol>@kline_<interval>` são assinados em uma só conexão
+    `/stream?streams=` e cada mensagem é encaminhada para o SymbolStrategy do
+    seu stream. Gateway, sessão HTTP, user-data stream e fila de mensagens são
+    compartilhados entre os symbols.
+
+    `strategies` é uma lista de dicts com os argumentos do SymbolStrategy,
+    por exemplo: {"symbol": "BTCUSDT", "interval": "1m", "volume": 0.001,
+    "stop_gain": 5, "stop_loss": 5, "cadence": "close"}.
+    """
+
+    def __init__(self, api_key, api_secret, strategies, is_test=False, buffer_size=500, pool_size=10, store=None, base_url=None, stream_url=None, metrics_port=None, mode=CONFLATE, mark_price=True):
+        self.is_test = is_test
+        self.is_running = False
+        self.buffer_size = buffer_size
+        self.store = store
+        self.binance = BinanceFutures(api_key, api_secret, is_test=self.is_test, pool_size=pool_size,
+                                      base_url=base_url, stream_url=stream_url)
+        self.market = SpotMarketData(self.binance.session, is_test=self.is_test, timeout=self.binance.timeout,
+                                     base_url=f'{base_url}/api/v3' if base_url else None, stream_url=stream_url)
+        self.msg_queue = queue.Queue()
+        self.logger = logging.getLogger(__name__)
+        # um executor de ordens compartilhado pelos symbols
+        self.executor = OrderExecutor(self.binance, workers=min(pool_size, 4))
+
+        # stream -> estratégia
+        self.strategies = {}
+        for config in strategies:
+            strategy = SymbolStrategy(self.binance, msg_queue=self.msg_queue, buffer_size=buffer_size, tag_messages=True,
+                                      executor=self.executor, history=self.market.get_historical_klines, **config)
+            self.strategies[kline_stream(strategy.symbol, strategy.interval)] = strategy
+
+        # aquecimento de todos os symbols em paralelo, dentro do pool da sessão
+        with ThreadPoolExecutor(max_workers=pool_size) as executor:
+            list(executor.map(self.seed, self.strategies.values()))
+
+        # um slot por stream: um symbol lento não atrasa os fechamentos dos outros
+        if mode not in MODES:
+            raise ValueError(f"Invalid mode: {mode}")
+        self.pipeline = None
+        if mode != INLINE:
+            handlers = {stream: lambda kline, stream=stream: self.process(stream, kline) for stream in self.strategies}
+            self.pipeline = KlinePipeline(handlers, mode=mode)
+
+        self.socket_url = self.market.combined_socket_url(list(self.strategies))
+        # conexão aberta = streams assinados (a assinatura vai na própria URL)
+        self.subscribed = threading.Event()
+        self.ws = websocket.WebSocketApp(self.socket_url, on_message=self.on_message, on_open=self.on_open)
+
+        # mark price de todos os symbols em uma conexão de futuros; symbol -> estratégias
+        self.mark_ws = None
+        self.by_symbol = {}
+        for strategy in self.strategies.values():
+            self.by_symbol.setdefault(strategy.symbol, []).append(strategy)
+        if mark_price:
+            streams = "/".join(mark_price_stream(symbol) for symbol in self.by_symbol)
+            self.mark_ws = websocket.WebSocketApp(f'{self.binance.stream_url}/stream?streams={streams}',
+                                                  on_message=self.on_mark_message)
+
+        # séries de métricas por stream: (lag, tempo de processamento, mensagens)
+        self._metrics = {stream: (WS_LAG_SECONDS.labels(stream), MESSAGE_SECONDS.labels(stream), MESSAGES.labels(stream))
+                         for stream in self.strategies}
+        QUEUE_DEPTH.labels('multi').set_function(self.msg_queue.qsize)
+        self.metrics_server = start_http_server(metrics_port) if metrics_port is not None else None
+
+    def seed(self, strategy):
+        # aquece pelo histórico local quando disponível e em dia (só a lacuna até agora vem da API)
+        klines = None
+        if self.store is not None:
+            klines = self.store.recent(self.market, strategy.symbol, strategy.interval, self.buffer_size)
+        if klines is not None:
+            strategy.seed(klines, float(klines[-1][4]), closed=True)
+        else:
+            # +1: o último de /klines é o candle em aberto, fora do seed
+            klines = self.market.get_historical_klines(strategy.symbol, strategy.interval, self.buffer_size + 1)
+            strategy.seed(klines, self.market.get_last_price(strategy.symbol))
+        strategy.apply_filters(self.binance.symbol_filters(strategy.symbol))
+
+    def ws_message(self):
+        return self.msg_queue.get()
+
+    def on_open(self, ws):
+        self.subscribed.set()
+
+    def on_message(self, ws, message):
+        if not self.is_running:
+            self.is_running = True
+
+        received = time.time()
+        payload = json.loads(message)
+        stream = payload.get('stream')
+        if stream not in self.strategies:
+            return
+        ws_lag, _, messages = self._metrics[stream]
+        messages.inc()
+        if 'E' in payload['data']:
+            ws_lag.observe(received - payload['data']['E'] / 1000)
+
+        if self.pipeline is None:
+            self.process(stream, payload['data']['k'])
+        else:
+            self.pipeline.submit(stream, payload['data']['k'])
+
+    def on_mark_message(self, ws, message):
+        event = json.loads(message).get('data', {})
+        for strategy in self.by_symbol.get(event.get('s'), ()):
+            try:
+                strategy.on_mark_price(event)
+            except Exception as e:
+                self.logger.error(f'MARK PRICE {strategy.symbol}: {str(e)}', extra={'symbol': strategy.symbol})
+
+    def process(self, stream, kline):
+        strategy = self.strategies[stream]
+        start = time.perf_counter()
+        # um erro em um symbol não derruba os outros
+        try:
+            strategy.on_kline(kline)
+            self._metrics[stream][1].observe(time.perf_counter() - start)
+        except Exception as e:
+            self.logger.error(f'MESSAGE {strategy.symbol}: {str(e)}', extra={'symbol': strategy.symbol})
+            strategy.notify(f"Error: {str(e)}")
+
+    def flatten_all(self):
+        # emergência: zera as posições de todos os symbols do bot em poucas requisições
+        symbols = {strategy.symbol for strategy in self.strategies.values()}
+        results = self.binance.flatten_all(symbols)
+        failed = [result for result in results if "orderId" not in result]
+        self.msg_queue.put(f"Flattened {len(results) - len(failed)} positions"
+                           + (f", {len(failed)} failed" if failed else ""))
+        return results
+
+    def run(self):
+        try:
+            self.binance.start_user_stream()
+            if self.pipeline is not None:
+                self.pipeline.start()
+            if self.mark_ws is not None:
+                threading.Thread(target=self.mark_ws.run_forever, kwargs={"reconnect": 5}, daemon=True).start()
+            self.ws.run_forever()
+        except Exception as e:
+            self.logger.error(f'RUN: {str(e)}')
+            self.msg_queue.put(f"Error: {str(e)}")
+
+    def stop(self):
+        try:
+            self.ws.close()
+            if self.mark_ws is not None:
+                self.mark_ws.close()
+            if self.pipeline is not None:
+                self.pipeline.stop()
+            self.executor.shutdown(wait=False)
+            self.binance.stop_user_stream()
+            if self.metrics_server is not None:
+                self.metrics_server.shutdown()
+        except Exception as e:
+            self.msg_queue.put(f"Error: {str(e)}")
@@ -0,0 +1,152 @@
+import argparse
+import csv
+import itertools
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+from scripts.backtest import rsi_series, run_backtest
+from scripts.kline_store import DEFAULT_ROOT, KlineStore
+
+# parâmetros da estratégia que o backtest sabe avaliar
+PARAMETERS = ("rsi_period", "rsi_oversold", "rsi_overbought", "atr_period", "stop_gain", "stop_loss")
+INTEGER_PARAMETERS = ("rsi_period", "atr_period")
+
+# estado de cada processo do pool: o store é aberto uma vez por processo e as
+# colunas são memmaps do mesmo arquivo, compartilhadas pelo cache de páginas
+_store = None
+_columns = {}
+_rsi = {}
+
+def grid(space):
+    """
+    Todas as combinações de `space` ({parâmetro: [valores]}).
+    """
+    _check(space)
+    ranges = [name for name, values in space.items() if isinstance(values, tuple)]
+    if ranges:
+        raise ValueError(f"Ranges need random_samples, not grid: {ranges}")
+    names = list(space)
+    return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+def random_samples(space, count, seed=None):
+    """
+    `count` amostras aleatórias de `space`. Cada parâmetro é uma lista de
+    valores (sorteio entre eles) ou uma tupla (mínimo, máximo).
+    """
+    _check(space)
+    rng = random.Random(seed)
+    samples = []
+    for _ in range(count):
+        sample = {}
+        for name, values in space.items():
+            if isinstance(values, tuple):
+                low, high = values
+                sample[name] = rng.randint(low, high) if name in INTEGER_PARAMETERS else rng.uniform(low, high)
+            else:
+                sample[name] = rng.choice(values)
+        samples.append(sample)
+    return samples
+
+def sweep(symbols, intervals, param_sets, store_root=DEFAULT_ROOT, start_time=None, end_time=None,
+          workers=None, fixed=None, sort_by="pnl", output=None):
+    """
+    Avalia cada conjunto de parâmetros em cada symbol/interval em um pool de
+    processos e devolve os resultados ordenados por `sort_by` (decrescente).
+
+    Os candles nunca são serializados para os processos: cada worker recebe
+    só (symbol, interval, parâmetros) e lê as colunas do KlineStore via mmap.
+    """
+    fixed = fixed or {}
+    # agrupados por período do RSI, para que cada lote reaproveite a mesma série
+    param_sets = sorted(param_sets, key=lambda params: params.get("rsi_period", 14))
+    tasks = [(symbol, interval, start_time, end_time, {**fixed, **params})
+             for symbol in symbols for interval in intervals for params in param_sets]
+    workers = workers or os.cpu_count()
+    # lotes grandes: o custo de IPC fica pequeno perto do backtest
+    chunksize = max(1, len(tasks) // (workers * 4))
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(store_root,)) as executor:
+        results = list(executor.map(_evaluate, tasks, chunksize=chunksize))
+
+    results.sort(key=lambda row: row[sort_by], reverse=True)
+    if output is not None:
+        write_results(results, output)
+    return results
+
+def write_results(results, output):
+    if not results:
+        return
+    fields = ["rank"] + [name for name in results[0]]
+    with open(output, "w", newline="") as file:
+        writer = csv.DictWriter(file, fieldnames=fields)
+        writer.writeheader()
+        for rank, row in enumerate(results, start=1):
+            writer.writerow({"rank": rank, **row})
+
+def _check(space):
+    unknown = set(space) - set(PARAMETERS)
+    if unknown:
+        raise ValueError(f"Unknown strategy parameters: {sorted(unknown)}")
+
+def _init_worker(store_root):
+    global _store, _columns, _rsi
+    _store = KlineStore(store_root)
+    _columns = {}
+    _rsi = {}
+
+def _evaluate(task):
+    symbol, interval, start_time, end_time, params = task
+    key = (symbol, interval, start_time, end_time)
+    if key not in _columns:
+        _columns[key] = _store.slice(symbol, interval, start_time, end_time)
+
+    # o RSI só depende do período: calculado uma vez por processo
+    close = _columns[key]["close"]
+    rsi_period = params.get("rsi_period", 14)
+    if (key, rsi_period) not in _rsi:
+        _rsi[(key, rsi_period)] = rsi_series(close, rsi_period)
+
+    summary = run_backtest(close, rsi=_rsi[(key, rsi_period)], **params).summary()
+    return {"symbol": symbol, "interval": interval, **params, **summary}
+
+def _parse_space(items):
+    # "rsi_period=7,14,21" -> {"rsi_period": [7, 14, 21]}; "stop_gain=2:20" -> faixa para amostragem
+    space = {}
+    for item in items:
+        name, values = item.split("=", 1)
+        cast = int if name in INTEGER_PARAMETERS else float
+        if ":" in values:
+            low, high = values.split(":")
+            space[name] = (cast(low), cast(high))
+        else:
+            space[name] = [cast(value) for value in values.split(",")]
+    return space
+
+def main():
+    parser = argparse.ArgumentParser(description="Parameter sweep of the RSI/ATR strategy over the local kline store")
+    parser.add_argument("--symbols", nargs="+", required=True)
+    parser.add_argument("--intervals", nargs="+", default=["1m"])
+    parser.add_argument("--space", nargs="+", required=True, help="name=v1,v2,... (grid) or name=low:high (random)")
+    parser.add_argument("--samples", type=int, default=0, help="random samples instead of the full grid")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--leverage", type=float, default=20)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--store", default=DEFAULT_ROOT)
+    parser.add_argument("--sort-by", default="pnl")
+    parser.add_argument("--output", default="sweep_results.csv")
+    args = parser.parse_args()
+
+    space = _parse_space(args.space)
+    if args.samples:
+        param_sets = random_samples(space, args.samples, seed=args.seed)
+    else:
+        param_sets = grid(space)
+
+    results = sweep(args.symbols, args.intervals, param_sets, store_root=args.store, workers=args.workers,
+                    fixed={"leverage": args.leverage}, sort_by=args.sort_by, output=args.output)
+    for rank, row in enumerate(results[:10], start=1):
+        print(rank, row)
+
+if __name__ == "__main__":
+    main()
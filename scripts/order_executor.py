@@ -0,0 +1,156 @@
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from scripts.binance_gateway import TRANSIENT_CODES, OrderError, new_client_order_id
+from scripts.metrics import REGISTRY
+
+PENDING = 'PENDING' # enviada, sem resposta ainda
+ACKED = 'NEW' # aceita pela corretora
+FILLED = 'FILLED'
+REJECTED = 'REJECTED'
+FAILED = 'FAILED' # sem confirmação depois de todas as tentativas
+
+ORDERS = REGISTRY.counter('order_executor_orders_total', 'Orders by final submit result', ('result',))
+ACK_SECONDS = REGISTRY.histogram('order_executor_ack_seconds', 'Submit to acknowledgement, including retries')
+FILL_SECONDS = REGISTRY.histogram('order_executor_fill_seconds', 'Submit to fill reported by the user-data stream')
+
+class OrderTicket:
+    """
+    Estado de uma ordem enviada pelo OrderExecutor, identificada pelo
+    `client_order_id` gerado no envio (ou escolhido por quem enviou).
+    """
+
+    def __init__(self, symbol, side, quantity, reduce_only=False, client_order_id=None):
+        self.client_order_id = client_order_id or new_client_order_id()
+        self.symbol = symbol
+        self.side = side
+        self.quantity = quantity
+        self.reduce_only = reduce_only
+        self.status = PENDING
+        self.order_id = None
+        self.response = None
+        self.error = None
+        self.filled_qty = 0.0
+        self.avg_price = None
+        self.created = time.monotonic()
+        self.acked_at = None
+        self.filled_at = None
+        self.filled = threading.Event()
+
+    @property
+    def ok(self):
+        return self.status in (ACKED, FILLED)
+
+    def params(self):
+        params = {"symbol": self.symbol, "side": self.side, "type": "MARKET", "quantity": self.quantity,
+                  "newClientOrderId": self.client_order_id}
+        if self.reduce_only:
+            params["reduceOnly"] = "true"
+        return params
+
+    def wait_filled(self, timeout=None):
+        return self.filled.wait(timeout)
+
+class OrderExecutor:
+    """
+    Envia ordens fora da thread da estratégia.
+
+    `submit` devolve na hora um Future que se resolve com o OrderTicket
+    quando a corretora aceita ou rejeita a ordem; falhas transitórias são
+    repetidas por `BinanceFutures.place_order` sem duplicar a ordem. As
+    execuções chegam pelo user-data stream (ORDER_TRADE_UPDATE) e marcam o
+    ticket como FILLED. Nenhum erro de ordem encerra o processo.
+    """
+
+    def __init__(self, binance, workers=2, retries=2, backoff=0.2, max_history=1000):
+        self.binance = binance
+        self.max_history = max_history
+        self.retries = retries
+        self.backoff = backoff
+        self.tickets = {} # clientOrderId -> OrderTicket
+        self.logger = logging.getLogger(__name__)
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='orders')
+        binance.account.add_listener(self.on_order_update)
+
+    def submit(self, symbol, side, quantity, reduce_only=False, callback=None, client_order_id=None):
+        """
+        `callback(ticket)` é chamado na thread do executor depois do ack
+        ou da rejeição.
+        """
+        ticket = OrderTicket(symbol, side, quantity, reduce_only, client_order_id)
+        with self._lock:
+            self.tickets[ticket.client_order_id] = ticket
+            self._prune()
+        future = self._pool.submit(self._execute, ticket)
+        if callback is not None:
+            future.add_done_callback(lambda done: self._run_callback(callback, done))
+        return future
+
+    def open_tickets(self, symbol=None):
+        # ordens ainda sem resposta da corretora
+        with self._lock:
+            return [t for t in self.tickets.values() if t.status == PENDING and (symbol is None or t.symbol == symbol)]
+
+    def on_order_update(self, order):
+        # evento ORDER_TRADE_UPDATE do espelho da conta
+        ticket = self.tickets.get(order["clientOrderId"])
+        if ticket is None:
+            return
+        ticket.filled_qty = order["filledQty"]
+        if order["avgPrice"]:
+            ticket.avg_price = order["avgPrice"]
+        if order["status"] == FILLED and not ticket.filled.is_set():
+            ticket.status = FILLED
+            ticket.filled_at = time.monotonic()
+            FILL_SECONDS.observe(ticket.filled_at - ticket.created)
+            ticket.filled.set()
+
+    def shutdown(self, wait=True):
+        self._pool.shutdown(wait=wait)
+
+    def _prune(self):
+        # descarta os tickets concluídos mais antigos (o dict mantém a ordem de envio)
+        excess = len(self.tickets) - self.max_history
+        for client_order_id in list(self.tickets):
+            if excess <= 0:
+                break
+            if self.tickets[client_order_id].status != PENDING:
+                del self.tickets[client_order_id]
+                excess -= 1
+
+    def _execute(self, ticket):
+        try:
+            response = self.binance.place_order(ticket.params(), retries=self.retries, backoff=self.backoff)
+        except OrderError as e:
+            ticket.error = e
+            ticket.status = REJECTED if e.code is not None and e.code not in TRANSIENT_CODES else FAILED
+            self.logger.error(f'ORDER {ticket.client_order_id}: {str(e)}')
+            ORDERS.labels(ticket.status).inc()
+            return ticket
+        except Exception as e:
+            ticket.error = e
+            ticket.status = FAILED
+            self.logger.error(f'ORDER {ticket.client_order_id}: {str(e)}')
+            ORDERS.labels(ticket.status).inc()
+            return ticket
+
+        ticket.response = response
+        ticket.order_id = response.get("orderId")
+        ticket.acked_at = time.monotonic()
+        ACK_SECONDS.observe(ticket.acked_at - ticket.created)
+        # a consulta de uma ordem repetida pode já voltar executada
+        if ticket.status == PENDING:
+            ticket.status = FILLED if response.get("status") == FILLED else ACKED
+        if ticket.status == FILLED:
+            ticket.filled.set()
+        ORDERS.labels(ACKED).inc()
+        return ticket
+
+    def _run_callback(self, callback, future):
+        try:
+            callback(future.result())
+        except Exception as e:
+            self.logger.error(f'ORDER CALLBACK: {str(e)}')
@@ -0,0 +1,179 @@
+import collections
+import logging
+import threading
+import time
+
+from scripts.metrics import REGISTRY
+
+CONFLATE = 'conflate'
+LOSSLESS = 'lossless'
+INLINE = 'inline'
+MODES = (CONFLATE, LOSSLESS, INLINE)
+
+CONFLATED = REGISTRY.counter('pipeline_conflated_total', 'Kline updates replaced by a newer one before evaluation', ('stream',))
+PENDING = REGISTRY.gauge('pipeline_pending', 'Klines waiting for the strategy worker', ('stream',))
+WAIT_SECONDS = REGISTRY.histogram('pipeline_wait_seconds', 'Time from receive to evaluation of a kline', ('stream',))
+BLOCKED_SECONDS = REGISTRY.counter('pipeline_receiver_blocked_seconds_total', 'Time the receive thread waited on a full lossless queue')
+
+class _Slot:
+    """
+    Pendências de um stream: candles fechados em ordem (nunca descartados)
+    e, no modo conflate, só a atualização mais recente do candle em aberto.
+    """
+
+    def __init__(self, stream):
+        self.closes = collections.deque()
+        self.latest = None
+        self.scheduled = False
+        self.conflated = CONFLATED.labels(stream)
+        self.wait = WAIT_SECONDS.labels(stream)
+        PENDING.labels(stream).set_function(self.__len__)
+
+    def __len__(self):
+        return len(self.closes) + (self.latest is not None)
+
+    def put(self, entry, conflate):
+        kline = entry[0]
+        if not conflate:
+            self.closes.append(entry)
+            return 1
+        if kline['x']:
+            # o fechamento substitui a atualização parcial pendente (já desatualizada)
+            if self.latest is not None and self.latest[0]['t'] <= kline['t']:
+                self.latest = None
+                self.conflated.inc()
+                self.closes.append(entry)
+                return 0
+            self.closes.append(entry)
+            return 1
+        if self.latest is not None:
+            self.latest = entry
+            self.conflated.inc()
+            return 0
+        self.latest = entry
+        return 1
+
+    def take(self):
+        if self.closes:
+            return self.closes.popleft()
+        entry, self.latest = self.latest, None
+        return entry
+
+class KlinePipeline:
+    """
+    Desacopla o recebimento do stream da avaliação da estratégia.
+
+    A thread do websocket só decodifica e chama `submit`; um worker consome
+    os streams em rodízio e chama `handlers[stream](kline)`. No modo
+    `conflate` cada stream guarda apenas o kline mais recente do candle em
+    aberto (a estratégia sempre avalia o preço mais novo) e todos os
+    fechamentos (`x`). No modo `lossless` toda mensagem é entregue e, acima
+    de `max_pending` pendências, o recebimento espera (backpressure no socket).
+    """
+
+    def __init__(self, handlers, mode=CONFLATE, max_pending=10000, on_error=None):
+        if mode not in (CONFLATE, LOSSLESS):
+            raise ValueError(f"Invalid pipeline mode: {mode}")
+        self.handlers = handlers
+        self.mode = mode
+        self.max_pending = max_pending
+        self.on_error = on_error
+        self.logger = logging.getLogger(__name__)
+        self._slots = {stream: _Slot(stream) for stream in handlers}
+        self._ready = collections.deque()
+        self._pending = 0
+        self._condition = threading.Condition()
+        self._running = False
+        self._busy = False
+        self._thread = None
+
+    def pending(self, stream=None):
+        if stream is not None:
+            return len(self._slots[stream])
+        return self._pending
+
+    def submit(self, stream, kline):
+        slot = self._slots.get(stream)
+        if slot is None:
+            return
+        entry = (kline, time.monotonic())
+        conflate = self.mode == CONFLATE
+        with self._condition:
+            if not conflate and self._pending >= self.max_pending:
+                start = time.monotonic()
+                while self._running and self._pending >= self.max_pending:
+                    self._condition.wait()
+                BLOCKED_SECONDS.inc(time.monotonic() - start)
+            self._pending += slot.put(entry, conflate)
+            if not slot.scheduled:
+                slot.scheduled = True
+                self._ready.append(stream)
+            self._condition.notify_all()
+
+    def start(self):
+        if self._thread is None:
+            self._running = True
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout=5):
+        with self._condition:
+            self._running = False
+            self._condition.notify_all()
+        thread, self._thread = self._thread, None
+        # stop() pode ser chamado pelo próprio worker (ex.: a partir de um handler)
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout)
+
+    def drain(self, timeout=5):
+        """
+        Espera o worker consumir tudo o que foi submetido.
+        """
+        deadline = time.monotonic() + timeout
+        with self._condition:
+            while self._pending > 0 or self._busy:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    return False
+                self._condition.wait(remaining)
+        return True
+
+    def _next(self):
+        with self._condition:
+            while self._running and not self._ready:
+                self._condition.wait()
+            if not self._running:
+                return None
+            stream = self._ready.popleft()
+            slot = self._slots[stream]
+            entry = slot.take()
+            self._pending -= 1
+            if len(slot):
+                # rodízio entre os streams: volta para o fim da fila
+                self._ready.append(stream)
+            else:
+                slot.scheduled = False
+            self._busy = True
+            self._condition.notify_all()
+            return stream, slot, entry
+
+    def _run(self):
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            stream, slot, (kline, received) = item
+            slot.wait.observe(time.monotonic() - received)
+            try:
+                self.handlers[stream](kline)
+            except BaseException as e:
+                # inclui SystemExit: um worker que morre calado deixaria o bot recebendo sem operar
+                # (e, no modo lossless, o recebimento bloqueado para sempre)
+                if self.on_error is not None:
+                    self.on_error(stream, e)
+                else:
+                    self.logger.error(f'PIPELINE {stream}: {str(e)}')
+            finally:
+                with self._condition:
+                    self._busy = False
+                    self._condition.notify_all()
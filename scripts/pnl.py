@@ -0,0 +1,110 @@
+import threading
+import time
+
+def unrealized_pnl(amount, entry_price, mark_price):
+    # amount com sinal: positivo comprado, negativo vendido
+    return amount * (mark_price - entry_price)
+
+def initial_margin(amount, entry_price, leverage):
+    return abs(amount) * entry_price / (leverage or 1)
+
+def return_on_equity(pnl, margin):
+    # retorno sobre a margem da posição, em %
+    return pnl / margin * 100 if margin else 0.0
+
+class PnlLedger:
+    """
+    PnL realizado de um symbol, lançamento a lançamento, por clientOrderId.
+
+    Com o user-data stream, cada execução (ORDER_TRADE_UPDATE com x=TRADE)
+    entra com o `rp` e a comissão informados pela corretora; um evento
+    repetido da mesma ordem (mesmo `filledQty`) não é lançado de novo. Sem o
+    stream, o fechamento aceito pela corretora entra pela estimativa do
+    próprio bot (`estimate`), que é trocada pela execução se ela chegar e
+    descartada se a ordem não for executada. Com `own_orders`, só entram as
+    ordens registradas por `track` antes do envio: duas estratégias no mesmo
+    symbol (ex.: intervalos diferentes) não lançam as execuções uma da outra.
+    """
+
+    def __init__(self, symbol, max_entries=1000, own_orders=False):
+        self.symbol = symbol
+        self.max_entries = max_entries
+        self._orders = {} if own_orders else None # clientOrderIds enviados por quem usa o ledger
+        self.entries = []
+        self.realized = 0.0
+        self.commission = 0.0
+        self._estimates = {} # clientOrderId -> lançamento estimado ainda sem execução
+        self._filled = {} # clientOrderId -> filledQty já lançado
+        self._lock = threading.Lock()
+
+    @property
+    def net(self):
+        return self.realized - self.commission
+
+    def record(self, realized, commission=0.0, price=None, quantity=None, source='fill', client_order_id=None):
+        with self._lock:
+            return self._record(realized, commission, price, quantity, source, client_order_id)
+
+    def track(self, client_order_id):
+        # registrada antes do envio: a execução pode chegar antes da resposta da ordem
+        if self._orders is None:
+            return
+        with self._lock:
+            self._orders[client_order_id] = True
+            if len(self._orders) > self.max_entries:
+                for key in list(self._orders)[:len(self._orders) - self.max_entries]:
+                    del self._orders[key]
+
+    def estimate(self, client_order_id, realized, price=None, quantity=None):
+        # fechamento aceito sem o stream; ignorado se a execução da ordem já foi lançada
+        with self._lock:
+            if client_order_id in self._filled or client_order_id in self._estimates:
+                return
+            self._estimates[client_order_id] = self._record(realized, 0.0, price, quantity, 'estimate', client_order_id)
+
+    def cancel(self, client_order_id):
+        # a ordem falhou ou não foi executada: a estimativa sai do PnL
+        with self._lock:
+            self._drop_estimate(client_order_id)
+
+    def on_order_update(self, order):
+        # listener do AccountState
+        if order["symbol"] != self.symbol:
+            return
+        client_order_id = order.get("clientOrderId")
+        with self._lock:
+            if self._orders is not None and client_order_id not in self._orders:
+                return
+            if order["executionType"] != "TRADE":
+                if order["status"] in ("CANCELED", "EXPIRED", "REJECTED") and client_order_id not in self._filled:
+                    self._drop_estimate(client_order_id)
+                return
+            filled = order.get("filledQty")
+            if client_order_id is not None and filled is not None:
+                if filled <= self._filled.get(client_order_id, 0.0):
+                    return
+                self._filled[client_order_id] = filled
+            self._drop_estimate(client_order_id)
+            self._record(order["realizedProfit"], order.get("commission", 0.0), order["lastFilledPrice"],
+                         order.get("lastFilledQty"), 'fill', client_order_id)
+
+    def _record(self, realized, commission, price, quantity, source, client_order_id):
+        entry = {"time": time.time(), "realized": realized, "commission": commission, "price": price,
+                 "quantity": quantity, "source": source, "client_order_id": client_order_id}
+        self.realized += realized
+        self.commission += commission
+        self.entries.append(entry)
+        if len(self.entries) > self.max_entries:
+            del self.entries[:len(self.entries) - self.max_entries]
+        if len(self._filled) > self.max_entries:
+            # dict na ordem de inserção: esquece as ordens mais antigas
+            for key in list(self._filled)[:len(self._filled) - self.max_entries]:
+                del self._filled[key]
+        return entry
+
+    def _drop_estimate(self, client_order_id):
+        entry = self._estimates.pop(client_order_id, None)
+        if entry is None:
+            return
+        self.realized -= entry["realized"]
+        self.entries = [item for item in self.entries if item is not entry]
@@ -0,0 +1,205 @@
+import threading
+import time
+
+from scripts.metrics import REGISTRY
+
+# prioridades (menor = mais urgente)
+ORDER, ACCOUNT, INFO = 0, 1, 2
+PRIORITY_NAMES = {ORDER: 'order', ACCOUNT: 'account', INFO: 'info'}
+
+# (método, endpoint) -> (peso no limite de IP, ordens, prioridade), conforme a documentação da Binance Futures
+ENDPOINTS = {
+    ('POST', '/fapi/v1/order'): (0, 1, ORDER),
+    ('GET', '/fapi/v1/order'): (1, 0, ORDER),
+    ('POST', '/fapi/v1/batchOrders'): (5, 5, ORDER),
+    ('GET', '/fapi/v2/positionRisk'): (5, 0, ACCOUNT),
+    ('GET', '/fapi/v2/account'): (5, 0, ACCOUNT),
+    ('POST', '/fapi/v1/listenKey'): (1, 0, ACCOUNT),
+    ('PUT', '/fapi/v1/listenKey'): (1, 0, ACCOUNT),
+    ('DELETE', '/fapi/v1/listenKey'): (1, 0, ACCOUNT),
+    ('GET', '/fapi/v1/time'): (1, 0, ACCOUNT),
+    ('GET', '/fapi/v1/exchangeInfo'): (1, 0, ACCOUNT),
+    ('GET', '/fapi/v2/balance'): (5, 0, INFO),
+    ('GET', '/fapi/v1/userTrades'): (5, 0, INFO),
+}
+DEFAULT_COST = (1, 0, INFO)
+
+# fração do limite de peso guardada para as prioridades mais altas
+DEFAULT_RESERVES = {ORDER: 0.0, ACCOUNT: 0.1, INFO: 0.3}
+# tempo máximo de espera por prioridade (s); INFO é descartada na hora quando falta orçamento
+DEFAULT_MAX_WAIT = {ORDER: 10.0, ACCOUNT: 10.0, INFO: 0.0}
+
+AVAILABLE = REGISTRY.gauge('rate_limit_available', 'Local token bucket budget left per limit', ('limit',))
+USED_WEIGHT = REGISTRY.gauge('binance_used_weight', 'Request weight used in the current window (X-MBX-USED-WEIGHT-*)', ('interval',))
+WAIT_SECONDS = REGISTRY.histogram('rate_limit_wait_seconds', 'Time a call waited for rate limit budget', ('priority',))
+SHED = REGISTRY.counter('rate_limit_shed_total', 'Calls refused for lack of rate limit budget', ('priority',))
+THROTTLED = REGISTRY.counter('rate_limit_responses_total', 'HTTP 429/418 responses received', ('status',))
+
+class RateLimitExceeded(Exception):
+    def __init__(self, priority, retry_after):
+        super().__init__(f"Rate limit budget exhausted for {PRIORITY_NAMES.get(priority, priority)} calls, "
+                         f"retry in {retry_after:.1f}s")
+        self.priority = priority
+        self.retry_after = retry_after
+
+class TokenBucket:
+    """
+    Orçamento local de uma janela (`capacity` unidades a cada `window`
+    segundos), reposto continuamente e corrigido pelo uso informado pela
+    corretora nos headers.
+    """
+
+    def __init__(self, name, capacity, window):
+        self.name = name
+        self.capacity = capacity
+        self.window = window
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+        # lido pela thread do servidor de métricas: só leitura, sem repor o balde fora do lock do RateLimiter
+        AVAILABLE.labels(name).set_function(self.level)
+
+    def level(self):
+        elapsed = max(0.0, time.monotonic() - self.updated)
+        return min(self.capacity, self.tokens + elapsed * self.capacity / self.window)
+
+    @property
+    def available(self):
+        self._refill(time.monotonic())
+        return self.tokens
+
+    def take(self, amount):
+        self.tokens -= amount
+
+    def sync(self, used):
+        # a corretora é a referência: nunca acreditar em mais orçamento do que ela informa
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, self.capacity - used)
+
+    def wait_time(self, amount, reserve=0.0):
+        needed = amount + reserve - self.available
+        if needed <= 0:
+            return 0.0
+        if amount + reserve > self.capacity:
+            return float('inf')
+        return needed * self.window / self.capacity
+
+    def _refill(self, now):
+        elapsed = now - self.updated
+        if elapsed > 0:
+            self.tokens = min(self.capacity, self.tokens + elapsed * self.capacity / self.window)
+            self.updated = now
+
+class RateLimiter:
+    """
+    Agenda todas as chamadas REST do gateway dentro dos limites da conta.
+
+    Cada chamada consome peso (limite por IP) e, se for ordem, contagem de
+    ordens; os baldes locais são sincronizados pelos headers
+    X-MBX-USED-WEIGHT-* e X-MBX-ORDER-COUNT-*. Chamadas de menor prioridade
+    só usam o orçamento acima da sua reserva, então ordens e fechamentos
+    sempre passam primeiro; consultas informativas (saldo, histórico) são
+    descartadas com RateLimitExceeded quando falta orçamento. Um 429/418
+    suspende as chamadas pelo Retry-After informado.
+    """
+
+    def __init__(self, weight_limit=2400, orders_10s=300, orders_1m=1200, reserves=None, max_wait=None):
+        self.weight = TokenBucket('weight_1m', weight_limit, 60)
+        self.orders = [TokenBucket('orders_10s', orders_10s, 10), TokenBucket('orders_1m', orders_1m, 60)]
+        self.reserves = {**DEFAULT_RESERVES, **(reserves or {})}
+        self.max_wait = {**DEFAULT_MAX_WAIT, **(max_wait or {})}
+        self.blocked_until = 0.0
+        self._condition = threading.Condition()
+        self._wait_seconds = {priority: WAIT_SECONDS.labels(name) for priority, name in PRIORITY_NAMES.items()}
+        self._shed = {priority: SHED.labels(name) for priority, name in PRIORITY_NAMES.items()}
+
+    def cost(self, method, endpoint, priority=None):
+        weight, orders, default_priority = ENDPOINTS.get((method, endpoint), DEFAULT_COST)
+        return weight, orders, default_priority if priority is None else priority
+
+    def acquire(self, method, endpoint, priority=None):
+        """
+        Reserva o orçamento de uma chamada, esperando se preciso. Devolve a
+        prioridade usada; levanta RateLimitExceeded se a espera passar do
+        limite da prioridade.
+        """
+        weight, orders, priority = self.cost(method, endpoint, priority)
+        start = time.monotonic()
+        with self._condition:
+            while True:
+                wait = self._try_take(weight, orders, priority)
+                if wait == 0:
+                    break
+                self._check_wait(priority, start, wait)
+                self._condition.wait(wait)
+        self._wait_seconds[priority].observe(time.monotonic() - start)
+        return priority
+
+    async def acquire_async(self, method, endpoint, priority=None):
+        # mesma regra do acquire, sem bloquear o event loop (asyncio só é importado por quem usa)
+        import asyncio
+        weight, orders, priority = self.cost(method, endpoint, priority)
+        start = time.monotonic()
+        while True:
+            with self._condition:
+                wait = self._try_take(weight, orders, priority)
+                if wait > 0:
+                    self._check_wait(priority, start, wait)
+            if wait == 0:
+                break
+            await asyncio.sleep(wait)
+        self._wait_seconds[priority].observe(time.monotonic() - start)
+        return priority
+
+    def update(self, status, headers):
+        """
+        Atualiza os baldes com a resposta: uso informado nos headers e
+        suspensão por 429 (limite excedido) ou 418 (IP banido).
+        """
+        with self._condition:
+            for name, value in headers.items():
+                name = name.lower()
+                if name.startswith('x-mbx-used-weight-'):
+                    interval = name[len('x-mbx-used-weight-'):]
+                    USED_WEIGHT.labels(interval).set(float(value))
+                    if interval == '1m':
+                        self.weight.sync(float(value))
+                elif name.startswith('x-mbx-order-count-'):
+                    interval = name[len('x-mbx-order-count-'):]
+                    for bucket in self.orders:
+                        if bucket.name == f'orders_{interval}':
+                            bucket.sync(float(value))
+            if status in (418, 429):
+                THROTTLED.labels(status).inc()
+                retry_after = float(headers.get('Retry-After') or 60)
+                self.blocked_until = max(self.blocked_until, time.monotonic() + retry_after)
+            self._condition.notify_all()
+
+    def budget(self):
+        with self._condition:
+            blocked = max(0.0, self.blocked_until - time.monotonic())
+            buckets = [self.weight] + self.orders
+            return {
+                'blocked_for': blocked,
+                **{bucket.name: {'capacity': bucket.capacity, 'available': bucket.available} for bucket in buckets},
+            }
+
+    def _try_take(self, weight, orders, priority):
+        # 0 quando o orçamento foi reservado; senão os segundos até poder tentar de novo
+        blocked = self.blocked_until - time.monotonic()
+        if blocked > 0:
+            return blocked
+        reserve = self.reserves[priority] * self.weight.capacity
+        wait = self.weight.wait_time(weight, reserve) if weight else 0.0
+        if orders:
+            wait = max([wait] + [bucket.wait_time(orders) for bucket in self.orders])
+        if wait > 0:
+            return wait
+        self.weight.take(weight)
+        for bucket in self.orders:
+            bucket.take(orders)
+        return 0
+
+    def _check_wait(self, priority, start, wait):
+        if time.monotonic() - start + wait > self.max_wait[priority]:
+            self._shed[priority].inc()
+            raise RateLimitExceeded(priority, wait)
@@ -0,0 +1,57 @@
+import hashlib
+import hmac
+import time
+from urllib.parse import urlencode
+
+# janela aceita pela Binance entre o timestamp da chamada e o relógio do servidor (ms)
+RECV_WINDOW = 5000
+# intervalo entre as leituras de /fapi/v1/time (s)
+SYNC_INTERVAL = 30 * 60
+TIMESTAMP_OUTSIDE_RECV_WINDOW = -1021
+
+class RequestSigner:
+    """
+    Assinatura das chamadas SIGNED da Binance.
+
+    A chave é processada uma única vez em um HMAC-SHA256 já iniciado, que é
+    copiado a cada chamada; a query é codificada uma vez e a assinatura cobre
+    exatamente a string enviada (parâmetros, `recvWindow` e `timestamp`). O
+    timestamp usa o relógio local corrigido pelo `offset` (ms) lido de
+    /fapi/v1/time com `update_offset`.
+    """
+
+    def __init__(self, secret_key, recv_window=RECV_WINDOW, sync_interval=SYNC_INTERVAL):
+        self.set_key(secret_key)
+        self.recv_window = recv_window
+        self.sync_interval = sync_interval
+        self.offset = 0 # ms: relógio do servidor - relógio local
+        self.synced_at = None # time.monotonic() da última sincronização
+
+    def set_key(self, secret_key):
+        self._hmac = hmac.new(secret_key.encode('utf-8'), digestmod=hashlib.sha256)
+
+    def sign(self, data):
+        signature = self._hmac.copy()
+        signature.update(data.encode('utf-8'))
+        return signature.hexdigest()
+
+    def timestamp(self):
+        return int(time.time() * 1000) + self.offset
+
+    def query(self, params=None, signed=True):
+        query = urlencode(params) if params else ""
+        if not signed:
+            return query
+        # recvWindow e timestamp são inteiros: entram direto, sem passar de novo pelo urlencode
+        suffix = f"recvWindow={self.recv_window}&timestamp={self.timestamp()}" if self.recv_window \
+            else f"timestamp={self.timestamp()}"
+        query = f"{query}&{suffix}" if query else suffix
+        return f"{query}&signature={self.sign(query)}"
+
+    def update_offset(self, server_time, sent, received):
+        # sent/received: time.time() antes e depois da chamada; supõe ida e volta simétricas
+        self.offset = int(server_time - (sent + received) * 500)
+        self.synced_at = time.monotonic()
+
+    def needs_sync(self):
+        return self.synced_at is None or time.monotonic() - self.synced_at >= self.sync_interval
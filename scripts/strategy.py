@@ -0,0 +1,344 @@
+import queue
+import threading
+import time
+
+from scripts.binance_gateway import new_client_order_id
+from scripts.candle_buffer import CandleBuffer
+from scripts.indicators import IndicatorEngine
+from scripts.kline_store import INTERVAL_MS
+from scripts.log_setup import symbol_logger
+from scripts.metrics import REGISTRY
+from scripts.order_executor import ACKED
+from scripts.pnl import PnlLedger, initial_margin, return_on_equity, unrealized_pnl
+from scripts.rate_limiter import RateLimitExceeded
+
+INDICATOR_SECONDS = REGISTRY.histogram('strategy_indicator_seconds', 'Candle buffer and RSI/ATR update time per kline', ('symbol', 'interval'))
+SKIPPED = REGISTRY.counter('strategy_evaluations_skipped_total', 'Partial klines with only the stop check, by cadence', ('symbol', 'interval'))
+
+# cadência da avaliação de sinais; os stops são conferidos em todo tick em qualquer modo
+TICK = 'tick' # toda atualização do kline
+THROTTLE = 'throttle' # no máximo `max_rate` avaliações por segundo (e todo fechamento)
+CLOSE = 'close' # só no fechamento do candle (k.x)
+CADENCES = (TICK, THROTTLE, CLOSE)
+
+# depois do ack, quanto esperar a execução chegar pelo user-data stream antes de ler a posição de novo
+FILL_GRACE = 5.0
+# sem mark price há mais que isso (s), os stops voltam a usar o fechamento do kline
+MARK_STALE = 5.0
+
+class SymbolStrategy:
+    """
+    Estado e regras da estratégia RSI/ATR de um symbol/interval.
+
+    Não abre conexões próprias: recebe os klines já decodificados e usa o
+    gateway compartilhado para posições e ordens, então vários symbols podem
+    rodar no mesmo processo com custo fixo por symbol.
+    """
+
+    def __init__(self, binance, symbol, interval, volume, stop_gain, stop_loss, msg_queue=None, buffer_size=500,
+                 rsi_period=14, rsi_oversold=30, rsi_overbought=70, atr_period=14, atr_volatility=40, tag_messages=False, executor=None,
+                 cadence=TICK, max_rate=1.0, history=None):
+        if cadence not in CADENCES:
+            raise ValueError(f"Invalid cadence: {cadence}")
+        self.binance = binance
+        # history(symbol, interval, limit, start_time=...): /klines para os candles fechados que o stream não entregou
+        self.history = history
+        self.cadence = cadence
+        self.max_rate = max_rate
+        self._last_evaluation = None
+        # com um OrderExecutor as ordens são enviadas fora desta thread
+        self.executor = executor
+        self._pending_order = None
+        self.symbol = symbol
+        self.interval = interval
+        self.quantity = volume
+        self.stop_gain = stop_gain
+        self.stop_loss = stop_loss
+        self.atr_period = atr_period # Periodo do ATR
+        self.atr_volatility = atr_volatility # Limite Volatilidade
+        self.rsi_period = rsi_period # Periodo do RSI
+        self.rsi_oversold = rsi_oversold # Sobrevenda
+        self.rsi_overbought = rsi_overbought # Sobrecompra
+        self.last_price = None
+        self.mark_price = None
+        self.unrealized_pnl = 0.0
+        self.roe = 0.0
+        self._mark_time = None
+        self._position = None # última posição lida: (quantidade com sinal, entrada, alavancagem)
+        self._position_stale = True # uma ordem foi enviada depois da última leitura
+        # kline (worker do pipeline) e mark price (thread do stream) avaliam a mesma posição
+        self._lock = threading.Lock()
+        # PnL realizado pelas execuções do user-data stream, só das ordens desta estratégia
+        self.ledger = PnlLedger(self.symbol, own_orders=True)
+        binance.account.add_listener(self.ledger.on_order_update)
+        self.tag_messages = tag_messages
+        self.msg_queue = msg_queue if msg_queue is not None else queue.Queue()
+        self.logger = symbol_logger(__name__, self.symbol, self.interval)
+
+        # Buffer de candles em memória e RSI/ATR incrementais
+        self.candles = CandleBuffer(self.symbol, self.interval, size=buffer_size)
+        self.indicators = IndicatorEngine(self.rsi_period, self.atr_period)
+        self._indicator_seconds = INDICATOR_SECONDS.labels(self.symbol, self.interval)
+        self._skipped = SKIPPED.labels(self.symbol, self.interval)
+
+    def seed(self, klines, last_price, closed=False):
+        # carregado uma única vez no início, só com candles fechados: o último de /klines está em
+        # aberto e é descartado; o candle em aberto chega inteiro (até o fechamento) pelo stream
+        self.last_price = last_price
+        self.candles.seed(klines if closed else klines[:-1], closed=True)
+        self.indicators.seed(self.candles.highs(), self.candles.lows(), self.candles.closes())
+
+    def apply_filters(self, filters):
+        # quantidade das ordens no stepSize do symbol; abaixo de minQty/minNotional levanta FilterError
+        if filters is None:
+            return
+        quantity = filters.round_quantity(self.quantity)
+        filters.check(quantity, self.last_price)
+        self.quantity = float(quantity)
+
+    def notify(self, message):
+        if self.tag_messages:
+            message = f'[{self.symbol}] {message}'
+        self.msg_queue.put(message)
+
+    @property
+    def gross_pnl(self):
+        return self.ledger.realized
+
+    def current_price(self):
+        # mark price em dia, senão o último fechamento (preço ao vivo para o conversor da interface)
+        return self.mark_price if self.mark_price_fresh() else self.last_price
+
+    def get_position(self):
+        # lê do espelho local da conta; REST apenas enquanto o stream não sincronizou
+        if self.binance.account.synced:
+            position = self.binance.account.get_position(self.symbol)
+        else:
+            positions = self.binance.get_open_positions(self.symbol)
+            position = None
+            if positions:
+                position = (float(positions[0]['positionAmt']), float(positions[0]['entryPrice']),
+                            float(positions[0].get('leverage', 1)))
+        self._position = position
+        self._position_stale = False
+        return position
+
+    def should_evaluate(self, is_closed):
+        # fechamentos são sempre avaliados
+        if self.cadence == TICK or is_closed:
+            return True
+        if self.cadence == CLOSE:
+            return False
+        now = time.monotonic()
+        return self._last_evaluation is None or now - self._last_evaluation >= 1.0 / self.max_rate
+
+    def mark_price_fresh(self):
+        return self._mark_time is not None and time.monotonic() - self._mark_time < MARK_STALE
+
+    def on_kline(self, kline):
+        start = time.perf_counter()
+        last_open_time = self.candles.last_open_time
+        if self.candles.closed and last_open_time is not None:
+            if kline['t'] == last_open_time:
+                # fechamento de um candle já aplicado aos indicadores (ex.: o último do seed): só os valores
+                self.candles.update(kline)
+                return
+            step = INTERVAL_MS.get(self.interval)
+            if step and kline['t'] > last_open_time + step:
+                self._backfill(last_open_time + step, kline['t'])
+        is_closed = self.candles.update(kline)
+        price = float(kline['c'])
+        if not self.should_evaluate(is_closed):
+            # tick fora da cadência: sem RSI/ATR parcial nem sinais, só os stops
+            self._indicator_seconds.observe(time.perf_counter() - start)
+            self._skipped.inc()
+            with self._lock:
+                try:
+                    self._check_stops_on_tick(price)
+                except RateLimitExceeded as e:
+                    self._shed('TICK', e)
+            return
+        self._last_evaluation = time.monotonic()
+        rsi, atr = self.indicators.update(float(kline['h']), float(kline['l']), price, is_closed)
+        self._indicator_seconds.observe(time.perf_counter() - start)
+        with self._lock:
+            try:
+                self._evaluate(price, rsi, atr)
+            except RateLimitExceeded as e:
+                self._shed('KLINE', e)
+
+    def _backfill(self, start_time, end_time):
+        # candles fechados em [start_time, end_time) que não vieram pelo stream (entre o seed e a
+        # assinatura ou em uma reconexão), aplicados antes do kline atual
+        if self.history is None:
+            self.logger.warning(f'KLINES: missing candles from {start_time} to {end_time}')
+            return
+        try:
+            klines = self.history(self.symbol, self.interval, 1000, start_time=start_time)
+        except Exception as e:
+            self.logger.warning(f'KLINES: backfill from {start_time} failed, {str(e)}')
+            return
+        for row in klines:
+            if start_time <= int(row[0]) < end_time:
+                high, low, close = float(row[2]), float(row[3]), float(row[4])
+                self.candles.update({'t': int(row[0]), 'o': float(row[1]), 'h': high, 'l': low, 'c': close,
+                                     'v': float(row[5]), 'x': True})
+                self.indicators.update(high, low, close, closed=True)
+
+    def _shed(self, tag, error):
+        # leitura de posição descartada pelo RateLimiter: pula esta avaliação, o bot continua
+        self.logger.warning(f'{tag}: {str(error)}, skipping evaluation')
+
+    def on_mark_price(self, event):
+        """
+        Evento markPriceUpdate: stops pelo mark price. A posição vem do
+        espelho da conta ou da última leitura; REST só quando uma ordem
+        mudou a posição desde essa leitura.
+        """
+        price = float(event['p'])
+        with self._lock:
+            self.mark_price = price
+            self._mark_time = time.monotonic()
+            if self.order_in_flight():
+                return
+            if self.binance.account.synced:
+                position = self.binance.account.get_position(self.symbol)
+            elif self._position_stale:
+                # com o mark price em dia os ticks do kline não leem a posição: sem isso ela ficaria None
+                try:
+                    position = self.get_position()
+                except RateLimitExceeded as e:
+                    self._shed('MARK PRICE', e)
+                    return
+            else:
+                position = self._position
+            if position is not None:
+                self.check_stops(price, position)
+
+    def check_stops(self, price, position):
+        """
+        PnL, margem e ROE locais da posição a `price`; fecha a posição se
+        atingir o stop gain ou o stop loss. Retorna True se fechou.
+        """
+        amount, entry_price, leverage = position
+        pnl = unrealized_pnl(amount, entry_price, price)
+        self.unrealized_pnl = pnl
+        self.roe = return_on_equity(pnl, initial_margin(amount, entry_price, leverage))
+        self.notify(f"PNL: {pnl:.3f} USDT, ROE: {self.roe:.2f}%")
+        if self.roe >= self.stop_gain: # Gain
+            result = 'profit'
+        elif self.roe <= -self.stop_loss: # Loss
+            result = 'loss'
+        else:
+            return False
+
+        side = 'SELL' if amount > 0 else 'BUY'
+        # sem o stream não chegam as execuções: o fechamento aceito entra pela estimativa
+        estimate = (pnl, price) if not self.binance.account.synced else None
+        self.close_position(side, abs(amount), estimate)
+        self._position = None
+        self.notify(f'closed with {result}, {side.lower()} position for {self.symbol} at {price}')
+        return True
+
+    def _check_stops_on_tick(self, price):
+        if self.order_in_flight() or self.mark_price_fresh():
+            return
+        # fora do espelho da conta, REST só se uma ordem mudou a posição desde a última leitura
+        if self.binance.account.synced or self._position_stale:
+            position = self.get_position()
+        else:
+            position = self._position
+        if position is not None:
+            self.check_stops(price, position)
+
+    def _evaluate(self, price, rsi, atr):
+        if self.order_in_flight():
+            # ordem anterior ainda sem resposta: a posição lida estaria desatualizada
+            self.last_price = price
+            return
+
+        position = self.get_position()
+        if position is not None and not self.mark_price_fresh():
+            # sem o stream de mark price: stops pelo fechamento do kline
+            self.check_stops(price, position)
+
+        if rsi is None or atr is None:
+            return
+
+        ws_indicator = f"RSI: {rsi:.2f}, Volatilidade: {atr:.2f}"
+        self.notify(ws_indicator)
+
+        if rsi <= self.rsi_oversold and price > self.last_price:
+            if position is None:
+                # Enviar ordem de compra
+                self.open_position('BUY', price)
+        elif rsi >= self.rsi_overbought and price < self.last_price:
+            if position is None:
+                # Enviar ordem de venda
+                self.open_position('SELL', price)
+        self.last_price = price
+
+    def order_in_flight(self):
+        future = self._pending_order
+        if future is None:
+            return False
+        if not future.done():
+            return True
+        ticket = future.result()
+        # ack recebido: com o espelho da conta, espera a execução chegar para não operar sobre a posição antiga
+        return (ticket.status == ACKED and self.binance.account.synced
+                and time.monotonic() - ticket.acked_at < FILL_GRACE)
+
+    def new_order_id(self):
+        # clientOrderId registrado no ledger antes do envio
+        client_order_id = new_client_order_id()
+        self.ledger.track(client_order_id)
+        return client_order_id
+
+    def open_position(self, side, price):
+        action = side.lower()
+        self._position_stale = True
+        client_order_id = self.new_order_id()
+        if self.executor is not None:
+            self._pending_order = self.executor.submit(
+                self.symbol, side, self.quantity, callback=lambda ticket: self._report_order(action, price, ticket.ok),
+                client_order_id=client_order_id)
+            return
+
+        if side == 'BUY':
+            response = self.binance.buy_market_order(self.symbol, self.quantity, client_order_id=client_order_id)
+        else:
+            response = self.binance.sell_market_order(self.symbol, self.quantity, client_order_id=client_order_id)
+        # Verificar se a ordem foi bem-sucedida
+        self._report_order(action, price, "status" in response and response["status"] == "NEW")
+
+    def close_position(self, side, quantity, estimate=None):
+        # fecha o tamanho real da posição, sem risco de abrir uma posição contrária
+        self._position_stale = True
+        client_order_id = self.new_order_id()
+        if self.executor is not None:
+            callback = None
+            if estimate is not None:
+                callback = lambda ticket: self._book_estimate(ticket.client_order_id if ticket.ok else None, quantity, estimate)
+            self._pending_order = self.executor.submit(self.symbol, side, quantity, reduce_only=True, callback=callback,
+                                                       client_order_id=client_order_id)
+            return
+        response = self.binance.close_all_postions(self.symbol, quantity, side, reduce_only=True,
+                                                   client_order_id=client_order_id)
+        if estimate is not None:
+            self._book_estimate(response.get("clientOrderId") if "orderId" in response else None, quantity, estimate)
+
+    def _book_estimate(self, client_order_id, quantity, estimate):
+        # (pnl, preço) lançados só para um fechamento aceito, pelo clientOrderId da ordem
+        if client_order_id is None:
+            return
+        pnl, price = estimate
+        self.ledger.estimate(client_order_id, pnl, price=price, quantity=quantity)
+
+    def _report_order(self, action, price, ok):
+        if ok:
+            # Adicionar mensagem na fila
+            self.notify(f'executed {action} order {self.symbol} at {price}')
+        else:
+            # Se a ordem não foi bem-sucedida, avisar na interface
+            self.notify(f'error executing {action} order')
@@ -5,17 +5,28 @@ sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..',
 import datetime
 import websocket
 from websocket import WebSocketApp
-import numpy as np
-import tulipy as ti
 import requests
 import json
 import logging
 import queue
+import threading
+import time
 
 from scripts.binance_gateway import BinanceFutures
+from scripts.log_setup import symbol_logger
+from scripts.market_data import SpotMarketData, kline_stream, mark_price_stream
+from scripts.metrics import REGISTRY, start_http_server
+from scripts.order_executor import OrderExecutor
+from scripts.pipeline import CONFLATE, INLINE, MODES, KlinePipeline
+from scripts.strategy import TICK, SymbolStrategy
+
+WS_LAG_SECONDS = REGISTRY.histogram('ws_message_lag_seconds', 'Local receive time minus event time (E) of stream messages', ('stream',))
+MESSAGE_SECONDS = REGISTRY.histogram('bot_message_seconds', 'Strategy evaluation time per kline, up to the last order', ('stream',))
+MESSAGES = REGISTRY.counter('bot_messages_total', 'Stream messages received', ('stream',))
+QUEUE_DEPTH = REGISTRY.gauge('bot_msg_queue_depth', 'Messages waiting in msg_queue for the interface', ('bot',))
 
 class BinanceTradingBot:
-    def __init__(self, api_key, api_secret, symbol, interval, volume, stop_gain,stop_loss, is_test=False):
+    def __init__(self, api_key, api_secret, symbol, interval, volume, stop_gain,stop_loss, is_test=False, buffer_size=500, store=None, base_url=None, stream_url=None, metrics_port=None, mode=CONFLATE, mark_price=True, cadence=TICK, max_rate=1.0):
         self.symbol = symbol
         self.interval = interval
         self.quantity = volume
@@ -23,48 +34,80 @@ class BinanceTradingBot:
         self.stop_loss = stop_loss
         self.is_test = is_test
         self.is_running = False
-        self.atr_period = 14 # Periodo do ATR
-        self.atr_volatility = 40 # Limite Volatilidade
-        self.rsi_period = 14 # Periodo do RSI
-        self.rsi_oversold = 30 # Sobrevenda
-        self.rsi_overbought = 70 # Sobrecompra
-        self.gross_pnl = 0
-        self.binance = BinanceFutures(api_key, api_secret, is_test=self.is_test)
+        # base_url/stream_url: corretora alternativa (ex.: MockExchange) servindo fapi e api/v3
+        self.binance = BinanceFutures(api_key, api_secret, is_test=self.is_test, base_url=base_url, stream_url=stream_url)
         self.msg_queue = queue.Queue()
-        self.logger = logging.getLogger(__name__)
-
-        # configurando o logger
-        LOG_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'logs')
-
-        if not os.path.exists(LOG_DIR):
-            os.mkdir(LOG_DIR)
-
-        logger = logging.getLogger(__name__)
-        logger.setLevel(logging.DEBUG)
-
-        file_handler = logging.FileHandler(os.path.join(LOG_DIR, 'trade_bot.log'))
-        file_handler.setLevel(logging.DEBUG)
-
-        formatter = logging.Formatter('%(asctime)s - %(levelname)s - %(message)s')
-        file_handler.setFormatter(formatter)
-
-        logger.addHandler(file_handler)
-        
-        if self.is_test:
-            self.base_url = 'https://testnet.binance.vision/api/v3'
-            self.ticker_url = f'{self.base_url}/ticker/price?symbol={self.symbol}'
-            self.socket_url = f'wss://testnet.binance.vision/ws/{self.symbol.lower()}@kline_{self.interval}'
+        # contexto do bot em cada registro; o logging já foi configurado pelo gateway
+        self.logger = symbol_logger(__name__, self.symbol, self.interval)
+
+        # mesma sessão HTTP do gateway (pool de conexões keep-alive)
+        self.session = self.binance.session
+        self.market = SpotMarketData(self.session, is_test=self.is_test, timeout=self.binance.timeout,
+                                     base_url=f'{base_url}/api/v3' if base_url else None, stream_url=stream_url)
+        self.base_url = self.market.base_url
+        self.ticker_url = self.market.ticker_url(self.symbol)
+        self.socket_url = self.market.socket_url(kline_stream(self.symbol, self.interval))
+
+        # ordens enviadas fora da thread da estratégia, com retentativas idempotentes
+        self.executor = OrderExecutor(self.binance)
+
+        # Estado da estratégia (buffer de candles, RSI/ATR, PnL)
+        self.strategy = SymbolStrategy(
+            self.binance,
+            self.symbol,
+            self.interval,
+            self.quantity,
+            self.stop_gain,
+            self.stop_loss,
+            msg_queue=self.msg_queue,
+            buffer_size=buffer_size,
+            executor=self.executor,
+            cadence=cadence,
+            max_rate=max_rate,
+            history=self.market.get_historical_klines)
+
+        # aquece pelo histórico local quando disponível e em dia (só a lacuna até agora vem da API)
+        klines = store.recent(self.market, self.symbol, self.interval, buffer_size) if store is not None else None
+        if klines is not None:
+            self.strategy.seed(klines, float(klines[-1][4]), closed=True)
         else:
-            self.base_url = 'https://api.binance.com/api/v3'
-            self.ticker_url = f'{self.base_url}/ticker/price?symbol={self.symbol}'
-            self.socket_url = f'wss://stream.binance.com:9443/ws/{self.symbol.lower()}@kline_{self.interval}'
-
-        self.last_price = self.get_last_price()
-        self.ws = websocket.WebSocketApp(self.socket_url, on_message=self.on_message)
+            # +1: o último de /klines é o candle em aberto, fora do seed
+            self.strategy.seed(self.get_historical_klines(buffer_size + 1), self.get_last_price())
+
+        # volume no stepSize do symbol, validado (minQty/minNotional) antes de qualquer ordem
+        self.strategy.apply_filters(self.binance.symbol_filters(self.symbol))
+        self.quantity = self.strategy.quantity
+
+        # recebimento e estratégia desacoplados: on_message só decodifica e entrega
+        # ao pipeline; no modo inline a estratégia roda na própria thread do socket
+        if mode not in MODES:
+            raise ValueError(f"Invalid mode: {mode}")
+        stream = kline_stream(self.symbol, self.interval)
+        self.stream = stream
+        self.pipeline = None
+        if mode != INLINE:
+            self.pipeline = KlinePipeline({stream: self.process}, mode=mode, on_error=self.on_error)
+
+        # conexão aberta = streams assinados (a assinatura vai na própria URL)
+        self.subscribed = threading.Event()
+        self.ws = websocket.WebSocketApp(self.socket_url, on_message=self.on_message, on_open=self.on_open)
+
+        # mark price de futuros (1s): stops com PnL/ROE locais, sem REST a cada preço
+        self.mark_ws = None
+        if mark_price:
+            self.mark_ws = websocket.WebSocketApp(f'{self.binance.stream_url}/ws/{mark_price_stream(self.symbol)}',
+                                                  on_message=self.on_mark_message)
+
+        # métricas do caminho quente; séries guardadas para não buscar por label a cada mensagem
+        self._ws_lag = WS_LAG_SECONDS.labels(stream)
+        self._message_seconds = MESSAGE_SECONDS.labels(stream)
+        self._messages = MESSAGES.labels(stream)
+        QUEUE_DEPTH.labels(stream).set_function(self.msg_queue.qsize)
+        self.metrics_server = start_http_server(metrics_port) if metrics_port is not None else None
 
     def check_server_status(self):
         try:
-            response = requests.get(self.ticker_url)
+            response = self.session.get(self.ticker_url, timeout=self.binance.timeout)
             if response.status_code == 200:
                 return True
             else:
@@ -77,14 +120,7 @@ class BinanceTradingBot:
 
     def get_last_price(self):
         try:
-            response = requests.get(self.ticker_url)
-            response.raise_for_status()  # check for HTTP errors
-            ticker = response.json()
-            if isinstance(ticker, dict) and 'price' in ticker:
-                last_price = float(ticker['price'])
-                return last_price
-            else:
-                raise ValueError('Invalid ticker response')
+            return self.market.get_last_price(self.symbol)
         except (requests.exceptions.RequestException, ValueError) as e:
             print(f"Error: {e}")
             self.logger.error(f'LAST PRICE: {str(e)}')
@@ -93,100 +129,49 @@ class BinanceTradingBot:
     def ws_message(self):
         return self.msg_queue.get()
 
+    def on_open(self, ws):
+        self.subscribed.set()
+
     def on_message(self, ws, message):
         try:
             if not self.is_running:
                 self.is_running = True
 
+            received = time.time()
             json_message = json.loads(message)
-            price = float(json_message['k']['c'])
-            positions = self.binance.get_open_positions(self.symbol)
-
-            if positions and len(positions) > 0:
-                position = positions[0]
-                margin = float(self.binance.get_position_margin())
-                entry_price = float(position['entryPrice'])
-                side = position['side']
-                currentSide = position['currentSide']
-                quantity = float(position['positionAmt'])
-                pnl = quantity * (price - entry_price)
-                roe = (pnl / margin * 100) if margin != 0 and pnl != 0 else 0
-                market_msg = f"PNL: {pnl:.3f} USDT, ROE: {roe:.2f}%"
-                self.msg_queue.put(market_msg)
-                if (currentSide == 'BUY' and roe >= self.stop_gain) or (currentSide == 'SELL' and roe >= self.stop_gain): # Gain 
-                    self.binance.close_all_postions(self.symbol, self.quantity, side)
-                    self.msg_queue.put(f'closed with profit, {side.lower()} position for {self.symbol} at {price}')
-                    self.gross_pnl += pnl
-                if (currentSide == 'BUY' and roe <= (-1 * self.stop_loss)) or (currentSide == 'SELL' and roe <= (-1 * self.stop_loss)): # Loss
-                    self.binance.close_all_postions(self.symbol, self.quantity, side)
-                    self.msg_queue.put(f'closed with loss, {side.lower()} position for {self.symbol} at {price}')
-                    self.gross_pnl += pnl
-
-            prices = self.get_historical_prices(self.rsi_period)
-            prices.append(price)
-            prices = np.array(prices)
-
-            if len(prices) < self.rsi_period:
-                return
-
-            rsi = ti.rsi(prices, self.rsi_period)
-
-            # ATR calculation
-            high_prices = np.array([float(json_message['k']['h'])])
-            low_prices = np.array([float(json_message['k']['l'])])
-            close_prices = np.array([float(json_message['k']['c'])])
-            if len(prices) >= self.atr_period:
-                high_prices = np.append(high_prices, prices[-self.atr_period:-1])
-                low_prices = np.append(low_prices, prices[-self.atr_period:-1])
-                close_prices = np.append(close_prices, prices[-self.atr_period:-1])
-            atr = ti.atr(high_prices, low_prices, close_prices, self.atr_period)[-1]
-
-            ws_indicator = f"RSI: {rsi[-1]:.2f}, Volatilidade: {atr:.2f}"
-            self.msg_queue.put(ws_indicator)
-            
-            if rsi[-1] <= self.rsi_oversold and price > self.last_price:
-                if len(positions) == 0:
-                  # Enviar ordem de compra
-                    response = self.binance.buy_market_order(self.symbol, self.quantity)
-
-                    # Verificar se a ordem foi bem-sucedida
-                    if "status" in response and response["status"] == "NEW":
-                        # Adicionar mensagem na fila
-                        self.msg_queue.put(f'executed buy order {self.symbol} at {price}')
-                    else:
-                        # Se a ordem não foi bem-sucedida, imprimir a mensagem de erro na tela
-                       self.msg_queue.put(f'error executing buy order')
-            elif rsi[-1] >= self.rsi_overbought and price < self.last_price:
-                if len(positions) == 0:
-                   # Enviar ordem de compra
-                    response = self.binance.buy_market_order(self.symbol, self.quantity)
-                    # Verificar se a ordem foi bem-sucedida
-                    if "status" in response and response["status"] == "NEW":
-                        # Adicionar mensagem na fila
-                        self.msg_queue.put(f'executed sell order {self.symbol} at {price}')
-                    else: 
-                        self.msg_queue.put(f'error executing sell order')
-            self.last_price = price
+            self._messages.inc()
+            if 'E' in json_message:
+                self._ws_lag.observe(received - json_message['E'] / 1000)
+            if self.pipeline is None:
+                self.process(json_message['k'])
+            else:
+                self.pipeline.submit(self.stream, json_message['k'])
         except Exception as e:
-            print(f"Error: {e}")
-            self.logger.error(f'MESSAGE: {str(e)}')
-            exit()
+            self.on_error(self.stream, e)
 
-
-    def get_historical_prices(self, num_periods):
+    def on_mark_message(self, ws, message):
         try:
-            # Obtém os preços históricos do intervalo especificado
-            params = {'symbol': self.symbol, 'interval': self.interval, 'limit': num_periods + 1}
-            response = requests.get(f'{self.base_url}/klines', params=params)
-            klines = response.json()
-            
-            # Extrai os preços de fechamento dos klines
-            prices = []
-            for kline in klines:
-                close = float(kline[4])
-                prices.append(close)
-                
-            return prices[:-1]
+            self.strategy.on_mark_price(json.loads(message))
+        except Exception as e:
+            # sem mark price os stops continuam pelo kline
+            self.logger.error(f'MARK PRICE: {str(e)}')
+
+    def process(self, kline):
+        start = time.perf_counter()
+        self.strategy.on_kline(kline)
+        self._message_seconds.observe(time.perf_counter() - start)
+
+    def on_error(self, stream, error):
+        # erro na estratégia (thread do pipeline ou on_message inline): encerra o bot
+        print(f"Error: {error}")
+        self.logger.error(f'MESSAGE: {str(error)}')
+        self.msg_queue.put(f"Error: {str(error)}")
+        self.stop()
+
+    def get_historical_klines(self, limit):
+        try:
+            # Obtém os klines do intervalo especificado em uma única chamada
+            return self.market.get_historical_klines(self.symbol, self.interval, limit)
         except Exception as e:
             print(f"Error: {e}")
             self.logger.error(f'HISTORICAL PRICES: {str(e)}')
@@ -194,6 +179,11 @@ class BinanceTradingBot:
             
     def run(self):
         try:
+            self.binance.start_user_stream()
+            if self.pipeline is not None:
+                self.pipeline.start()
+            if self.mark_ws is not None:
+                threading.Thread(target=self.mark_ws.run_forever, kwargs={"reconnect": 5}, daemon=True).start()
             self.ws.run_forever()
         except Exception as e:
             self.logger.error(f'RUN: {str(e)}')
@@ -202,5 +192,13 @@ class BinanceTradingBot:
     def stop(self):
         try:
             self.ws.close()
+            if self.mark_ws is not None:
+                self.mark_ws.close()
+            if self.pipeline is not None:
+                self.pipeline.stop()
+            self.executor.shutdown(wait=False)
+            self.binance.stop_user_stream()
+            if self.metrics_server is not None:
+                self.metrics_server.shutdown()
         except Exception as e:
             self.msg_queue.put(f"Error: {str(e)}")
\ No newline at end of file
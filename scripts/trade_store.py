@@ -0,0 +1,164 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from scripts.binance_gateway import to_ms
+
+DEFAULT_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'data', 'trades.sqlite')
+
+# campos de /fapi/v1/userTrades guardados no cache (os numéricos como REAL)
+FIELDS = (
+    ("id", "INTEGER"),
+    ("orderId", "INTEGER"),
+    ("time", "INTEGER"),
+    ("side", "TEXT"),
+    ("positionSide", "TEXT"),
+    ("price", "REAL"),
+    ("qty", "REAL"),
+    ("quoteQty", "REAL"),
+    ("realizedPnl", "REAL"),
+    ("commission", "REAL"),
+    ("commissionAsset", "TEXT"),
+    ("buyer", "INTEGER"),
+    ("maker", "INTEGER"),
+)
+BATCH = 1000
+
+class TradeStore:
+    """
+    Cache local dos trades da conta em SQLite, por symbol.
+
+    `sync` busca só o que falta: trades com id maior que o último gravado e,
+    se o intervalo pedido começa antes do que já foi sincronizado, a faixa
+    anterior. Assim relatórios de PnL repetidos fazem uma única consulta
+    paginada pelos trades novos.
+    """
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = path
+        self.logger = logging.getLogger(__name__)
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(path, check_same_thread=False)
+        columns = ", ".join(f'"{name}" {kind}' for name, kind in FIELDS)
+        with self._connection:
+            self._connection.execute(f'CREATE TABLE IF NOT EXISTS trades (symbol TEXT NOT NULL, {columns}, '
+                                     'PRIMARY KEY (symbol, id))')
+            self._connection.execute('CREATE INDEX IF NOT EXISTS trades_time ON trades (symbol, time)')
+            # intervalo (ms) já sincronizado de cada symbol
+            self._connection.execute('CREATE TABLE IF NOT EXISTS synced (symbol TEXT PRIMARY KEY, start_time INTEGER, '
+                                     'end_time INTEGER)')
+
+    def close(self):
+        self._connection.close()
+
+    def last_id(self, symbol):
+        with self._lock:
+            row = self._connection.execute('SELECT MAX(id) FROM trades WHERE symbol = ?', (symbol,)).fetchone()
+        return row[0]
+
+    def synced(self, symbol):
+        # (início, fim) em ms do intervalo já sincronizado, ou None
+        with self._lock:
+            return self._connection.execute('SELECT start_time, end_time FROM synced WHERE symbol = ?', (symbol,)).fetchone()
+
+    def append(self, trades):
+        """
+        Grava trades no formato da API ignorando os que já estão no cache.
+        Retorna a quantidade de trades gravados.
+        """
+        names = ", ".join(f'"{name}"' for name, _ in FIELDS)
+        marks = ", ".join("?" * (len(FIELDS) + 1))
+        rows = [(trade["symbol"],) + tuple(_value(trade[name], kind) for name, kind in FIELDS) for trade in trades]
+        with self._lock, self._connection:
+            before = self._connection.total_changes
+            self._connection.executemany(f'INSERT OR IGNORE INTO trades (symbol, {names}) VALUES ({marks})', rows)
+            return self._connection.total_changes - before
+
+    def trades(self, symbol, start_time=None, end_time=None):
+        query, params = self._where(symbol, start_time, end_time)
+        names = ", ".join(f'"{name}"' for name, _ in FIELDS)
+        with self._lock:
+            rows = self._connection.execute(f'SELECT symbol, {names} FROM trades {query} ORDER BY id', params).fetchall()
+        return [dict(zip(("symbol",) + tuple(name for name, _ in FIELDS), row)) for row in rows]
+
+    def sync(self, binance, symbol, start_time=None):
+        """
+        Completa o cache de `symbol` a partir de `start_time` (datetime ou
+        ms; sem ele e com o cache vazio, os últimos 7 dias da API). Retorna a
+        quantidade de trades novos.
+        """
+        now = int(time.time() * 1000)
+        start_time = to_ms(start_time) if start_time is not None else None
+        synced = self.synced(symbol)
+        total = 0
+        if synced is None:
+            start = start_time if start_time is not None else now - 7 * 24 * 60 * 60 * 1000
+            total += self._store(binance.iter_trades(symbol, start, now))
+        else:
+            start = synced[0]
+            if start_time is not None and start_time < start:
+                # o intervalo pedido começa antes do cache: busca só a faixa anterior
+                total += self._store(binance.iter_trades(symbol, start_time, start - 1))
+                start = start_time
+            last_id = self.last_id(symbol)
+            if last_id is not None:
+                total += self._store(binance.iter_trades(symbol, from_id=last_id + 1))
+            else:
+                total += self._store(binance.iter_trades(symbol, synced[1] + 1, now))
+        with self._lock, self._connection:
+            self._connection.execute('INSERT OR REPLACE INTO synced (symbol, start_time, end_time) VALUES (?, ?, ?)',
+                                     (symbol, start, now))
+        return total
+
+    def pnl_report(self, binance, symbol, start_time, end_time=None):
+        """
+        PnL realizado e comissões (por ativo) de `symbol` no intervalo,
+        sincronizando antes só os trades que faltam no cache.
+        """
+        self.sync(binance, symbol, start_time)
+        query, params = self._where(symbol, start_time, end_time)
+        with self._lock:
+            count, realized = self._connection.execute(
+                f'SELECT COUNT(*), COALESCE(SUM(realizedPnl), 0) FROM trades {query}', params).fetchone()
+            commissions = dict(self._connection.execute(
+                f'SELECT commissionAsset, SUM(commission) FROM trades {query} GROUP BY commissionAsset', params).fetchall())
+        return {
+            "symbol": symbol,
+            "trades": count,
+            "realized_pnl": realized,
+            "commission": commissions,
+            "net_pnl": realized - commissions.get("USDT", 0.0),
+        }
+
+    def _store(self, trades):
+        # grava em lotes enquanto o gerador pagina, sem juntar o histórico inteiro em memória
+        total, batch = 0, []
+        for trade in trades:
+            batch.append(trade)
+            if len(batch) >= BATCH:
+                total += self.append(batch)
+                batch = []
+        if batch:
+            total += self.append(batch)
+        return total
+
+    def _where(self, symbol, start_time, end_time):
+        query, params = 'WHERE symbol = ?', [symbol]
+        if start_time is not None:
+            query += ' AND time >= ?'
+            params.append(to_ms(start_time))
+        if end_time is not None:
+            query += ' AND time <= ?'
+            params.append(to_ms(end_time))
+        return query, params
+
+def _value(value, kind):
+    if kind == "REAL":
+        return float(value)
+    if kind == "INTEGER":
+        return int(value)
+    return value
@@ -0,0 +1,290 @@
+import json
+import logging
+import threading
+import time
+
+import websocket
+
+class AccountState:
+    """
+    Espelho local de posições, saldos e margem da conta de futuros.
+
+    É atualizado pelos eventos do user-data stream (ACCOUNT_UPDATE,
+    ORDER_TRADE_UPDATE e ACCOUNT_CONFIG_UPDATE) e reconciliado via REST a cada
+    (re)conexão. Entre `begin_snapshot` e `end_snapshot` os eventos ficam
+    guardados e são aplicados, na ordem, sobre o snapshot: a resposta REST
+    nunca sobrescreve um evento mais novo. As leituras não fazem nenhuma
+    chamada de rede.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.positions = {} # (symbol, positionSide) -> posição
+        self.balances = {} # asset -> saldo
+        self.leverage = {} # symbol -> alavancagem
+        self.orders = {} # clientOrderId -> último estado da ordem
+        self.listeners = [] # chamados com o estado de cada ORDER_TRADE_UPDATE
+        self.synced = False
+        self.last_event_time = None
+        self._buffer = None # eventos recebidos durante o snapshot REST
+
+    def load_positions(self, position_risk):
+        # resposta de /fapi/v2/positionRisk
+        with self.lock:
+            self.positions = {}
+            for item in position_risk:
+                symbol = item["symbol"]
+                self.leverage[symbol] = float(item.get("leverage", 1))
+                self._set_position(
+                    symbol,
+                    item.get("positionSide", "BOTH"),
+                    float(item["positionAmt"]),
+                    float(item["entryPrice"]),
+                    float(item.get("unRealizedProfit", 0)),
+                    item.get("marginType", "cross"),
+                )
+
+    def load_account(self, account):
+        # resposta de /fapi/v2/account
+        with self.lock:
+            for asset in account.get("assets", []):
+                self.balances[asset["asset"]] = {
+                    "walletBalance": float(asset["walletBalance"]),
+                    "crossWalletBalance": float(asset.get("crossWalletBalance", asset["walletBalance"])),
+                }
+            for item in account.get("positions", []):
+                key = (item["symbol"], item.get("positionSide", "BOTH"))
+                if "leverage" in item:
+                    self.leverage[item["symbol"]] = float(item["leverage"])
+                if key in self.positions:
+                    self.positions[key]["initialMargin"] = float(item["initialMargin"])
+            # durante um snapshot, só depois de reaplicar os eventos guardados (end_snapshot)
+            self.synced = self._buffer is None
+
+    def begin_snapshot(self):
+        with self.lock:
+            self._buffer = []
+
+    def end_snapshot(self, synced=True):
+        # reaplica os eventos guardados; os que chegam durante a reaplicação entram na mesma fila
+        while True:
+            with self.lock:
+                events = self._buffer or []
+                if not events:
+                    self._buffer = None
+                    self.synced = synced
+                    return
+                self._buffer = []
+            for event in events:
+                self._apply(event)
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def apply_event(self, event):
+        with self.lock:
+            if self._buffer is not None:
+                self._buffer.append(event)
+                return
+        self._apply(event)
+
+    def _apply(self, event):
+        event_type = event.get("e")
+        order = None
+        with self.lock:
+            self.last_event_time = event.get("E")
+            if event_type == "ACCOUNT_UPDATE":
+                for balance in event["a"].get("B", []):
+                    self.balances[balance["a"]] = {
+                        "walletBalance": float(balance["wb"]),
+                        "crossWalletBalance": float(balance["cw"]),
+                    }
+                for item in event["a"].get("P", []):
+                    self._set_position(
+                        item["s"],
+                        item.get("ps", "BOTH"),
+                        float(item["pa"]),
+                        float(item["ep"]),
+                        float(item.get("up", 0)),
+                        item.get("mt", "cross"),
+                    )
+            elif event_type == "ORDER_TRADE_UPDATE":
+                data = event["o"]
+                order = self.orders[data["c"]] = {
+                    "clientOrderId": data["c"],
+                    "symbol": data["s"],
+                    "side": data["S"],
+                    "status": data["X"],
+                    "executionType": data["x"],
+                    "filledQty": float(data["z"]),
+                    "lastFilledPrice": float(data["L"]),
+                    "avgPrice": float(data.get("ap", 0)),
+                    "lastFilledQty": float(data.get("l", 0)),
+                    "realizedProfit": float(data.get("rp", 0)),
+                    # comissão em USDT; em outro ativo (ex.: BNB) não entra no PnL
+                    "commission": float(data.get("n", 0)) if data.get("N", "USDT") == "USDT" else 0.0,
+                }
+            elif event_type == "ACCOUNT_CONFIG_UPDATE" and "ac" in event:
+                symbol = event["ac"]["s"]
+                self.leverage[symbol] = float(event["ac"]["l"])
+                for key, position in self.positions.items():
+                    if key[0] == symbol:
+                        position["initialMargin"] = self._initial_margin(symbol, position)
+
+        # fora do lock: os listeners podem ler o próprio espelho
+        if order is not None:
+            for listener in self.listeners:
+                listener(dict(order))
+
+    def get_open_positions(self, symbol):
+        # mesmo formato de BinanceFutures.get_open_positions
+        with self.lock:
+            positions = [dict(p) for (s, _), p in self.positions.items() if s == symbol and p["positionAmt"] != 0]
+
+        for position in positions:
+            if position["positionAmt"] > 0:
+                position["side"] = "SELL"
+                position["currentSide"] = "BUY"
+            else:
+                position["side"] = "BUY"
+                position["currentSide"] = "SELL"
+            position["positionAmt"] = str(position["positionAmt"])
+            position["entryPrice"] = str(position["entryPrice"])
+
+        return positions
+
+    def get_position(self, symbol, position_side="BOTH"):
+        # (quantidade com sinal, preço de entrada, alavancagem) ou None; caminho rápido dos stops
+        with self.lock:
+            position = self.positions.get((symbol, position_side))
+            if position is None:
+                return None
+            return position["positionAmt"], position["entryPrice"], self.leverage.get(symbol, 1)
+
+    def get_position_margin(self):
+        # equivalente local de totalInitialMargin
+        with self.lock:
+            return sum(p["initialMargin"] for p in self.positions.values())
+
+    def get_balance(self, asset):
+        with self.lock:
+            return dict(self.balances.get(asset, {}))
+
+    def _set_position(self, symbol, position_side, amount, entry_price, unrealized, margin_type):
+        key = (symbol, position_side)
+        if amount == 0:
+            self.positions.pop(key, None)
+            return
+
+        position = {
+            "symbol": symbol,
+            "positionSide": position_side,
+            "positionAmt": amount,
+            "entryPrice": entry_price,
+            "unRealizedProfit": unrealized,
+            "marginType": margin_type,
+        }
+        position["initialMargin"] = self._initial_margin(symbol, position)
+        self.positions[key] = position
+
+    def _initial_margin(self, symbol, position):
+        # margem inicial estimada pelo preço de entrada
+        leverage = self.leverage.get(symbol, 1) or 1
+        return abs(position["positionAmt"]) * position["entryPrice"] / leverage
+
+class UserDataStream:
+    """
+    Mantém o websocket do user-data stream de futuros (listenKey).
+
+    Renova o listenKey periodicamente, reconecta quando a conexão cai ou o
+    listenKey expira e reconcilia o AccountState via REST a cada conexão,
+    em outra thread para não segurar os eventos do stream.
+    """
+
+    def __init__(self, binance, state, keepalive_interval=30 * 60, reconnect_delay=5):
+        self.binance = binance
+        self.state = state
+        self.keepalive_interval = keepalive_interval
+        self.reconnect_delay = reconnect_delay
+        self.listen_key = None
+        self.ws = None
+        self.logger = logging.getLogger(__name__)
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        self._stop.clear()
+        for target in (self._run, self._keepalive):
+            thread = threading.Thread(target=target, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        if self.ws is not None:
+            self.ws.close()
+        if self.listen_key is not None:
+            try:
+                self.binance.close_listen_key()
+            except Exception as e:
+                self.logger.error(f'USER STREAM CLOSE: {str(e)}')
+        self.listen_key = None
+
+    def reconcile(self):
+        # estado completo via REST, usado a cada (re)conexão; os eventos que chegam
+        # enquanto isso são aplicados depois, sobre o snapshot
+        synced = False
+        self.state.begin_snapshot()
+        try:
+            self.state.load_positions(self.binance.request('GET', '/fapi/v2/positionRisk'))
+            self.state.load_account(self.binance.request('GET', '/fapi/v2/account'))
+            synced = True
+        except Exception as e:
+            self.logger.error(f'USER STREAM RECONCILE: {str(e)}')
+        finally:
+            self.state.end_snapshot(synced)
+
+    def on_open(self, ws):
+        threading.Thread(target=self.reconcile, daemon=True).start()
+
+    def on_message(self, ws, message):
+        event = json.loads(message)
+        if event.get("e") == "listenKeyExpired":
+            # força a reconexão com um novo listenKey
+            self.listen_key = None
+            ws.close()
+            return
+        self.state.apply_event(event)
+
+    def on_close(self, ws, status_code, message):
+        self.state.synced = False
+
+    def on_error(self, ws, error):
+        self.logger.error(f'USER STREAM: {str(error)}')
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                if self.listen_key is None:
+                    self.listen_key = self.binance.create_listen_key()["listenKey"]
+                self.ws = websocket.WebSocketApp(
+                    f"{self.binance.stream_url}/ws/{self.listen_key}",
+                    on_open=self.on_open,
+                    on_message=self.on_message,
+                    on_close=self.on_close,
+                    on_error=self.on_error,
+                )
+                self.ws.run_forever()
+            except Exception as e:
+                self.logger.error(f'USER STREAM: {str(e)}')
+            self.state.synced = False
+            self._stop.wait(self.reconnect_delay)
+
+    def _keepalive(self):
+        while not self._stop.wait(self.keepalive_interval):
+            if self.listen_key is None:
+                continue
+            try:
+                self.binance.keepalive_listen_key()
+            except Exception as e:
+                self.logger.error(f'USER STREAM KEEPALIVE: {str(e)}')
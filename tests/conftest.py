@@ -0,0 +1,19 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from scripts.log_setup import LOG_DIR_ENV
+
+@pytest.fixture(autouse=True, scope="session")
+def log_dir(tmp_path_factory):
+    # gateways criados nos testes gravam os logs em um diretório temporário, não em logs/
+    previous = os.environ.get(LOG_DIR_ENV)
+    os.environ[LOG_DIR_ENV] = str(tmp_path_factory.mktemp("logs"))
+    yield os.environ[LOG_DIR_ENV]
+    if previous is None:
+        del os.environ[LOG_DIR_ENV]
+    else:
+        os.environ[LOG_DIR_ENV] = previous
@@ -0,0 +1,201 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import asyncio
+import hashlib
+import hmac
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from aiohttp import web
+
+from scripts.async_gateway import AsyncBinanceFutures
+from scripts.binance_gateway import BinanceAPIError
+
+API_KEY = "test-key"
+API_SECRET = "test-secret"
+DELAY = 0.2 # latência simulada de cada endpoint
+
+def check_signature(request):
+    query, signature = request.query_string.rsplit("&signature=", 1)
+    expected = hmac.new(API_SECRET.encode(), query.encode(), hashlib.sha256).hexdigest()
+    return request.headers.get("X-MBX-APIKEY") == API_KEY and signature == expected
+
+def handler(payload):
+    async def handle(request):
+        await asyncio.sleep(float(request.query.get("delay", DELAY)))
+        if not check_signature(request):
+            return web.json_response({"code": -1022, "msg": "Signature for this request is not valid."}, status=400)
+        data = payload(request) if callable(payload) else payload
+        return web.json_response(data)
+    return handle
+
+def order(request):
+    return {"symbol": request.query["symbol"], "side": request.query["side"], "type": request.query["type"],
+            "origQty": request.query["quantity"], "reduceOnly": request.query.get("reduceOnly") == "true",
+            "status": "NEW"}
+
+async def exchange_info(request):
+    # sem assinatura, como na Binance
+    return web.json_response({"symbols": [{"symbol": "BTCUSDT", "status": "TRADING", "filters": [
+        {"filterType": "LOT_SIZE", "stepSize": "0.001", "minQty": "0.001", "maxQty": "1000"}]}]})
+
+async def bad_gateway(request):
+    # erro de um proxy na frente da API, sem o JSON da Binance
+    return web.Response(text="<html><body>502 Bad Gateway</body></html>", status=502, content_type="text/html")
+
+async def list_error(request):
+    return web.json_response([{"code": -1000}], status=400)
+
+async def start_server():
+    app = web.Application()
+    app.router.add_get("/fapi/v1/ping", bad_gateway)
+    app.router.add_get("/fapi/v1/ticker/price", list_error)
+    app.router.add_get("/fapi/v1/exchangeInfo", exchange_info)
+    app.router.add_post("/fapi/v1/order", handler(order))
+    app.router.add_get("/fapi/v2/positionRisk", handler([
+        {"symbol": "BTCUSDT", "positionAmt": "-0.001", "entryPrice": "30000.0"},
+        {"symbol": "ETHUSDT", "positionAmt": "0.0", "entryPrice": "0.0"},
+    ]))
+    app.router.add_get("/fapi/v2/account", handler({"totalInitialMargin": "1.50"}))
+    app.router.add_get("/fapi/v2/balance", handler([{"asset": "USDT", "balance": "1000.0"}]))
+    app.router.add_get("/fapi/v1/userTrades", handler(lambda request: [{"symbol": request.query["symbol"], "id": 1}]))
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}"
+
+def run(test):
+    async def main():
+        runner, base_url = await start_server()
+        try:
+            async with AsyncBinanceFutures(API_KEY, API_SECRET, base_url=base_url) as trader:
+                return await test(trader)
+        finally:
+            await runner.cleanup()
+    return asyncio.run(main())
+
+class TestAsyncGateway:
+    @pytest.fixture(autouse=True)
+    def init_trader(self):
+        self.symbol = "BTCUSDT"
+        self.quantity = 0.001
+
+    def test_market_orders(self):
+        """
+        Test if buy, sell and close orders are signed and return the order response
+        """
+        async def test(trader):
+            return await asyncio.gather(
+                trader.buy_market_order(self.symbol, self.quantity),
+                trader.sell_market_order(self.symbol, self.quantity),
+                trader.close_all_postions(self.symbol, self.quantity, 'BUY'),
+                trader.close_all_postions(self.symbol, self.quantity, 'SELL', reduce_only=True),
+            )
+        buy, sell, close, reduce = run(test)
+
+        assert buy['side'] == 'BUY' and buy['status'] == 'NEW'
+        assert sell['side'] == 'SELL' and sell['origQty'] == str(self.quantity)
+        assert close['side'] == 'BUY' and close['type'] == 'MARKET' and not close['reduceOnly']
+        assert reduce['side'] == 'SELL' and reduce['reduceOnly']
+
+    def test_order_filters(self):
+        """
+        Test if order quantities are rounded to the step size and invalid ones are rejected before sending
+        """
+        async def test(trader):
+            buy = await trader.buy_market_order(self.symbol, 0.0019)
+            with pytest.raises(BinanceAPIError) as error:
+                await trader.close_all_postions(self.symbol, 0.0004, 'SELL')
+            return buy, error.value
+        buy, error = run(test)
+
+        assert buy['origQty'] == "0.001"
+        assert error.code == -1013
+
+    def test_queries(self):
+        """
+        Test if positions, margin, balance and trade history are parsed like the sync gateway
+        """
+        async def test(trader):
+            end_time = datetime.now()
+            return (
+                await trader.get_open_positions(self.symbol),
+                await trader.get_position_margin(),
+                await trader.get_balance(),
+                await trader.get_trade_history(self.symbol, end_time - timedelta(days=1), end_time),
+            )
+        positions, margin, balance, trades = run(test)
+
+        assert len(positions) == 1
+        assert positions[0]['side'] == 'BUY'
+        assert positions[0]['currentSide'] == 'SELL'
+        assert margin == "1.50"
+        assert balance[0]['asset'] == 'USDT'
+        assert trades[0]['symbol'] == self.symbol
+
+    def test_snapshot_runs_concurrently(self):
+        """
+        Test if balance, margin and positions are fetched in parallel
+        """
+        async def test(trader):
+            start = time.perf_counter()
+            snapshot = await trader.snapshot(self.symbol)
+            return snapshot, time.perf_counter() - start
+        snapshot, elapsed = run(test)
+
+        assert snapshot['margin'] == "1.50"
+        assert len(snapshot['positions']) == 1
+        # três chamadas de DELAY segundos em paralelo, não em sequência
+        assert elapsed < 2 * DELAY
+
+    def test_timeout_and_cancellation(self):
+        """
+        Test if per-call timeouts raise and a pending call can be cancelled
+        """
+        async def test(trader):
+            with pytest.raises(asyncio.TimeoutError):
+                await trader.request('GET', '/fapi/v2/balance', {"delay": 1}, timeout=0.05)
+
+            task = asyncio.create_task(trader.request('GET', '/fapi/v2/balance', {"delay": 1}))
+            await asyncio.sleep(0.05)
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+        run(test)
+
+    def test_api_error(self):
+        """
+        Test if an invalid signature is raised as BinanceAPIError
+        """
+        async def test(trader):
+            trader.secret_key = "wrong-secret"
+            with pytest.raises(BinanceAPIError) as error:
+                await trader.get_balance()
+            return error.value
+        error = run(test)
+
+        assert error.status == 400
+        assert error.code == -1022
+
+    def test_non_json_error(self):
+        """
+        Test if an HTML or list error body is raised as BinanceAPIError with the raw text as message
+        """
+        async def test(trader):
+            errors = []
+            for endpoint in ("/fapi/v1/ping", "/fapi/v1/ticker/price"):
+                with pytest.raises(BinanceAPIError) as error:
+                    await trader.request('GET', endpoint, signed=False)
+                errors.append(error.value)
+            return errors
+        html, listed = run(test)
+
+        assert (html.status, html.code) == (502, None)
+        assert "502 Bad Gateway" in html.message
+        assert (listed.status, listed.code) == (400, None)
+        assert "-1000" in listed.message
@@ -0,0 +1,47 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import numpy as np
+import pytest
+
+from scripts.backtest import compare_with_live, run_backtest
+
+class TestBacktest:
+    @pytest.fixture(autouse=True)
+    def init_klines(self):
+        rng = np.random.default_rng(7)
+        size = 5000
+        self.close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, size)))
+        self.high = self.close * 1.001
+        self.low = self.close * 0.999
+        self.open_time = np.arange(size) * 60000
+
+    @pytest.mark.parametrize("params", [
+        {"stop_gain": 10, "stop_loss": 10},
+        {"stop_gain": 3, "stop_loss": 20, "rsi_period": 7, "rsi_oversold": 25, "rsi_overbought": 75},
+    ])
+    def test_matches_live_replay(self, params):
+        """
+        Test if the vectorized backtest produces the same trades as replaying SymbolStrategy
+        """
+        comparison = compare_with_live(self.open_time, self.high, self.low, self.close, **params)
+
+        assert len(comparison['vectorized']) > 0
+        assert comparison['match']
+
+    def test_report(self):
+        """
+        Test if PnL, drawdown and equity are consistent with the trade list
+        """
+        result = run_backtest(self.close, stop_gain=10, stop_loss=10)
+        summary = result.summary()
+
+        assert summary['trades'] == len(result.trades)
+        assert summary['pnl'] == pytest.approx(result.trades['pnl'].sum())
+        assert summary['max_drawdown'] >= 0
+        assert len(result.equity) == len(self.close)
+        last_exit = result.trades['exit_index'][-1]
+        assert result.equity[last_exit] == pytest.approx(summary['pnl'])
+        # entradas só depois do fechamento do trade anterior
+        assert np.all(result.trades['entry_index'][1:] > result.trades['exit_index'][:-1])
@@ -0,0 +1,88 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import pytest
+
+from scripts.binance_gateway import BinanceFutures
+from scripts.mock_exchange import MockExchange
+from scripts.strategy import SymbolStrategy
+
+SYMBOLS = [f"S{i}USDT" for i in range(12)]
+
+class TestBatchOrders:
+    @pytest.fixture(autouse=True)
+    def init_exchange(self):
+        self.exchange = MockExchange(fee_rate=0.0)
+        for seed, symbol in enumerate(SYMBOLS):
+            self.exchange.add_synthetic_klines(symbol, "1m", count=50, seed=seed)
+        self.exchange.start()
+        self.trader = BinanceFutures(self.exchange.api_key, self.exchange.secret_key, base_url=self.exchange.base_url)
+        # relógio e filtros carregados antes: as contagens abaixo são só das chamadas de ordem
+        self.trader.sync_time()
+        self.trader.exchange_info.load()
+        yield
+        self.exchange.stop()
+
+    def calls(self, since):
+        return self.exchange.requests[since:]
+
+    def test_batch_orders(self):
+        """
+        Test if orders are sent five per request and each one reports its own result
+        """
+        orders = [{"symbol": symbol, "side": "BUY", "type": "MARKET", "quantity": 0.002} for symbol in SYMBOLS[:6]]
+        orders.append({"symbol": "NOPEUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.002})
+        start = len(self.exchange.requests)
+        results = self.trader.place_batch_orders(orders)
+
+        assert self.calls(start) == [("POST", "/fapi/v1/batchOrders")] * 2
+        assert all("orderId" in result for result in results[:6])
+        assert results[6]["code"] == -1121
+        assert [result["symbol"] for result in results[:6]] == SYMBOLS[:6]
+
+    def test_batch_retry_is_idempotent(self):
+        """
+        Test if a lost batch response is recovered by client id without duplicating orders
+        """
+        self.exchange.fail_next("POST", "/fapi/v1/batchOrders", "lost")
+        orders = [{"symbol": symbol, "side": "SELL", "type": "MARKET", "quantity": 0.001} for symbol in SYMBOLS[:3]]
+        results = self.trader.place_batch_orders(orders, backoff=0.01)
+
+        assert all("orderId" in result for result in results)
+        assert len(self.exchange.orders) == 3
+
+    def test_flatten_all(self):
+        """
+        Test if every open position is closed with its exact size in a few requests
+        """
+        for index, symbol in enumerate(SYMBOLS):
+            if index % 2:
+                self.trader.buy_market_order(symbol, 0.001 * (index + 1))
+            else:
+                self.trader.sell_market_order(symbol, 0.003)
+        start = len(self.exchange.requests)
+        results = self.trader.flatten_all()
+
+        assert len(results) == 12
+        assert all(result["reduceOnly"] for result in results)
+        assert self.calls(start) == [("GET", "/fapi/v2/positionRisk")] + [("POST", "/fapi/v1/batchOrders")] * 3
+        assert all(position["amount"] == 0 for position in self.exchange.positions.values())
+
+    def test_strategy_closes_real_size(self):
+        """
+        Test if the stop closes the actual position size instead of the configured volume
+        """
+        symbol = SYMBOLS[0]
+        self.trader.buy_market_order(symbol, 0.005)
+        strategy = SymbolStrategy(self.trader, symbol, "1m", 0.001, stop_gain=1, stop_loss=1)
+        price = self.exchange.prices[symbol]
+        strategy.seed([[0, price, price, price, price, 1]], price, closed=True)
+
+        # +10%: muito acima do stop gain de 1% de ROE
+        self.exchange.prices[symbol] = price * 1.1
+        strategy.on_kline({"t": 60000, "o": price, "h": price * 1.1, "l": price, "c": price * 1.1, "v": 1, "x": False})
+
+        assert self.exchange.positions[symbol]["amount"] == 0
+        assert self.exchange.orders[max(self.exchange.orders)]["reduceOnly"] is True
@@ -0,0 +1,21 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from benchmarks.bench_tick_to_order import STAGES, compare, run
+
+class TestTickToOrderBenchmark:
+    def test_replay_reports_stages(self):
+        """
+        Test if the replay times every stage and the comparison reads a previous result
+        """
+        result = run(messages=400, stop_gain=0.5, stop_loss=0.5)
+
+        assert result["meta"]["messages"] == 400
+        assert result["meta"]["orders"] > 0
+        assert result["messages_per_sec"] > 0
+        for stage in STAGES + ("total", "tick_to_order"):
+            assert result["stages"][stage]["count"] > 0
+            assert result["stages"][stage]["p50_us"] <= result["stages"][stage]["p99_us"] <= result["stages"][stage]["max_us"]
+        assert "msgs/sec: x1.00" in compare(result, result)
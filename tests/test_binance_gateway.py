@@ -8,6 +8,7 @@ import requests
 from dotenv import load_dotenv
 
 from binance_gateway import BinanceFutures
+from mock_exchange import MockExchange
 
 load_dotenv()
 
@@ -21,8 +22,24 @@ class TestBinanceGateway:
         self.start_time = self.end_time - timedelta(days=1) # 1 Day Interval
         self.symbol = "BTCUSDT" # symbol
         self.quantity = 0.001 # quantity trade
-        self.trader = BinanceFutures(self.api_key, self.secret_key, is_test=True)
-        
+        self.exchange = None
+
+        if self.api_key and self.secret_key:
+            self.trader = BinanceFutures(self.api_key, self.secret_key, is_test=True)
+        else:
+            # sem chaves da testnet: roda contra a corretora local
+            self.exchange = MockExchange()
+            self.exchange.add_synthetic_klines(self.symbol, "1m", seed=1)
+            self.exchange.start()
+            self.api_key = self.exchange.api_key
+            self.secret_key = self.exchange.secret_key
+            self.trader = BinanceFutures(self.api_key, self.secret_key, base_url=self.exchange.base_url)
+
+        yield
+
+        if self.exchange is not None:
+            self.exchange.stop()
+
     def test_buy_market_order(self):
         """
         Test if buy_market_order returns the expected response for a given symbol and quantity.
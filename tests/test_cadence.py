@@ -0,0 +1,153 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from unittest import mock
+
+import numpy as np
+import pytest
+
+from scripts.backtest import PaperGateway
+from scripts.indicators import IndicatorEngine
+from scripts.rate_limiter import ACCOUNT, RateLimitExceeded
+from scripts.strategy import SymbolStrategy
+
+def ticks(closes, ticks_per_candle=4, start=1):
+    # atualizações parciais seguidas do fechamento, como o stream de kline
+    for index, close in enumerate(closes):
+        open_time = (start + index) * 60000
+        for tick in range(1, ticks_per_candle + 1):
+            yield {"t": open_time, "o": close, "h": close * 1.001, "l": close * 0.999, "c": close, "v": 1.0,
+                   "x": tick == ticks_per_candle}
+
+class TestCadence:
+    @pytest.fixture(autouse=True)
+    def init_strategy(self):
+        self.gateway = PaperGateway()
+        self.gateway.price = 100.0
+        self.closes = 100 + np.cumsum(np.random.default_rng(3).normal(0, 0.5, 40))
+
+    def strategy(self, **kwargs):
+        strategy = SymbolStrategy(self.gateway, "BTCUSDT", "1m", 1.0, stop_gain=50, stop_loss=50, **kwargs)
+        strategy.seed([[0, 100, 100.1, 99.9, 100, 1]], 100.0, closed=True)
+        strategy.indicators.update = mock.Mock(wraps=strategy.indicators.update)
+        return strategy
+
+    def run(self, strategy, closes):
+        for kline in ticks(closes):
+            self.gateway.price = kline["c"]
+            strategy.on_kline(kline)
+
+    def test_close_cadence(self):
+        """
+        Test if only closed klines reach the indicators and signals in close mode
+        """
+        strategy = self.strategy(cadence="close")
+        self.run(strategy, self.closes)
+
+        assert strategy.indicators.update.call_count == len(self.closes)
+        assert all(call.args[3] for call in strategy.indicators.update.call_args_list)
+
+    def test_throttle_cadence(self):
+        """
+        Test if throttling limits partial evaluations but never skips a close
+        """
+        strategy = self.strategy(cadence="throttle", max_rate=0.001)
+        self.run(strategy, self.closes)
+
+        # o primeiro tick parcial e todos os fechamentos
+        assert strategy.indicators.update.call_count == len(self.closes) + 1
+
+    def test_stops_run_on_skipped_ticks(self):
+        """
+        Test if stop loss is checked on partial ticks even when signals wait for the close
+        """
+        strategy = self.strategy(cadence="close")
+        self.gateway.price = 100.0
+        self.gateway.buy_market_order("BTCUSDT", 1.0)
+        # 20x: -3% no preço = -60% de ROE
+        kline = {"t": 60000, "o": 100, "h": 100, "l": 97, "c": 97.0, "v": 1.0, "x": False}
+        self.gateway.price = 97.0
+        strategy.on_kline(kline)
+
+        assert self.gateway.position is None
+        assert strategy.gross_pnl == pytest.approx(-3.0)
+        assert strategy.indicators.update.call_count == 0
+
+    def test_rest_reads_follow_cadence(self):
+        """
+        Test if skipped ticks reuse the last REST position read instead of fetching it again
+        """
+        self.gateway.synced = False
+        self.gateway.get_open_positions = mock.Mock(wraps=self.gateway.get_open_positions)
+        strategy = self.strategy(cadence="close")
+        self.run(strategy, self.closes)
+
+        orders = len(self.gateway.trades) * 2 + (self.gateway.position is not None)
+        assert self.gateway.get_open_positions.call_count <= len(self.closes) + orders + 1
+
+    def test_shed_position_read(self):
+        """
+        Test if a position read shed by the rate limiter skips the evaluation instead of raising
+        """
+        self.gateway.synced = False
+        strategy = self.strategy()
+        self.gateway.get_open_positions = mock.Mock(side_effect=RateLimitExceeded(ACCOUNT, 1.0))
+        strategy.on_kline({"t": 60000, "o": 100, "h": 100, "l": 100, "c": 100.0, "v": 1.0, "x": False})
+        strategy.cadence = "close"
+        strategy.on_kline({"t": 60000, "o": 100, "h": 100, "l": 100, "c": 100.0, "v": 1.0, "x": False})
+        strategy.on_mark_price({"e": "markPriceUpdate", "s": "BTCUSDT", "p": "100.0"})
+        assert self.gateway.get_open_positions.call_count == 3
+
+        # com orçamento de novo, a próxima avaliação lê a posição normalmente
+        self.gateway.get_open_positions = mock.Mock(return_value=[])
+        strategy.on_kline({"t": 60000, "o": 100, "h": 100, "l": 100, "c": 100.0, "v": 1.0, "x": True})
+        assert self.gateway.get_open_positions.call_count == 1
+
+    def test_seed_boundary(self):
+        """
+        Test if only closed candles are seeded and the stream's candles (repeated or missed) are applied once
+        """
+        rows = [[i * 60000, c, c + 1, c - 1, c, 1.0, i * 60000 + 59999] for i, c in enumerate(self.closes)]
+        # o último de /klines está em aberto: ainda sem o fechamento final
+        rest = rows[:30] + [[30 * 60000, 0, 1e6, 0, 1.0, 1.0, 30 * 60000 + 59999]]
+
+        def stream(row, closed=True):
+            return {"t": row[0], "o": row[1], "h": row[2], "l": row[3], "c": row[4], "v": row[5], "x": closed}
+
+        def expected(count):
+            engine = IndicatorEngine()
+            engine.seed([r[2] for r in rows[:count]], [r[3] for r in rows[:count]], [r[4] for r in rows[:count]])
+            return engine.rsi.value, engine.atr.value
+
+        strategy = SymbolStrategy(self.gateway, "BTCUSDT", "1m", 1.0, stop_gain=50, stop_loss=50, cadence="close")
+        strategy.seed(rest, 100.0)
+        assert strategy.candles.last_open_time == 29 * 60000
+        strategy.on_kline(stream(rows[30], closed=False))
+        strategy.on_kline(stream(rows[30]))
+        strategy.on_kline(stream(rows[31]))
+        assert (strategy.indicators.rsi.value, strategy.indicators.atr.value) == expected(32)
+
+        # seed já fechado (ex.: KlineStore) e o fechamento do último candle chegando de novo pelo stream
+        strategy = SymbolStrategy(self.gateway, "BTCUSDT", "1m", 1.0, stop_gain=50, stop_loss=50, cadence="close")
+        strategy.seed(rows[:30], 100.0, closed=True)
+        strategy.on_kline(stream(rows[29]))
+        strategy.on_kline(stream(rows[30]))
+        assert (strategy.indicators.rsi.value, strategy.indicators.atr.value) == expected(31)
+
+        # fechamento do candle 30 perdido antes da assinatura: vem de /klines antes do 31
+        history = mock.Mock(return_value=rows[30:33])
+        strategy = SymbolStrategy(self.gateway, "BTCUSDT", "1m", 1.0, stop_gain=50, stop_loss=50, cadence="close",
+                                  history=history)
+        strategy.seed(rest, 100.0)
+        strategy.on_kline(stream(rows[31]))
+        assert history.call_args.kwargs["start_time"] == 30 * 60000
+        assert list(strategy.candles.open_times()[-2:]) == [30 * 60000, 31 * 60000]
+        assert (strategy.indicators.rsi.value, strategy.indicators.atr.value) == expected(32)
+
+    def test_invalid_cadence(self):
+        """
+        Test if an unknown cadence is rejected
+        """
+        with pytest.raises(ValueError):
+            self.strategy(cadence="sometimes")
@@ -0,0 +1,63 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+import numpy as np
+import pytest
+
+from candle_buffer import CandleBuffer
+
+def make_kline(open_time, close, closed=False):
+    return {'t': open_time, 'o': str(close), 'h': str(close + 1), 'l': str(close - 1),
+            'c': str(close), 'v': '10', 'x': closed}
+
+class TestCandleBuffer:
+    @pytest.fixture(autouse=True)
+    def init_buffer(self):
+        self.buffer = CandleBuffer("BTCUSDT", "1m", size=5)
+        # formato da resposta de /api/v3/klines
+        klines = [[i * 60000, str(i), str(i + 1), str(i - 1), str(i), '10', i * 60000 + 59999] for i in range(1, 4)]
+        self.buffer.seed(klines)
+
+    def test_seed(self):
+        """
+        Test if seed loads the REST klines in order and marks the last candle as open
+        """
+        assert len(self.buffer) == 3
+        assert list(self.buffer.closes()) == [1.0, 2.0, 3.0]
+        assert self.buffer.last_open_time == 3 * 60000
+        assert self.buffer.closed is False
+
+    def test_update_open_candle_in_place(self):
+        """
+        Test if updates for the open candle overwrite it instead of appending
+        """
+        closed = self.buffer.update(make_kline(3 * 60000, 3.5))
+
+        assert closed is False
+        assert len(self.buffer) == 3
+        assert self.buffer.closes()[-1] == 3.5
+
+    def test_rollover_on_new_candle(self):
+        """
+        Test if a closed candle followed by a new open time rolls the buffer over
+        """
+        assert self.buffer.update(make_kline(3 * 60000, 3.2, closed=True)) is True
+        self.buffer.update(make_kline(4 * 60000, 4.0))
+        self.buffer.update(make_kline(5 * 60000, 5.0))
+        self.buffer.update(make_kline(6 * 60000, 6.0))
+
+        closes = self.buffer.closes()
+        assert len(self.buffer) == 5
+        assert list(closes) == [2.0, 3.2, 4.0, 5.0, 6.0]
+        # a janela é uma view contígua do array interno
+        assert closes.flags['C_CONTIGUOUS']
+        assert np.shares_memory(closes, self.buffer._data)
+
+    def test_ignores_stale_kline(self):
+        """
+        Test if a kline older than the newest candle is ignored
+        """
+        self.buffer.update(make_kline(1 * 60000, 99.0, closed=True))
+
+        assert list(self.buffer.closes()) == [1.0, 2.0, 3.0]
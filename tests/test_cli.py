@@ -0,0 +1,90 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+import subprocess
+import time
+
+import pytest
+
+from scripts.cli import Daemon, load_config
+from scripts.mock_exchange import MockExchange
+
+class TestCli:
+    @pytest.fixture(autouse=True)
+    def init_exchange(self):
+        with MockExchange() as exchange:
+            exchange.add_synthetic_klines("BTCUSDT", "1m", count=600, seed=3)
+            exchange.add_synthetic_klines("ETHUSDT", "1m", count=600, seed=4)
+            self.exchange = exchange
+            yield
+
+    def test_config_from_file(self, tmp_path):
+        """
+        Test if the config file is read, with keys taken from the environment when missing
+        """
+        path = tmp_path / "bots.json"
+        path.write_text(json.dumps({"bots": [{"symbol": "BTCUSDT", "interval": "1m", "volume": 0.001,
+                                              "stop_gain": 1, "stop_loss": 1, "cadence": "close"}]}))
+        config = load_config(str(path), {"BINANCE_API_KEY": "key", "BINANCE_API_SECRET": "secret"})
+        assert config["api_key"] == "key"
+        assert config["is_test"] is True
+        assert config["bots"][0]["cadence"] == "close"
+
+        path.write_text(json.dumps({"api_key": "key", "api_secret": "secret", "bots": [{"symbol": "BTCUSDT", "leverage": 5}]}))
+        with pytest.raises(ValueError):
+            load_config(str(path), {})
+        # buffer_size/mode/mark_price valem para todos os symbols do processo
+        path.write_text(json.dumps({"api_key": "key", "api_secret": "secret", "bots": [{"symbol": "BTCUSDT", "buffer_size": 100}]}))
+        with pytest.raises(ValueError):
+            load_config(str(path), {})
+
+    def test_config_from_env(self):
+        """
+        Test if one bot per symbol is configured from environment variables
+        """
+        config = load_config(None, {"BINANCE_API_KEY": "key", "BINANCE_API_SECRET": "secret", "BINANCE_TESTNET": "false",
+                                    "BOT_SYMBOLS": "btcusdt, ETHUSDT", "BOT_VOLUME": "0.01", "BOT_INTERVAL": "5m"})
+        assert config["is_test"] is False
+        assert [bot["symbol"] for bot in config["bots"]] == ["BTCUSDT", "ETHUSDT"]
+        assert config["bots"][1]["interval"] == "5m"
+        assert config["bots"][1]["volume"] == 0.01
+        with pytest.raises(ValueError):
+            load_config(None, {"BOT_SYMBOLS": "BTCUSDT", "BOT_VOLUME": "0.01"})
+
+    def test_daemon(self):
+        """
+        Test if the daemon runs every symbol on one shared gateway and user stream, waits for the subscription and reports the cold start
+        """
+        config = {"api_key": self.exchange.api_key, "api_secret": self.exchange.secret_key,
+                  "base_url": self.exchange.base_url, "stream_url": self.exchange.stream_url, "buffer_size": 100,
+                  "bots": [{"symbol": symbol, "interval": "1m", "volume": 0.001, "stop_gain": 1, "stop_loss": 1}
+                           for symbol in ("BTCUSDT", "ETHUSDT")]}
+        daemon = Daemon(config, started=time.perf_counter(), subscribe_timeout=10)
+        try:
+            timings = daemon.start()
+            strategies = list(daemon.bot.strategies.values())
+            assert [strategy.symbol for strategy in strategies] == ["BTCUSDT", "ETHUSDT"]
+            assert all(strategy.binance is daemon.bot.binance for strategy in strategies)
+            assert all(len(strategy.candles) == 100 for strategy in strategies)
+            assert daemon.bot.subscribed.is_set()
+            assert 0 <= timings["imports"] <= timings["seeded"] <= timings["subscribed"]
+            # um único listenKey para a conta (criado pela thread do user stream)
+            deadline = time.monotonic() + 5
+            while daemon.bot.binance.user_stream.listen_key is None and time.monotonic() < deadline:
+                time.sleep(0.01)
+            assert [method for method, path in self.exchange.requests if path == "/fapi/v1/listenKey"] == ["POST"]
+        finally:
+            daemon.stop()
+        assert [method for method, path in self.exchange.requests if path == "/fapi/v1/listenKey"] == ["POST", "DELETE"]
+
+    def test_lazy_imports(self):
+        """
+        Test if importing the entry point loads neither the interface nor the bot dependencies
+        """
+        code = ("import sys; import scripts.cli; "
+                "print(sorted(m for m in ('tkinter', 'numpy', 'requests', 'websocket', 'dotenv', 'asyncio') if m in sys.modules))")
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True,
+                                cwd=os.path.join(os.path.dirname(__file__), '..')).stdout
+        assert output.strip() == "[]"
@@ -0,0 +1,73 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from unittest import mock
+
+import pytest
+
+from scripts.converter_currency import BOOK, ConversionError, CryptoConverter
+from scripts.mock_exchange import MockExchange
+
+class TestCryptoConverter:
+    @pytest.fixture(autouse=True)
+    def init_converter(self):
+        self.exchange = MockExchange()
+        self.exchange.prices.update({"BTCUSDT": 50000.0, "ETHUSDT": 2500.0, "BNBUSDT": 250.0})
+        self.exchange.start()
+        self.converter = CryptoConverter(base_url=f"{self.exchange.base_url}/api/v3", ttl=60)
+        yield
+        self.exchange.stop()
+
+    def calls(self):
+        return [path for _, path in self.exchange.requests]
+
+    def test_convert_is_cached(self):
+        """
+        Test if the quote amount is converted with the Binance price and cached within the TTL
+        """
+        assert self.converter.convert("BTC", "USDT", 100) == pytest.approx(0.002)
+        self.exchange.prices["BTCUSDT"] = 40000.0
+        assert self.converter.convert("BTC", "USDT", 100) == pytest.approx(0.002)
+        assert self.calls() == ["/api/v3/ticker/price"]
+
+        self.converter.ttl = 0
+        assert self.converter.convert("BTC", "USDT", 100) == pytest.approx(0.0025)
+
+    def test_convert_many(self):
+        """
+        Test if many pairs are priced with a single request
+        """
+        sizes = self.converter.convert_many([("BTC", "USDT", 100), ("ETH", "USDT", 100), ("BNB", "USDT", 50)])
+
+        assert sizes == pytest.approx([0.002, 0.04, 0.2])
+        assert self.calls() == ["/api/v3/ticker/price"]
+
+    def test_book_and_live_price(self):
+        """
+        Test if the book mid price is used and a live bot price skips the request
+        """
+        converter = CryptoConverter(base_url=f"{self.exchange.base_url}/api/v3", source=BOOK)
+        assert converter.price("ETH", "USDT") == pytest.approx(2500.0)
+        assert self.calls() == ["/api/v3/ticker/bookTicker"]
+
+        converter.add_live_price("BNBUSDT", lambda: 200.0)
+        assert converter.convert("BNB", "USDT", 100) == pytest.approx(0.5)
+        assert converter.convert_many([("BNB", "USDT", 100)]) == pytest.approx([0.5])
+        assert len(self.calls()) == 1
+
+        converter.remove_live_price("BNBUSDT")
+        assert converter.convert("BNB", "USDT", 100) == pytest.approx(0.4)
+        assert len(self.calls()) == 2
+
+    def test_fallback_and_missing_price(self):
+        """
+        Test if an unknown pair uses the fallback, and without one raises instead of returning None
+        """
+        fallback = mock.Mock(return_value=4.0)
+        converter = CryptoConverter(base_url=f"{self.exchange.base_url}/api/v3", fallback=fallback)
+        assert converter.convert_many([("BTC", "USDT", 100), ("XYZ", "USDT", 8)]) == pytest.approx([0.002, 2.0])
+        fallback.assert_called_once_with("XYZ", "USDT")
+
+        with pytest.raises(ConversionError):
+            self.converter.convert("XYZ", "USDT", 8)
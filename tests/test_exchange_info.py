@@ -0,0 +1,203 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+import threading
+import time
+from decimal import Decimal
+
+import pytest
+
+from scripts.binance_gateway import BinanceFutures, OrderError, close_orders, public_exchange_info
+from scripts.exchange_info import ExchangeInfo, FilterError, SymbolFilters, prepare_order
+from scripts.interface.validate_form import FormValidator
+from scripts.mock_exchange import MockExchange
+from scripts.trade_bot import BinanceTradingBot
+
+BTC = {
+    "symbol": "BTCUSDT", "status": "TRADING", "baseAsset": "BTC", "quoteAsset": "USDT",
+    "filters": [
+        {"filterType": "PRICE_FILTER", "tickSize": "0.10"},
+        {"filterType": "LOT_SIZE", "stepSize": "0.001", "minQty": "0.001", "maxQty": "1000"},
+        {"filterType": "MARKET_LOT_SIZE", "stepSize": "0.001", "minQty": "0.001", "maxQty": "120"},
+        {"filterType": "MIN_NOTIONAL", "notional": "100"},
+    ],
+}
+
+class TestExchangeInfo:
+    @pytest.fixture(autouse=True)
+    def init_exchange(self, tmp_path):
+        self.path = str(tmp_path / "exchange_info.json")
+        self.exchange = MockExchange()
+        self.exchange.add_synthetic_klines("BTCUSDT", "1m", count=600, seed=1)
+        self.exchange.add_synthetic_klines("ETHUSDT", "1m", count=600, seed=2)
+        self.exchange.start()
+        self.trader = BinanceFutures(self.exchange.api_key, self.exchange.secret_key, base_url=self.exchange.base_url,
+                                     exchange_info_path=self.path)
+        yield
+        self.exchange.stop()
+
+    def paths(self):
+        return [path for _, path in self.exchange.requests]
+
+    def test_filters(self):
+        """
+        Test if quantities and prices are rounded down to the symbol filters and checked against its limits
+        """
+        filters = SymbolFilters.from_symbol(BTC)
+        assert (filters.step_size, filters.tick_size, filters.min_qty, filters.min_notional) == \
+            (Decimal("0.001"), Decimal("0.1"), Decimal("0.001"), Decimal("100"))
+        assert filters.round_quantity(0.0129) == "0.012"
+        assert filters.round_quantity(0.0029999999999999996, nearest=True) == "0.003"
+        assert filters.round_price(30123.456) == "30123.4"
+        assert filters.quantity_for(500, 30000) == "0.016"
+
+        with pytest.raises(FilterError) as error:
+            filters.check("0.0005")
+        assert error.value.code == -1013
+        with pytest.raises(FilterError):
+            filters.check("0.0015")
+        with pytest.raises(FilterError):
+            filters.check("121")
+        with pytest.raises(FilterError) as error:
+            filters.check("0.003", price=30000)
+        assert error.value.code == -4164
+        filters.check("0.003", price=30000, reduce_only=True)
+        filters.check("121", market=False)
+
+    def test_disk_cache(self):
+        """
+        Test if exchangeInfo is fetched once, reused from disk while fresh and fetched again when stale
+        """
+        assert self.trader.symbol_filters("BTCUSDT").min_qty == Decimal("0.001")
+        assert self.trader.symbol_filters("NOPEUSDT") is None
+        assert self.paths().count("/fapi/v1/exchangeInfo") == 1
+
+        cached = ExchangeInfo(self.trader.get_exchange_info, path=self.path)
+        assert cached.symbols(quote_asset="USDT") == ["BTCUSDT", "ETHUSDT"]
+        assert cached.get("ETHUSDT").step_size == self.trader.symbol_filters("ETHUSDT").step_size
+        assert self.paths().count("/fapi/v1/exchangeInfo") == 1
+
+        with open(self.path) as file:
+            cache = json.load(file)
+        cache["updated"] = time.time() - 2 * cached.max_age
+        with open(self.path, "w") as file:
+            json.dump(cache, file)
+        ExchangeInfo(self.trader.get_exchange_info, path=self.path).get("BTCUSDT")
+        assert self.paths().count("/fapi/v1/exchangeInfo") == 2
+
+        # vencido depois da primeira carga: a consulta não espera a API, que é lida em segundo plano
+        release = threading.Event()
+        def slow_fetch():
+            release.wait(5)
+            return self.trader.get_exchange_info()
+        info = ExchangeInfo(slow_fetch)
+        release.set()
+        assert info.get("BTCUSDT") is not None
+        release.clear()
+        info.updated -= 2 * info.max_age
+        start = time.perf_counter()
+        assert info.get("BTCUSDT").step_size == Decimal("0.001")
+        assert time.perf_counter() - start < 1
+        updated = info.updated
+        release.set()
+        deadline = time.time() + 5
+        while info.updated == updated and time.time() < deadline:
+            time.sleep(0.01)
+        assert time.time() - info.updated < 60
+
+        # falha na API: segue sem filtros e não tenta de novo a cada consulta
+        failing = ExchangeInfo(lambda: {"code": -1000, "msg": "unknown"})
+        assert failing.get("BTCUSDT") is None
+        assert failing.get("BTCUSDT") is None
+        assert failing.symbols() == []
+
+    def test_local_rejection(self):
+        """
+        Test if orders are rounded to the step size and invalid ones are rejected before any request
+        """
+        self.trader.sync_time()
+        self.trader.exchange_info.load()
+        start = len(self.exchange.requests)
+        response = self.trader.buy_market_order("BTCUSDT", 0.0019)
+        assert response["origQty"] == "0.001"
+        assert self.paths()[start:] == ["/fapi/v1/order"]
+
+        start = len(self.exchange.requests)
+        response = self.trader.sell_market_order("BTCUSDT", 0.0004)
+        assert response["code"] == -1013
+        with pytest.raises(OrderError):
+            self.trader.place_order({"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.0001})
+        results = self.trader.place_batch_orders([
+            {"symbol": "BTCUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.0001},
+            {"symbol": "ETHUSDT", "side": "BUY", "type": "MARKET", "quantity": 0.0025},
+        ])
+        assert results[0]["code"] == -1013
+        assert results[1]["origQty"] == "0.002"
+        assert self.paths()[start:] == ["/fapi/v1/batchOrders"]
+
+    def test_hedge_close_small_leg(self):
+        """
+        Test if hedge-mode closes, which carry positionSide instead of reduceOnly, skip the minimum notional and round to nearest
+        """
+        filters = SymbolFilters.from_symbol(BTC)
+        orders = close_orders([
+            {"symbol": "BTCUSDT", "positionSide": "LONG", "positionAmt": "0.0029999999999999996"},
+            {"symbol": "BTCUSDT", "positionSide": "SHORT", "positionAmt": "-0.001"},
+        ])
+        assert [order["positionSide"] for order in orders] == ["LONG", "SHORT"]
+        assert not any("reduceOnly" in order for order in orders)
+
+        # 0.001 a 30000 fica abaixo do notional de 100, mas fecha uma perna: aceita
+        prepared = [prepare_order(filters, dict(order, type="LIMIT", price=30000)) for order in orders]
+        assert [order["quantity"] for order in prepared] == ["0.003", "0.001"]
+        # a mesma perna aberta com positionSide continua sujeita ao valor mínimo
+        with pytest.raises(FilterError) as error:
+            prepare_order(filters, {"symbol": "BTCUSDT", "side": "BUY", "positionSide": "LONG", "type": "LIMIT",
+                                    "quantity": "0.001", "price": 30000})
+        assert error.value.code == -4164
+        prepare_order(filters, {"symbol": "BTCUSDT", "side": "BUY", "type": "LIMIT", "quantity": "0.001",
+                                "price": 30000}, closing=True)
+
+    def test_bot_volume(self):
+        """
+        Test if the bot volume is rounded to the step size and a volume below the minimum notional is refused
+        """
+        bot = BinanceTradingBot(self.exchange.api_key, self.exchange.secret_key, "BTCUSDT", "1m", 0.0129, 1, 1,
+                                base_url=self.exchange.base_url, mark_price=False)
+        assert bot.quantity == bot.strategy.quantity == 0.012
+        bot.stop()
+
+        self.exchange.filters["ETHUSDT"] = {"notional": "5"}
+        with pytest.raises(FilterError):
+            BinanceTradingBot(self.exchange.api_key, self.exchange.secret_key, "ETHUSDT", "1m", 0.001, 1, 1,
+                              base_url=self.exchange.base_url, mark_price=False)
+
+    def test_form_validator(self):
+        """
+        Test if the form accepts the symbols listed in exchangeInfo and checks the minimum notional
+        """
+        self.exchange.filters["ETHUSDT"] = {"notional": "50"}
+        form = dict(api_key="key", api_secret="secret", quantity="40", interval="1m", stop_gain="1", stop_loss="1",
+                    account_mode="1", exchange_info=self.trader.exchange_info)
+        assert FormValidator(symbol="BTCUSDT", **form).validate() is None
+        assert "symbol" in FormValidator(symbol="XRPUSDT", **form).validate()
+        assert "quantity" in FormValidator(symbol="ETHUSDT", **form).validate()
+        # sem exchangeInfo vale a lista fixa
+        assert FormValidator(symbol="XRPUSDT", **{**form, "exchange_info": None}).validate() is None
+
+    def test_public_background_load(self):
+        """
+        Test if the public exchangeInfo loads in a background thread, without keys, and is saved to the disk cache
+        """
+        exchange_info = public_exchange_info(base_url=self.exchange.base_url, path=self.path)
+        exchange_info.refresh_in_background()
+        assert exchange_info.loading()
+        deadline = time.monotonic() + 5
+        while exchange_info.loading() and time.monotonic() < deadline:
+            time.sleep(0.01)
+        assert not exchange_info.loading() and not exchange_info.expired()
+        assert exchange_info.get("BTCUSDT").base_asset == "BTC"
+        assert self.paths() == ["/fapi/v1/exchangeInfo"]
+        assert os.path.exists(self.path)
@@ -0,0 +1,55 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+import numpy as np
+import pytest
+import tulipy as ti
+
+from indicators import IndicatorEngine, WilderATR, WilderRSI
+
+class TestIndicators:
+    @pytest.fixture(autouse=True)
+    def init_prices(self):
+        rng = np.random.default_rng(42)
+        self.period = 14
+        self.closes = 100 + np.cumsum(rng.normal(0, 1, 300))
+        self.highs = self.closes + rng.uniform(0, 2, 300)
+        self.lows = self.closes - rng.uniform(0, 2, 300)
+
+    def test_rsi_matches_tulipy(self):
+        """
+        Test if the streaming RSI reproduces tulipy.rsi exactly on the same closes
+        """
+        rsi = WilderRSI(self.period)
+        values = [rsi.update(close) for close in self.closes]
+        expected = ti.rsi(self.closes, self.period)
+
+        assert values[:self.period] == [None] * self.period
+        assert np.array_equal(np.array(values[self.period:]), expected)
+
+    def test_atr_matches_tulipy(self):
+        """
+        Test if the streaming ATR reproduces tulipy.atr exactly on the same OHLC data
+        """
+        atr = WilderATR(self.period)
+        values = [atr.update(h, l, c) for h, l, c in zip(self.highs, self.lows, self.closes)]
+        expected = ti.atr(self.highs, self.lows, self.closes, self.period)
+
+        assert values[:self.period - 1] == [None] * (self.period - 1)
+        assert np.array_equal(np.array(values[self.period - 1:]), expected)
+
+    def test_provisional_updates_do_not_change_state(self):
+        """
+        Test if intrabar updates are provisional and only the closing tick is committed
+        """
+        engine = IndicatorEngine(self.period, self.period)
+        engine.seed(self.highs[:-1], self.lows[:-1], self.closes[:-1])
+
+        # ticks do candle em aberto antes do fechamento
+        for shift in (-3.0, 5.0, 0.5):
+            engine.update(self.highs[-1], self.lows[-1], self.closes[-1] + shift, closed=False)
+        rsi, atr = engine.update(self.highs[-1], self.lows[-1], self.closes[-1], closed=True)
+
+        assert rsi == ti.rsi(self.closes, self.period)[-1]
+        assert atr == ti.atr(self.highs, self.lows, self.closes, self.period)[-1]
@@ -0,0 +1,117 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import zipfile
+
+import numpy as np
+import pytest
+
+from scripts.kline_store import KlineStore
+
+MINUTE = 60000
+BASE = 1704067200000 # 2024-01-01
+
+def klines(start, count):
+    return [[BASE + i * MINUTE, str(i), str(i + 1), str(i - 1), str(i + 0.5), '10', BASE + i * MINUTE + MINUTE - 1]
+            for i in range(start, start + count)]
+
+class FakeMarket:
+    # pagina /klines a partir de start_time, como a API
+    def __init__(self, total):
+        self.rows = klines(0, total)
+        self.calls = 0
+
+    def get_historical_klines(self, symbol, interval, limit, start_time=None, end_time=None):
+        self.calls += 1
+        return [row for row in self.rows if row[0] >= (start_time or 0)][:limit]
+
+class TestKlineStore:
+    @pytest.fixture(autouse=True)
+    def init_store(self, tmp_path):
+        self.tmp_path = tmp_path
+        self.store = KlineStore(str(tmp_path / "klines"))
+        self.symbol = "BTCUSDT"
+        self.interval = "1m"
+
+    def test_append_is_incremental(self):
+        """
+        Test if appends only add candles newer than the last stored one
+        """
+        assert self.store.append(self.symbol, self.interval, klines(0, 10)) == 10
+        assert self.store.append(self.symbol, self.interval, klines(5, 10)) == 5
+
+        columns = self.store.load(self.symbol, self.interval)
+        assert np.array_equal(columns["open_time"], BASE + np.arange(15) * MINUTE)
+        assert columns["close"][-1] == 14.5
+
+    def test_slice_is_zero_copy(self):
+        """
+        Test if slicing by time range returns views on the memory-mapped columns
+        """
+        self.store.append(self.symbol, self.interval, klines(0, 100))
+        window = self.store.slice(self.symbol, self.interval, BASE + 10 * MINUTE, BASE + 20 * MINUTE)
+
+        assert isinstance(window["close"], np.memmap)
+        assert window["open_time"][0] == BASE + 10 * MINUTE
+        assert len(window["open_time"]) == 10
+
+    def test_download_paginates(self):
+        """
+        Test if download pages through /klines and resumes from the last stored candle
+        """
+        market = FakeMarket(2500)
+        assert self.store.download(market, self.symbol, self.interval, limit=1000) == 2500
+        assert market.calls == 3
+
+        market.rows += klines(2500, 10)
+        assert self.store.download(market, self.symbol, self.interval, limit=1000) == 10
+        assert self.store.count(self.symbol, self.interval) == 2510
+
+    def test_import_bulk_csv(self):
+        """
+        Test if Binance bulk CSV dumps (plain or zipped, with header or microseconds) are imported
+        """
+        header = "open_time,open,high,low,close,volume,close_time\n"
+        plain = self.tmp_path / "BTCUSDT-1m-2024-01.csv"
+        plain.write_text(header + "".join(",".join(map(str, row)) + "\n" for row in klines(0, 5)))
+        archive = self.tmp_path / "BTCUSDT-1m-2024-02.zip"
+        with zipfile.ZipFile(archive, "w") as file:
+            rows = [[row[0] * 1000] + row[1:] for row in klines(5, 5)]
+            file.writestr("BTCUSDT-1m-2024-02.csv", "".join(",".join(map(str, row)) + "\n" for row in rows))
+
+        assert self.store.import_csv(self.symbol, self.interval, [str(plain), str(archive)]) == 10
+        assert self.store.last_open_time(self.symbol, self.interval) == BASE + 9 * MINUTE
+
+    def test_tail_and_interrupted_append(self):
+        """
+        Test if tail returns /klines rows and a partially written append is discarded
+        """
+        self.store.append(self.symbol, self.interval, klines(0, 10))
+        with open(self.store.column_path(self.symbol, self.interval, "close"), "ab") as file:
+            file.write(np.float64(1.0).tobytes())
+
+        rows = self.store.tail(self.symbol, self.interval, 3)
+        assert rows.shape == (3, 6)
+        assert list(rows[:, 0]) == [BASE + 7 * MINUTE, BASE + 8 * MINUTE, BASE + 9 * MINUTE]
+        assert self.store.append(self.symbol, self.interval, klines(10, 1)) == 1
+        assert self.store.load(self.symbol, self.interval)["close"][-1] == 10.5
+
+    def test_recent_backfills_or_refuses(self):
+        """
+        Test if the warm-up window is backfilled up to now and refused when stale or with gaps
+        """
+        self.store.append(self.symbol, self.interval, klines(0, 100))
+        market = FakeMarket(130)
+        # candle 130 em aberto
+        now = BASE + 130 * MINUTE + 5000
+        rows = self.store.recent(market, self.symbol, self.interval, 50, now=now)
+        assert list(rows[[0, -1], 0]) == [BASE + 80 * MINUTE, BASE + 129 * MINUTE]
+
+        # sem candles novos na API: o store ficou para trás
+        assert self.store.recent(market, self.symbol, self.interval, 50, now=now + 10 * MINUTE) is None
+
+        gaps = KlineStore(str(self.tmp_path / "gaps"))
+        gaps.append(self.symbol, self.interval, klines(0, 10) + klines(12, 5))
+        assert gaps.recent(FakeMarket(17), self.symbol, self.interval, 50, now=BASE + 17 * MINUTE) is None
+        assert gaps.recent(market, self.symbol, "1M", 50) is None
@@ -0,0 +1,104 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+import logging
+
+import pytest
+
+from scripts.binance_gateway import BinanceFutures
+from scripts.log_setup import (LOG_DIR_ENV, LOG_FILE, ROOT, JsonFormatter, QueueHandler, RotatingFileHandler, setup_logging,
+                               shutdown_logging, symbol_logger)
+
+class TestLogSetup:
+    @pytest.fixture(autouse=True)
+    def init_logging(self, tmp_path):
+        shutdown_logging()
+        self.log_dir = tmp_path
+        yield
+        shutdown_logging()
+
+    def read(self, name=LOG_FILE):
+        with open(os.path.join(self.log_dir, name), encoding='utf-8') as file:
+            return [json.loads(line) for line in file]
+
+    def test_json_with_context(self):
+        """
+        Test if records are written as JSON lines by the listener with the symbol context and exceptions
+        """
+        setup_logging(log_dir=str(self.log_dir))
+        logger = symbol_logger("scripts.trade_bot", "BTCUSDT", "1m")
+        logger.info("ORDER %s filled", 42)
+        try:
+            raise ValueError("boom")
+        except ValueError:
+            logger.exception("RUN")
+        logging.getLogger("scripts.multi_bot").error("MESSAGE", extra={"symbol": "ETHUSDT"})
+        shutdown_logging()
+
+        records = self.read()
+        assert [record["msg"] for record in records] == ["ORDER 42 filled", "RUN", "MESSAGE"]
+        assert records[0]["symbol"] == "BTCUSDT" and records[0]["interval"] == "1m"
+        assert records[0]["logger"] == "scripts.trade_bot"
+        assert "ValueError: boom" in records[1]["exc"]
+        assert records[2]["symbol"] == "ETHUSDT" and "interval" not in records[2]
+
+    def test_single_handler(self):
+        """
+        Test if creating several gateways installs the queue handler only once
+        """
+        setup_logging(log_dir=str(self.log_dir))
+        for _ in range(3):
+            BinanceFutures("key", "secret", base_url="http://127.0.0.1:1")
+        logging.getLogger("scripts.binance_gateway").warning("once")
+        shutdown_logging()
+
+        assert len([h for h in logging.getLogger(ROOT).handlers if isinstance(h, QueueHandler)]) == 0
+        assert [record["msg"] for record in self.read()] == ["once"]
+
+    def test_rotation(self):
+        """
+        Test if the file rotates by size and by time
+        """
+        setup_logging(log_dir=str(self.log_dir), max_bytes=500, backup_count=2, rotate_seconds=None)
+        logger = logging.getLogger("scripts.strategy")
+        for index in range(20):
+            logger.info(f"line {index}")
+        shutdown_logging()
+        assert os.path.exists(os.path.join(self.log_dir, LOG_FILE + ".1"))
+        assert not os.path.exists(os.path.join(self.log_dir, LOG_FILE + ".3"))
+        assert self.read()[-1]["msg"] == "line 19"
+
+        # por tempo: o handler direto, sem a thread do listener
+        handler = RotatingFileHandler(os.path.join(self.log_dir, "timed.log"), rotate_seconds=3600)
+        handler.setFormatter(JsonFormatter())
+        handler.emit(logging.makeLogRecord({"msg": "first"}))
+        handler.rollover_at = 0
+        handler.emit(logging.makeLogRecord({"msg": "second"}))
+        handler.close()
+        assert [record["msg"] for record in self.read("timed.log")] == ["second"]
+        assert [record["msg"] for record in self.read("timed.log.1")] == ["first"]
+
+    def test_full_queue_drops(self):
+        """
+        Test if a full queue drops records instead of blocking the caller
+        """
+        listener = setup_logging(log_dir=str(self.log_dir), max_queue=1)
+        handler = next(h for h in logging.getLogger(ROOT).handlers if isinstance(h, QueueHandler))
+        listener.stop()
+        logger = logging.getLogger("scripts.trade_bot")
+        for index in range(5):
+            logger.info(f"line {index}")
+        assert handler.dropped == 4
+        listener.start()
+
+    def test_log_dir_from_environment(self, monkeypatch):
+        """
+        Test if the default log directory comes from the environment, as set for the whole test session
+        """
+        monkeypatch.setenv(LOG_DIR_ENV, str(self.log_dir))
+        setup_logging()
+        logging.getLogger("scripts.trade_bot").info("here")
+        shutdown_logging()
+        assert [record["msg"] for record in self.read()] == ["here"]
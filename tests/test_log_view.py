@@ -0,0 +1,51 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import queue
+
+import pytest
+
+from scripts.interface.log_view import LogBuffer
+
+class TestLogBuffer:
+    @pytest.fixture(autouse=True)
+    def init_buffer(self):
+        self.source = queue.Queue()
+        self.log = LogBuffer(max_lines=100, max_batch=1000)
+
+    def test_coalesces_status_lines(self):
+        """
+        Test if repeated status lines of a batch collapse to the latest one per symbol
+        """
+        for i in range(50):
+            self.source.put(f"[BTCUSDT] PNL: {i:.3f} USDT, ROE: {i:.2f}%")
+            self.source.put(f"[ETHUSDT] RSI: {i:.2f}, Volatilidade: 1.00")
+        self.source.put("[BTCUSDT] executed buy order BTCUSDT at 100.0")
+
+        lines = self.log.drain(self.source)
+
+        assert lines == ["[BTCUSDT] PNL: 49.000 USDT, ROE: 49.00%", "[ETHUSDT] RSI: 49.00, Volatilidade: 1.00",
+                         "[BTCUSDT] executed buy order BTCUSDT at 100.0"]
+        assert self.log.coalesced == 98
+        assert self.log.dropped == 0
+
+    def test_bounded_batches_and_ring(self):
+        """
+        Test if a burst is drained in bounded batches and only the newest lines are kept
+        """
+        for i in range(2500):
+            self.source.put(f"executed order {i}")
+
+        lines = self.log.drain(self.source)
+        assert len(lines) == 100
+        assert lines[-1] == "executed order 999"
+        assert self.source.qsize() == 1500
+
+        while not self.source.empty():
+            self.log.drain(self.source)
+        assert len(self.log.lines) == 100
+        assert self.log.lines[0] == "executed order 2400"
+        # cada lote de 1000 (e o último de 500) exibe só as 100 linhas mais novas
+        assert self.log.dropped == 2200
+        assert self.log.counters() == "Dropped: 2200, Coalesced: 0"
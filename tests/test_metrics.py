@@ -0,0 +1,91 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+
+import pytest
+import requests
+
+from scripts.metrics import REGISTRY, Registry, start_http_server
+from scripts.mock_exchange import MockExchange, replay_messages
+from scripts.rate_limiter import RateLimiter
+from scripts.trade_bot import BinanceTradingBot
+
+class TestMetrics:
+    @pytest.fixture(autouse=True)
+    def init_registry(self):
+        self.registry = Registry()
+
+    def test_registry(self):
+        """
+        Test if counters, gauges and histograms are collected and rendered in Prometheus format
+        """
+        requests_total = self.registry.counter("requests_total", "Requests", ("endpoint",))
+        latency = self.registry.histogram("latency_seconds", "Latency", buckets=(0.001, 0.01, 0.1))
+        depth = self.registry.gauge("queue_depth", "Depth")
+
+        requests_total.labels("/fapi/v1/order").inc()
+        requests_total.labels("/fapi/v1/order").inc(2)
+        for value in (0.0005, 0.005, 0.005, 0.5):
+            latency.observe(value)
+        depth.set_function(lambda: 7)
+
+        snapshot = self.registry.collect()
+        assert snapshot["requests_total"][(("endpoint", "/fapi/v1/order"),)] == 3
+        assert snapshot["latency_seconds"][()]["count"] == 4
+        assert snapshot["latency_seconds"][()]["p50"] == 0.01
+        assert snapshot["queue_depth"][()] == 7
+        assert self.registry.counter("requests_total", "Requests", ("endpoint",)) is requests_total
+        with pytest.raises(ValueError):
+            self.registry.gauge("requests_total", "Requests")
+
+        text = self.registry.render()
+        assert 'requests_total{endpoint="/fapi/v1/order"} 3.0' in text
+        assert 'latency_seconds_bucket{le="0.01"} 3' in text
+        assert 'latency_seconds_bucket{le="+Inf"} 4' in text
+        assert "latency_seconds_count 4" in text
+        assert "queue_depth 7.0" in text
+
+    def test_http_endpoint(self):
+        """
+        Test if the registry is served over HTTP
+        """
+        self.registry.counter("ticks_total", "Ticks").inc()
+        server = start_http_server(0, registry=self.registry)
+        try:
+            response = requests.get(f"http://127.0.0.1:{server.server_address[1]}/metrics", timeout=5)
+        finally:
+            server.shutdown()
+        assert response.status_code == 200
+        assert "ticks_total 1.0" in response.text
+
+    def test_bot_instrumentation(self):
+        """
+        Test if the bot records request latency, stream lag, indicator time and order round trips
+        """
+        def orders_observed():
+            return sum(series["count"] for series in REGISTRY.collect().get("binance_order_rtt_seconds", {}).values())
+
+        before = orders_observed()
+        # uma consulta REST de posição por mensagem: limites folgados para não esperar pelo orçamento
+        with MockExchange(weight_limit=10 ** 9) as exchange:
+            exchange.add_synthetic_klines("BTCUSDT", "1m", count=700, seed=2, start=500)
+            bot = BinanceTradingBot(exchange.api_key, exchange.secret_key, "BTCUSDT", "1m", 0.001, 0.5, 0.5,
+                                    base_url=exchange.base_url, mode="inline")
+            bot.binance.rate_limiter = RateLimiter(weight_limit=10 ** 9)
+            # ordens na thread da estratégia: toda mensagem consulta a posição, sem depender do tempo de ack
+            bot.strategy.executor = None
+            rows = exchange.klines[("BTCUSDT", "1m")][500:]
+            for message in replay_messages("BTCUSDT", "1m", rows):
+                exchange.prices["BTCUSDT"] = float(message["k"]["c"])
+                bot.on_message(bot.ws, json.dumps(message))
+
+        snapshot = REGISTRY.collect()
+        stream = (("stream", "btcusdt@kline_1m"),)
+        assert snapshot["bot_messages_total"][stream] >= 800
+        assert snapshot["ws_message_lag_seconds"][stream]["count"] >= 800
+        assert snapshot["strategy_indicator_seconds"][(("interval", "1m"), ("symbol", "BTCUSDT"))]["count"] >= 800
+        assert snapshot["binance_request_seconds"][(("endpoint", "/fapi/v2/positionRisk"), ("method", "GET"))]["count"] >= 800
+        assert orders_observed() - before == len(exchange.orders) > 0
+        assert snapshot["bot_msg_queue_depth"][(("bot", "btcusdt@kline_1m"),)] == bot.msg_queue.qsize()
@@ -0,0 +1,100 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import threading
+import time
+
+import pytest
+
+from scripts.binance_gateway import BinanceAPIError, BinanceFutures
+from scripts.mock_exchange import MockExchange
+from scripts.trade_bot import BinanceTradingBot
+
+class TestMockExchange:
+    @pytest.fixture(autouse=True)
+    def init_exchange(self):
+        self.symbol = "BTCUSDT"
+        self.exchange = MockExchange(tick_interval=0.002, fee_rate=0.0)
+        self.exchange.add_synthetic_klines(self.symbol, "1m", count=1000, seed=1, start=600)
+        self.exchange.start()
+        self.trader = BinanceFutures(self.exchange.api_key, self.exchange.secret_key,
+                                     base_url=self.exchange.base_url, stream_url=self.exchange.stream_url)
+        yield
+        self.exchange.stop()
+
+    def test_order_matching(self):
+        """
+        Test if market orders fill at the current price and realize PnL on close
+        """
+        response = self.trader.buy_market_order(self.symbol, 0.002)
+        self.exchange.prices[self.symbol] += 10
+        self.trader.sell_market_order(self.symbol, 0.001)
+
+        position = self.trader.get_open_positions(self.symbol)[0]
+        assert float(position["positionAmt"]) == pytest.approx(0.001)
+        assert float(self.exchange.trades[-1]["realizedPnl"]) == pytest.approx(0.01)
+        order = self.trader.request("GET", "/fapi/v1/order", {"symbol": self.symbol, "origClientOrderId": response["clientOrderId"]})
+        assert order["status"] == "FILLED"
+
+    def test_rejections(self):
+        """
+        Test if bad signatures, reduce-only increases and long trade ranges are rejected
+        """
+        wrong = BinanceFutures(self.exchange.api_key, "wrong", base_url=self.exchange.base_url)
+        assert wrong.request("GET", "/fapi/v2/balance")["code"] == -1022
+
+        params = {"symbol": self.symbol, "side": "BUY", "type": "MARKET", "quantity": 0.001, "reduceOnly": "true"}
+        assert self.trader.request("POST", "/fapi/v1/order", params)["code"] == -2022
+
+        params = {"symbol": self.symbol, "startTime": 0, "endTime": 8 * 86400000}
+        assert self.trader.request("GET", "/fapi/v1/userTrades", params)["code"] == -1127
+
+    def test_latency(self):
+        """
+        Test if the configured latency is added to every REST call
+        """
+        self.exchange.latency = 0.05
+        start = time.perf_counter()
+        self.trader.get_balance()
+        assert time.perf_counter() - start >= 0.05
+
+    def test_bot_end_to_end(self):
+        """
+        Test if the trading bot runs against the local klines stream and user-data stream
+        """
+        bot = BinanceTradingBot(self.exchange.api_key, self.exchange.secret_key, self.symbol, "1m", 0.001, 1, 1,
+                                base_url=self.exchange.base_url, stream_url=self.exchange.stream_url)
+        thread = threading.Thread(target=bot.run, daemon=True)
+        thread.start()
+
+        deadline = time.time() + 10
+        messages = []
+        while time.time() < deadline and not any("executed" in m for m in messages):
+            messages.append(bot.ws_message())
+        bot.stop()
+
+        assert any(m.startswith("RSI:") for m in messages)
+        assert any("executed" in m for m in messages)
+        assert len(self.exchange.trades) > 0
+
+    def test_rest_failure_reaches_on_error(self):
+        """
+        Test if a REST failure in the strategy worker is reported to on_error and stops the bot
+        """
+        bot = BinanceTradingBot(self.exchange.api_key, self.exchange.secret_key, self.symbol, "1m", 0.001, 1, 1,
+                                base_url=self.exchange.base_url, stream_url=self.exchange.stream_url, mark_price=False)
+        errors = []
+        on_error = bot.on_error
+        bot.pipeline.on_error = lambda stream, error: (errors.append((stream, error)), on_error(stream, error))
+        bot.pipeline.start()
+        # 503 em todas as tentativas da sessão (1 + 3 retentativas)
+        self.exchange.fail_next("GET", "/fapi/v2/positionRisk", count=4)
+        price = self.exchange.prices[self.symbol]
+        bot.pipeline.submit(bot.stream, {"t": 0, "o": price, "h": price, "l": price, "c": price, "v": 1.0, "x": False})
+        assert bot.pipeline.drain()
+
+        assert [stream for stream, _ in errors] == [bot.stream]
+        assert isinstance(errors[0][1], BinanceAPIError)
+        assert bot.pipeline._thread is None
+        assert bot.ws_message().startswith("Error:")
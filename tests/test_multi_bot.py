@@ -0,0 +1,62 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+from unittest import mock
+
+import pytest
+
+from scripts.market_data import SpotMarketData
+from scripts.multi_bot import MultiSymbolBot
+
+SYMBOLS = ["BTCUSDT", "ETHUSDT", "BNBUSDT"]
+
+def klines(count=30):
+    return [[i * 60000, '100', '101', '99', str(100 + i % 5), '1', i * 60000 + 59999] for i in range(count)]
+
+def message(symbol, close, open_time=29 * 60000, closed=False):
+    data = {"e": "kline", "s": symbol, "k": {"t": open_time, "o": "100", "h": "110", "l": "90",
+                                            "c": str(close), "v": "1", "x": closed}}
+    return json.dumps({"stream": f"{symbol.lower()}@kline_1m", "data": data})
+
+class TestMultiSymbolBot:
+    @pytest.fixture(autouse=True)
+    def init_bot(self):
+        configs = [{"symbol": s, "interval": "1m", "volume": 0.001, "stop_gain": 5, "stop_loss": 5} for s in SYMBOLS]
+        with mock.patch.object(SpotMarketData, "get_historical_klines", return_value=klines()), \
+             mock.patch.object(SpotMarketData, "get_last_price", return_value=100.0):
+            self.bot = MultiSymbolBot("key", "secret", configs, is_test=True, mode="inline")
+        self.bot.binance.get_open_positions = mock.Mock(return_value=[])
+        self.bot.binance.buy_market_order = mock.Mock(return_value={"status": "NEW"})
+
+    def test_single_combined_stream(self):
+        """
+        Test if every symbol is subscribed on one /stream?streams= connection
+        """
+        assert self.bot.socket_url.startswith("wss://testnet.binance.vision/stream?streams=")
+        assert self.bot.socket_url.endswith("btcusdt@kline_1m/ethusdt@kline_1m/bnbusdt@kline_1m")
+        assert all(s.binance is self.bot.binance for s in self.bot.strategies.values())
+
+    def test_routes_messages_per_symbol(self):
+        """
+        Test if each combined-stream message only updates its own symbol state
+        """
+        self.bot.on_message(None, message("ETHUSDT", 123.0))
+
+        assert self.bot.strategies["ethusdt@kline_1m"].candles.closes()[-1] == 123.0
+        # o candle em aberto do /klines (29) fica fora do seed: o último de BTCUSDT é o 28, fechado
+        assert self.bot.strategies["btcusdt@kline_1m"].candles.closes()[-1] == 103.0
+        assert self.bot.strategies["ethusdt@kline_1m"].last_price == 123.0
+        assert self.bot.ws_message().startswith("[ETHUSDT] RSI:")
+
+    def test_error_in_one_symbol_is_isolated(self):
+        """
+        Test if a failing symbol reports the error without stopping the engine
+        """
+        self.bot.binance.get_open_positions.side_effect = [RuntimeError("boom"), []]
+        self.bot.on_message(None, message("BTCUSDT", 105.0))
+        self.bot.on_message(None, message("BNBUSDT", 106.0))
+
+        assert self.bot.ws_message() == "[BTCUSDT] Error: boom"
+        assert self.bot.strategies["bnbusdt@kline_1m"].last_price == 106.0
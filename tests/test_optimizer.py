@@ -0,0 +1,52 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import csv
+
+import numpy as np
+import pytest
+
+from scripts.backtest import run_backtest
+from scripts.kline_store import KlineStore
+from scripts.optimizer import grid, random_samples, sweep
+
+class TestOptimizer:
+    @pytest.fixture(autouse=True)
+    def init_store(self, tmp_path):
+        self.root = str(tmp_path / "klines")
+        self.output = str(tmp_path / "results.csv")
+        rng = np.random.default_rng(3)
+        size = 3000
+        self.close = 100 * np.exp(np.cumsum(rng.normal(0, 0.002, size)))
+        open_time = 1704067200000 + np.arange(size) * 60000
+        rows = np.column_stack([open_time, self.close, self.close, self.close, self.close, np.ones(size)])
+        KlineStore(self.root).append("BTCUSDT", "1m", rows)
+
+    def test_grid_and_samples(self):
+        """
+        Test if grid expands every combination and random samples respect the ranges
+        """
+        assert len(grid({"rsi_period": [7, 14], "stop_gain": [5, 10, 20]})) == 6
+        samples = random_samples({"rsi_period": (5, 30), "stop_loss": [5, 10]}, 20, seed=1)
+        assert all(5 <= s["rsi_period"] <= 30 and isinstance(s["rsi_period"], int) for s in samples)
+        with pytest.raises(ValueError):
+            grid({"atr_volatility": [40]})
+
+    def test_sweep_ranks_results(self):
+        """
+        Test if the process pool results match a direct backtest and are written ranked
+        """
+        param_sets = grid({"rsi_period": [7, 14], "stop_gain": [5, 10], "stop_loss": [5, 10]})
+        results = sweep(["BTCUSDT"], ["1m"], param_sets, store_root=self.root, workers=2, output=self.output)
+
+        assert len(results) == 8
+        assert [r["pnl"] for r in results] == sorted((r["pnl"] for r in results), reverse=True)
+        best = results[0]
+        params = {name: best[name] for name in ("rsi_period", "stop_gain", "stop_loss")}
+        assert best["pnl"] == pytest.approx(run_backtest(self.close, **params).pnl)
+
+        with open(self.output) as file:
+            rows = list(csv.DictReader(file))
+        assert rows[0]["rank"] == "1"
+        assert float(rows[0]["pnl"]) == pytest.approx(best["pnl"])
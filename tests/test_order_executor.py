@@ -0,0 +1,76 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import time
+
+import pytest
+
+from scripts.binance_gateway import BinanceFutures
+from scripts.mock_exchange import MockExchange
+from scripts.order_executor import ACKED, FILLED, REJECTED, OrderExecutor
+
+class TestOrderExecutor:
+    @pytest.fixture(autouse=True)
+    def init_executor(self):
+        self.symbol = "BTCUSDT"
+        self.exchange = MockExchange(fee_rate=0.0)
+        self.exchange.add_synthetic_klines(self.symbol, "1m", count=100, seed=1)
+        self.exchange.start()
+        self.trader = BinanceFutures(self.exchange.api_key, self.exchange.secret_key, base_url=self.exchange.base_url,
+                                     stream_url=self.exchange.stream_url)
+        self.executor = OrderExecutor(self.trader, backoff=0.01)
+        yield
+        self.executor.shutdown()
+        self.trader.stop_user_stream()
+        self.exchange.stop()
+
+    def test_retry_is_idempotent(self):
+        """
+        Test if transient failures cost a retry and never duplicate the order
+        """
+        self.exchange.fail_next("POST", "/fapi/v1/order", "unavailable")
+        ticket = self.executor.submit(self.symbol, "BUY", 0.001).result(timeout=5)
+        assert ticket.status == ACKED
+        assert len(self.exchange.orders) == 1
+
+        # executada na corretora, mas sem resposta: a consulta pelo client id evita o reenvio
+        self.exchange.fail_next("POST", "/fapi/v1/order", "lost")
+        ticket = self.executor.submit(self.symbol, "BUY", 0.001).result(timeout=5)
+        assert ticket.ok
+        assert len(self.exchange.orders) == 2
+        assert self.exchange.orders[2]["clientOrderId"] == ticket.client_order_id
+        assert float(self.trader.get_open_positions(self.symbol)[0]["positionAmt"]) == pytest.approx(0.002)
+
+    def test_rejection_and_callbacks(self):
+        """
+        Test if rejections are reported through the callback without raising or exiting
+        """
+        results = []
+        future = self.executor.submit(self.symbol, "SELL", 0.001, reduce_only=True, callback=results.append)
+        ticket = future.result(timeout=5)
+        deadline = time.time() + 5
+        while not results and time.time() < deadline:
+            time.sleep(0.01)
+
+        assert ticket.status == REJECTED
+        assert ticket.error.code == -2022
+        assert results == [ticket]
+        # o caminho síncrono também devolve o erro em vez de encerrar o processo
+        response = self.trader.buy_market_order("NOPEUSDT", 0.001)
+        assert response["code"] == -1121
+
+    def test_fills_from_user_stream(self):
+        """
+        Test if fills reported by the user-data stream complete the ticket
+        """
+        self.trader.start_user_stream()
+        deadline = time.time() + 5
+        while not self.trader.account.synced and time.time() < deadline:
+            time.sleep(0.01)
+
+        ticket = self.executor.submit(self.symbol, "BUY", 0.002).result(timeout=5)
+        assert ticket.wait_filled(timeout=5)
+        assert ticket.status == FILLED
+        assert ticket.filled_qty == pytest.approx(0.002)
+        assert ticket.avg_price == pytest.approx(self.exchange.prices[self.symbol])
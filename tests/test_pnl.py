@@ -0,0 +1,189 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import json
+import time
+
+import pytest
+import websocket
+
+from scripts.binance_gateway import BinanceFutures
+from scripts.mock_exchange import MockExchange
+from scripts.pnl import PnlLedger, initial_margin, return_on_equity, unrealized_pnl
+from scripts.strategy import SymbolStrategy
+from scripts.user_stream import AccountState
+
+def wait(condition, timeout=5):
+    deadline = time.time() + timeout
+    while not condition() and time.time() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+def trade_event(symbol, execution, realized, commission, client_order_id="fb-1", status="FILLED"):
+    return {"e": "ORDER_TRADE_UPDATE", "E": 1, "o": {
+        "s": symbol, "c": client_order_id, "S": "SELL", "X": status, "x": execution, "z": "0.01", "l": "0.01",
+        "L": "31000", "ap": "31000", "rp": str(realized), "n": str(commission), "N": "USDT"}}
+
+class TestPnl:
+    @pytest.fixture(autouse=True)
+    def init_exchange(self):
+        self.symbol = "BTCUSDT"
+        self.exchange = MockExchange(mark_interval=0.02)
+        self.exchange.add_synthetic_klines(self.symbol, "1m", count=100, seed=1)
+        self.exchange.start()
+        self.trader = BinanceFutures(self.exchange.api_key, self.exchange.secret_key, base_url=self.exchange.base_url,
+                                     stream_url=self.exchange.stream_url)
+        yield
+        self.trader.stop_user_stream()
+        self.exchange.stop()
+
+    def test_local_roe(self):
+        """
+        Test if PnL and ROE are computed from entry price, size and leverage
+        """
+        pnl = unrealized_pnl(-0.01, 30000, 29700)
+        margin = initial_margin(-0.01, 30000, 20)
+
+        assert pnl == pytest.approx(3.0)
+        assert margin == pytest.approx(15.0)
+        assert return_on_equity(pnl, margin) == pytest.approx(20.0)
+        assert return_on_equity(pnl, 0) == 0
+
+    def test_ledger_from_fills(self):
+        """
+        Test if the ledger accumulates realized PnL and commission of this symbol's fills only
+        """
+        state = AccountState()
+        ledger = PnlLedger(self.symbol)
+        state.add_listener(ledger.on_order_update)
+        state.apply_event(trade_event(self.symbol, "TRADE", 10.0, 0.5))
+        state.apply_event(trade_event(self.symbol, "NEW", 0, 0))
+        state.apply_event(trade_event("ETHUSDT", "TRADE", 99.0, 1.0))
+
+        assert ledger.realized == pytest.approx(10.0)
+        assert ledger.net == pytest.approx(9.5)
+        assert len(ledger.entries) == 1
+
+    def test_ledger_estimates(self):
+        """
+        Test if an estimate is replaced by its order's fill, dropped when the order fails and fills are booked once
+        """
+        state = AccountState()
+        ledger = PnlLedger(self.symbol)
+        state.add_listener(ledger.on_order_update)
+        ledger.estimate("fb-1", 5.0, price=31000, quantity=0.01)
+        assert ledger.realized == pytest.approx(5.0)
+        state.apply_event(trade_event(self.symbol, "TRADE", 4.8, 0.1))
+        # evento repetido (ex.: reconexão do stream)
+        state.apply_event(trade_event(self.symbol, "TRADE", 4.8, 0.1))
+        ledger.estimate("fb-1", 5.0)
+        assert ledger.realized == pytest.approx(4.8)
+        assert [entry["source"] for entry in ledger.entries] == ["fill"]
+
+        ledger.estimate("fb-2", 3.0)
+        state.apply_event(trade_event(self.symbol, "EXPIRED", 0, 0, client_order_id="fb-2", status="EXPIRED"))
+        ledger.estimate("fb-3", 2.0)
+        ledger.cancel("fb-3")
+        assert ledger.realized == pytest.approx(4.8)
+        assert ledger.net == pytest.approx(4.7)
+        assert len(ledger.entries) == 1
+
+    def test_mark_price_stop(self):
+        """
+        Test if a mark price update closes the position locally, without REST reads, and books the realized fill
+        """
+        self.trader.start_user_stream()
+        assert wait(lambda: self.trader.account.synced)
+        strategy = SymbolStrategy(self.trader, self.symbol, "1m", 0.001, stop_gain=5, stop_loss=5)
+        self.trader.buy_market_order(self.symbol, 0.004)
+        assert wait(lambda: self.trader.account.get_position(self.symbol) is not None)
+
+        entry = self.trader.account.get_position(self.symbol)[1]
+        start = len(self.exchange.requests)
+        # 20x: +0,1% no mark price = +2% de ROE, abaixo do stop
+        strategy.on_mark_price({"e": "markPriceUpdate", "s": self.symbol, "p": str(entry * 1.001)})
+        assert strategy.roe == pytest.approx(2.0)
+        assert len(self.exchange.requests) == start
+
+        self.exchange.prices[self.symbol] = entry * 1.01
+        strategy.on_mark_price({"e": "markPriceUpdate", "s": self.symbol, "p": str(entry * 1.01)})
+        assert self.exchange.requests[start:] == [("POST", "/fapi/v1/order")]
+        # só o fechamento: a abertura foi uma ordem manual, fora da estratégia
+        assert wait(lambda: len(strategy.ledger.entries) == 1)
+        assert strategy.gross_pnl == pytest.approx(float(self.exchange.trades[-1]["realizedPnl"]))
+        assert self.exchange.positions[self.symbol]["amount"] == 0
+
+    def test_same_symbol_two_intervals(self):
+        """
+        Test if two strategies on the same symbol book only the fills of their own orders
+        """
+        self.trader.start_user_stream()
+        assert wait(lambda: self.trader.account.synced)
+        fast = SymbolStrategy(self.trader, self.symbol, "1m", 0.004, stop_gain=5, stop_loss=5)
+        slow = SymbolStrategy(self.trader, self.symbol, "5m", 0.002, stop_gain=5, stop_loss=5)
+        entry = self.exchange.prices[self.symbol]
+        fast.open_position('BUY', entry)
+        self.exchange.prices[self.symbol] = entry * 1.01
+        fast.close_position('SELL', 0.004)
+        slow.open_position('SELL', entry * 1.01)
+        self.exchange.prices[self.symbol] = entry
+        slow.close_position('BUY', 0.002)
+
+        assert wait(lambda: len(fast.ledger.entries) == 2 and len(slow.ledger.entries) == 2)
+        time.sleep(0.1)
+        realized = [float(trade["realizedPnl"]) for trade in self.exchange.trades]
+        assert fast.gross_pnl == pytest.approx(realized[0] + realized[1])
+        assert slow.gross_pnl == pytest.approx(realized[2] + realized[3])
+        # cada execução em um único ledger: a soma não conta nada duas vezes
+        assert fast.gross_pnl + slow.gross_pnl == pytest.approx(sum(realized))
+        assert len(fast.ledger.entries) == len(slow.ledger.entries) == 2
+
+    def test_mark_price_stop_unsynced(self):
+        """
+        Test if, without the account mirror, a mark price update reads the position opened since the last read
+        """
+        strategy = SymbolStrategy(self.trader, self.symbol, "1m", 0.004, stop_gain=5, stop_loss=5, cadence="close")
+        strategy.on_mark_price({"e": "markPriceUpdate", "s": self.symbol, "p": str(self.exchange.prices[self.symbol])})
+        entry = self.exchange.prices[self.symbol]
+        strategy.open_position('BUY', entry)
+        assert self.exchange.positions[self.symbol]["amount"] == pytest.approx(0.004)
+
+        # ticks do kline não leem a posição enquanto o mark price está em dia
+        strategy.on_kline({"t": 0, "o": entry, "h": entry, "l": entry, "c": entry, "v": 1.0, "x": False})
+        self.exchange.prices[self.symbol] = entry * 0.99
+        strategy.on_mark_price({"e": "markPriceUpdate", "s": self.symbol, "p": str(entry * 0.99)})
+        assert self.exchange.positions[self.symbol]["amount"] == 0
+        assert strategy.roe == pytest.approx(-20.0, rel=0.05)
+
+    def test_failed_close_not_booked(self):
+        """
+        Test if, without the account mirror, a failed close books nothing and the retried close is booked once
+        """
+        strategy = SymbolStrategy(self.trader, self.symbol, "1m", 0.004, stop_gain=5, stop_loss=5, cadence="close")
+        entry = self.exchange.prices[self.symbol]
+        strategy.open_position('BUY', entry)
+        self.exchange.prices[self.symbol] = entry * 0.99
+        self.exchange.fail_next("POST", "/fapi/v1/order", count=3)
+        strategy.on_mark_price({"e": "markPriceUpdate", "s": self.symbol, "p": str(entry * 0.99)})
+        assert self.exchange.positions[self.symbol]["amount"] == pytest.approx(0.004)
+        assert strategy.gross_pnl == 0
+
+        strategy.on_mark_price({"e": "markPriceUpdate", "s": self.symbol, "p": str(entry * 0.99)})
+        assert self.exchange.positions[self.symbol]["amount"] == 0
+        assert strategy.gross_pnl == pytest.approx(0.004 * (entry * 0.99 - entry))
+        assert [item["source"] for item in strategy.ledger.entries] == ["estimate"]
+
+    def test_mark_price_stream(self):
+        """
+        Test if the mock exchange publishes markPriceUpdate events for the subscribed symbol
+        """
+        ws = websocket.create_connection(f"{self.exchange.stream_url}/ws/btcusdt@markPrice@1s", timeout=5)
+        try:
+            event = json.loads(ws.recv())
+        finally:
+            ws.close()
+
+        assert event["e"] == "markPriceUpdate"
+        assert event["s"] == self.symbol
+        assert float(event["p"]) == pytest.approx(self.exchange.prices[self.symbol])
@@ -0,0 +1,102 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import threading
+import time
+
+import pytest
+
+from scripts.binance_gateway import BinanceFutures
+from scripts.metrics import REGISTRY
+from scripts.mock_exchange import MockExchange
+from scripts.rate_limiter import ACCOUNT, INFO, ORDER, RateLimiter, RateLimitExceeded
+
+class TestRateLimiter:
+    @pytest.fixture(autouse=True)
+    def init_limiter(self):
+        self.limiter = RateLimiter(weight_limit=100, orders_10s=2, orders_1m=10)
+
+    def test_priorities(self):
+        """
+        Test if informational calls are shed first and orders always get through
+        """
+        for _ in range(12):
+            self.limiter.acquire("GET", "/fapi/v2/positionRisk")
+        # 40 de peso restante: abaixo da reserva de 30% só depois de mais duas consultas
+        self.limiter.acquire("GET", "/fapi/v2/balance")
+        self.limiter.acquire("GET", "/fapi/v2/balance")
+        with pytest.raises(RateLimitExceeded) as error:
+            self.limiter.acquire("GET", "/fapi/v1/userTrades")
+        assert error.value.priority == INFO
+
+        assert self.limiter.acquire("POST", "/fapi/v1/order") == ORDER
+        assert self.limiter.acquire("GET", "/fapi/v2/account") == ACCOUNT
+        budget = self.limiter.budget()
+        assert budget["weight_1m"]["available"] < 30
+        assert budget["orders_10s"]["available"] < 2
+
+    def test_server_headers(self):
+        """
+        Test if the buckets follow the usage reported by the exchange and 429 suspends the calls
+        """
+        self.limiter.update(200, {"X-MBX-USED-WEIGHT-1M": "95", "X-MBX-ORDER-COUNT-10S": "2"})
+        assert self.limiter.budget()["weight_1m"]["available"] < 6
+        with pytest.raises(RateLimitExceeded):
+            self.limiter.acquire("GET", "/fapi/v2/balance")
+
+        self.limiter = RateLimiter()
+        self.limiter.update(429, {"Retry-After": "0.3"})
+        assert self.limiter.budget()["blocked_for"] > 0
+        with pytest.raises(RateLimitExceeded):
+            self.limiter.acquire("GET", "/fapi/v2/balance")
+        start = time.monotonic()
+        self.limiter.acquire("POST", "/fapi/v1/order")
+        assert time.monotonic() - start >= 0.25
+
+    def test_scrape_does_not_refill(self):
+        """
+        Test if scraping the budget gauge while calls take tokens never gives budget back
+        """
+        # reposição desprezível: o saldo final depende só do que foi consumido
+        limiter = RateLimiter(weight_limit=100000)
+        limiter.weight.window = 1e9
+        stop = threading.Event()
+
+        def scrape():
+            while not stop.is_set():
+                REGISTRY.render()
+        scraper = threading.Thread(target=scrape)
+        scraper.start()
+        try:
+            for _ in range(2000):
+                limiter.acquire("GET", "/fapi/v2/positionRisk")
+        finally:
+            stop.set()
+            scraper.join()
+
+        assert limiter.weight.tokens == pytest.approx(100000 - 2000 * 5, abs=1)
+        tokens, updated = limiter.weight.tokens, limiter.weight.updated
+        assert limiter.weight.level() == pytest.approx(tokens, abs=1)
+        assert (limiter.weight.tokens, limiter.weight.updated) == (tokens, updated)
+
+    def test_gateway_against_mock(self):
+        """
+        Test if the gateway reads the weight headers and backs off after a 429
+        """
+        with MockExchange(weight_limit=12) as exchange:
+            exchange.add_synthetic_klines("BTCUSDT", "1m", count=100, seed=1)
+            trader = BinanceFutures(exchange.api_key, exchange.secret_key, base_url=exchange.base_url)
+            trader.get_open_positions("BTCUSDT")
+            trader.get_open_positions("BTCUSDT")
+            assert trader.get_rate_limit_budget()["weight_1m"]["available"] < 2391
+
+            # mesmo se a janela de um minuto virar no meio do teste, o limite de 12 estoura em poucas chamadas
+            for _ in range(3):
+                if trader.get_balance().get("code") == -1003:
+                    break
+            else:
+                pytest.fail("no 429 from the exchange")
+            assert trader.get_rate_limit_budget()["blocked_for"] > 0
+            with pytest.raises(RateLimitExceeded):
+                trader.get_balance()
@@ -0,0 +1,69 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import hashlib
+import hmac
+import time
+from urllib.parse import parse_qsl
+
+import pytest
+
+from scripts.binance_gateway import BinanceFutures
+from scripts.mock_exchange import MockExchange
+from scripts.signing import RequestSigner
+
+class TestSigning:
+    @pytest.fixture(autouse=True)
+    def init_exchange(self):
+        # relógio do servidor 10 s à frente: sem sincronizar, toda chamada assinada cai fora do recvWindow
+        with MockExchange(clock_offset=10000) as exchange:
+            exchange.add_synthetic_klines("BTCUSDT", "1m", count=50, seed=1)
+            self.exchange = exchange
+            self.trader = BinanceFutures(exchange.api_key, exchange.secret_key, base_url=exchange.base_url)
+            yield
+
+    def test_query(self):
+        """
+        Test if the signature covers exactly the encoded query, including recvWindow and timestamp
+        """
+        signer = RequestSigner("secret", recv_window=3000)
+        signer.offset = 250
+        query = signer.query({"symbol": "BTCUSDT", "quantity": 0.001, "note": "a b&c"})
+        data, signature = query.rsplit("&signature=", 1)
+        assert signature == hmac.new(b"secret", data.encode(), hashlib.sha256).hexdigest()
+        params = dict(parse_qsl(data))
+        assert params["note"] == "a b&c"
+        assert params["recvWindow"] == "3000"
+        assert abs(int(params["timestamp"]) - (time.time() * 1000 + 250)) < 1000
+        assert signer.query({"symbol": "BTCUSDT"}, signed=False) == "symbol=BTCUSDT"
+
+        signer.set_key("other")
+        assert signer.sign(data) == hmac.new(b"other", data.encode(), hashlib.sha256).hexdigest()
+
+    def test_server_time_offset(self):
+        """
+        Test if the first signed call syncs the offset from /fapi/v1/time and is accepted
+        """
+        response = self.trader.request('GET', '/fapi/v2/balance')
+        assert isinstance(response, list)
+        assert abs(self.trader.signer.offset - 10000) < 500
+        assert [path for _, path in self.exchange.requests] == ["/fapi/v1/time", "/fapi/v2/balance"]
+
+        # dentro do intervalo não há nova consulta
+        self.trader.request('GET', '/fapi/v2/balance')
+        assert [path for _, path in self.exchange.requests].count("/fapi/v1/time") == 1
+
+    def test_resync_on_recv_window(self):
+        """
+        Test if a -1021 rejection resyncs the clock and resends the call once
+        """
+        self.trader.sync_time()
+        self.trader.exchange_info.load()
+        self.exchange.clock_offset = -20000
+        response = self.trader.buy_market_order("BTCUSDT", 0.001)
+        assert "orderId" in response
+        assert abs(self.trader.signer.offset + 20000) < 500
+        assert [path for _, path in self.exchange.requests] == ["/fapi/v1/time", "/fapi/v1/exchangeInfo", "/fapi/v1/order",
+                                                               "/fapi/v1/time", "/fapi/v1/order"]
+        assert len(self.exchange.orders) == 1
@@ -0,0 +1,82 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import time
+
+import pytest
+
+from scripts.binance_gateway import BinanceFutures
+from scripts.mock_exchange import MockExchange
+from scripts.trade_store import TradeStore
+
+DAY = 24 * 60 * 60 * 1000
+
+class TestTradeStore:
+    @pytest.fixture(autouse=True)
+    def init_store(self, tmp_path):
+        self.symbol = "BTCUSDT"
+        self.now = int(time.time() * 1000)
+        self.exchange = MockExchange()
+        self.exchange.start()
+        self.trader = BinanceFutures(self.exchange.api_key, self.exchange.secret_key, base_url=self.exchange.base_url)
+        self.store = TradeStore(str(tmp_path / "trades.sqlite"))
+        # 2500 trades nos últimos 20 dias, mais que uma página e que uma janela
+        self.add_trades(2500, self.now - 20 * DAY, 20 * DAY)
+        yield
+        self.store.close()
+        self.exchange.stop()
+
+    def add_trades(self, count, start, span):
+        for i in range(count):
+            trade_id = len(self.exchange.trades) + 1
+            self.exchange.trades.append({
+                "id": trade_id, "orderId": trade_id, "symbol": self.symbol, "side": "SELL", "price": "100",
+                "qty": "0.001", "quoteQty": "0.1", "realizedPnl": "0.5", "commission": "0.01",
+                "commissionAsset": "USDT", "positionSide": "BOTH", "buyer": False, "maker": False,
+                "time": start + i * span // count,
+            })
+
+    def requests_since(self, start):
+        return len(self.exchange.requests) - start
+
+    def test_iter_trades_pages_and_windows(self):
+        """
+        Test if a range longer than 7 days and one page is returned complete and in order
+        """
+        trades = list(self.trader.iter_trades(self.symbol, self.now - 21 * DAY, self.now))
+
+        assert [trade["id"] for trade in trades] == list(range(1, 2501))
+        assert self.trader.get_trade_history(self.symbol, self.now - 21 * DAY, self.now) == trades
+
+    def test_iter_trades_from_id(self):
+        """
+        Test if paging by fromId starts at the requested trade
+        """
+        trades = list(self.trader.iter_trades(self.symbol, from_id=1200, limit=500))
+
+        assert [trade["id"] for trade in trades] == list(range(1200, 2501))
+
+    def test_pnl_report_is_incremental(self):
+        """
+        Test if a repeated report fetches only the trades newer than the cached ones
+        """
+        report = self.store.pnl_report(self.trader, self.symbol, self.now - 21 * DAY)
+        assert report["trades"] == 2500
+        assert report["realized_pnl"] == pytest.approx(1250)
+        assert report["net_pnl"] == pytest.approx(1225)
+
+        self.add_trades(3, self.now + 1, 3)
+        start = len(self.exchange.requests)
+        report = self.store.pnl_report(self.trader, self.symbol, self.now - 21 * DAY)
+        assert report["trades"] == 2503
+        assert self.requests_since(start) == 1
+
+    def test_sync_backfills_earlier_range(self):
+        """
+        Test if asking for an earlier start fetches only the range before the cache
+        """
+        assert self.store.sync(self.trader, self.symbol, self.now - 5 * DAY) == 625
+        assert self.store.sync(self.trader, self.symbol, self.now - 21 * DAY) == 1875
+        assert [trade["id"] for trade in self.store.trades(self.symbol)] == list(range(1, 2501))
+        assert self.store.sync(self.trader, self.symbol, self.now - 21 * DAY) == 0
@@ -0,0 +1,108 @@
+import os
+import sys
+# Adiciona o diretório raiz do projeto ao caminho do sistema
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'scripts')))
+import pytest
+
+from user_stream import AccountState
+
+class TestAccountState:
+    @pytest.fixture(autouse=True)
+    def init_state(self):
+        self.symbol = "BTCUSDT"
+        self.state = AccountState()
+        self.state.load_positions([
+            {"symbol": "BTCUSDT", "positionSide": "BOTH", "positionAmt": "0.010", "entryPrice": "30000.0",
+             "unRealizedProfit": "1.5", "marginType": "cross", "leverage": "20"},
+            {"symbol": "ETHUSDT", "positionSide": "BOTH", "positionAmt": "0.000", "entryPrice": "0.0",
+             "unRealizedProfit": "0", "marginType": "cross", "leverage": "10"},
+        ])
+        self.state.load_account({
+            "assets": [{"asset": "USDT", "walletBalance": "1000.0", "crossWalletBalance": "1000.0"}],
+            "positions": [{"symbol": "BTCUSDT", "positionSide": "BOTH", "initialMargin": "15.1", "leverage": "20"}],
+        })
+
+    def test_reconcile_from_rest(self):
+        """
+        Test if the REST snapshot fills the mirror in the same format as get_open_positions
+        """
+        positions = self.state.get_open_positions(self.symbol)
+
+        assert self.state.synced
+        assert len(positions) == 1
+        assert positions[0]['side'] == 'SELL'
+        assert positions[0]['currentSide'] == 'BUY'
+        assert float(positions[0]['positionAmt']) == 0.01
+        assert self.state.get_position_margin() == 15.1
+        assert self.state.get_open_positions("ETHUSDT") == []
+
+    def test_account_update(self):
+        """
+        Test if ACCOUNT_UPDATE events replace positions and balances
+        """
+        self.state.apply_event({
+            "e": "ACCOUNT_UPDATE", "E": 1, "T": 1,
+            "a": {
+                "m": "ORDER",
+                "B": [{"a": "USDT", "wb": "990.0", "cw": "990.0", "bc": "0"}],
+                "P": [
+                    {"s": "BTCUSDT", "pa": "0", "ep": "0", "cr": "0", "up": "0", "mt": "cross", "iw": "0", "ps": "BOTH"},
+                    {"s": "ETHUSDT", "pa": "-1.0", "ep": "2000.0", "cr": "0", "up": "0", "mt": "cross", "iw": "0", "ps": "BOTH"},
+                ],
+            },
+        })
+
+        positions = self.state.get_open_positions("ETHUSDT")
+        assert self.state.get_open_positions(self.symbol) == []
+        assert positions[0]['side'] == 'BUY'
+        assert positions[0]['currentSide'] == 'SELL'
+        assert self.state.get_position_margin() == pytest.approx(200.0)
+        assert self.state.get_balance("USDT")["walletBalance"] == 990.0
+
+    def test_order_and_config_updates(self):
+        """
+        Test if ORDER_TRADE_UPDATE and ACCOUNT_CONFIG_UPDATE events are mirrored
+        """
+        self.state.apply_event({
+            "e": "ORDER_TRADE_UPDATE", "E": 2, "T": 2,
+            "o": {"s": "BTCUSDT", "c": "bot-1", "S": "BUY", "X": "FILLED", "x": "TRADE",
+                  "z": "0.010", "L": "30000.0", "rp": "0"},
+        })
+        self.state.apply_event({"e": "ACCOUNT_CONFIG_UPDATE", "E": 3, "T": 3, "ac": {"s": "BTCUSDT", "l": 10}})
+
+        assert self.state.orders["bot-1"]["status"] == "FILLED"
+        assert self.state.get_position_margin() == pytest.approx(30.0)
+
+    def test_events_during_snapshot(self):
+        """
+        Test if events received while the REST snapshot is in flight are applied after it instead of being overwritten
+        """
+        fills = []
+        self.state.add_listener(fills.append)
+        self.state.begin_snapshot()
+        self.state.apply_event({
+            "e": "ACCOUNT_UPDATE", "E": 5, "T": 5,
+            "a": {"m": "ORDER", "B": [], "P": [
+                {"s": "BTCUSDT", "pa": "0.020", "ep": "30500.0", "up": "0", "mt": "cross", "ps": "BOTH"}]},
+        })
+        self.state.apply_event({
+            "e": "ORDER_TRADE_UPDATE", "E": 5, "T": 5,
+            "o": {"s": "BTCUSDT", "c": "bot-2", "S": "BUY", "X": "FILLED", "x": "TRADE",
+                  "z": "0.010", "L": "31000.0", "rp": "0"},
+        })
+        assert fills == []
+
+        # resposta REST montada antes dos eventos acima
+        self.state.load_positions([
+            {"symbol": "BTCUSDT", "positionSide": "BOTH", "positionAmt": "0.010", "entryPrice": "30000.0",
+             "unRealizedProfit": "0", "marginType": "cross", "leverage": "20"},
+        ])
+        self.state.load_account({"assets": [], "positions": []})
+        assert not self.state.synced
+        self.state.end_snapshot()
+
+        assert self.state.synced
+        assert self.state.get_position(self.symbol) == (0.02, 30500.0, 20.0)
+        assert [order["clientOrderId"] for order in fills] == ["bot-2"]
+        self.state.apply_event({"e": "ACCOUNT_CONFIG_UPDATE", "E": 6, "T": 6, "ac": {"s": "BTCUSDT", "l": 10}})
+        assert self.state.leverage[self.symbol] == 10